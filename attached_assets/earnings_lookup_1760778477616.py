@@ -9,77 +9,107 @@ sys.path.append('/opt/.manus/.sandbox-runtime')
 from data_api import ApiClient
 from datetime import datetime
 from typing import Optional, Dict, Any
+from ff_earnings_cache import EarningsCache, get_default_cache
 
-def get_earnings_date(ticker: str) -> Optional[str]:
+def get_earnings_date(ticker: str, cache: Optional[EarningsCache] = None) -> Optional[str]:
     """
     Get the next earnings date for a ticker using Yahoo Finance API
     
+    Results (including "no date found") are stored in the shared earnings cache.
+    
     Returns: Earnings date in YYYY-MM-DD format or None
     """
+    cache = cache or get_default_cache()
+    hit, earnings_date = cache.get('yahoo_api', ticker)
+    if hit:
+        return earnings_date
+    
     try:
-        client = ApiClient()
-        
-        # Get calendar events which includes earnings
-        response = client.call_api('YahooFinance/get_calendar_events', query={'symbol': ticker})
-        
-        if not response:
-            return None
-        
-        # Check for earnings date in response
-        if 'earnings' in response:
-            earnings = response['earnings']
-            if isinstance(earnings, dict):
-                # Try different possible keys
-                for key in ['earningsDate', 'earnings_date', 'nextEarningsDate', 'date']:
-                    if key in earnings:
-                        date_value = earnings[key]
+        return fetch_earnings_date(ticker, cache=cache)
+    except Exception as e:
+        print(f"Error fetching earnings for {ticker}: {e}")
+        return None
+
+
+def fetch_earnings_date(ticker: str, cache: Optional[EarningsCache] = None) -> Optional[str]:
+    """
+    Query the Yahoo Finance API (no cache check) and cache the answer
+    
+    Returns: Earnings date in YYYY-MM-DD format or None
+    Raises: Any API or network error
+    """
+    cache = cache or get_default_cache()
+    earnings_date = _lookup_earnings_date(ticker)
+    cache.put('yahoo_api', ticker, earnings_date)
+    return earnings_date
+
+
+def _lookup_earnings_date(ticker: str) -> Optional[str]:
+    """
+    Query the Yahoo Finance API for the next earnings date
+    
+    Returns: Earnings date in YYYY-MM-DD format or None
+    Raises: Any API or network error
+    """
+    client = ApiClient()
+    
+    # Get calendar events which includes earnings
+    response = client.call_api('YahooFinance/get_calendar_events', query={'symbol': ticker})
+    
+    if not response:
+        return None
+    
+    # Check for earnings date in response
+    if 'earnings' in response:
+        earnings = response['earnings']
+        if isinstance(earnings, dict):
+            # Try different possible keys
+            for key in ['earningsDate', 'earnings_date', 'nextEarningsDate', 'date']:
+                if key in earnings:
+                    date_value = earnings[key]
+                    if isinstance(date_value, list) and date_value:
+                        date_value = date_value[0]
+                    if date_value:
+                        # Parse and format date
+                        try:
+                            if isinstance(date_value, str):
+                                # Try to parse various date formats
+                                for fmt in ['%Y-%m-%d', '%Y-%m-%dT%H:%M:%S', '%m/%d/%Y']:
+                                    try:
+                                        dt = datetime.strptime(date_value.split('T')[0] if 'T' in date_value else date_value, fmt)
+                                        return dt.strftime('%Y-%m-%d')
+                                    except:
+                                        continue
+                            elif isinstance(date_value, int):
+                                # Unix timestamp
+                                dt = datetime.fromtimestamp(date_value)
+                                return dt.strftime('%Y-%m-%d')
+                        except:
+                            pass
+    
+    # Try alternative approach - get stock insights which may have earnings info
+    insights_response = client.call_api('YahooFinance/get_stock_insights', query={'symbol': ticker})
+    
+    if insights_response and 'insights' in insights_response:
+        insights = insights_response['insights']
+        # Look for earnings-related data
+        for key in ['upcomingEvents', 'events', 'calendar']:
+            if key in insights:
+                events = insights[key]
+                if isinstance(events, dict) and 'earnings' in events:
+                    earnings_data = events['earnings']
+                    if isinstance(earnings_data, dict) and 'earningsDate' in earnings_data:
+                        date_value = earnings_data['earningsDate']
                         if isinstance(date_value, list) and date_value:
                             date_value = date_value[0]
                         if date_value:
-                            # Parse and format date
                             try:
-                                if isinstance(date_value, str):
-                                    # Try to parse various date formats
-                                    for fmt in ['%Y-%m-%d', '%Y-%m-%dT%H:%M:%S', '%m/%d/%Y']:
-                                        try:
-                                            dt = datetime.strptime(date_value.split('T')[0] if 'T' in date_value else date_value, fmt)
-                                            return dt.strftime('%Y-%m-%d')
-                                        except:
-                                            continue
-                                elif isinstance(date_value, int):
-                                    # Unix timestamp
-                                    dt = datetime.fromtimestamp(date_value)
-                                    return dt.strftime('%Y-%m-%d')
+                                dt = datetime.fromtimestamp(date_value) if isinstance(date_value, int) else datetime.strptime(date_value.split('T')[0], '%Y-%m-%d')
+                                return dt.strftime('%Y-%m-%d')
                             except:
                                 pass
-        
-        # Try alternative approach - get stock insights which may have earnings info
-        insights_response = client.call_api('YahooFinance/get_stock_insights', query={'symbol': ticker})
-        
-        if insights_response and 'insights' in insights_response:
-            insights = insights_response['insights']
-            # Look for earnings-related data
-            for key in ['upcomingEvents', 'events', 'calendar']:
-                if key in insights:
-                    events = insights[key]
-                    if isinstance(events, dict) and 'earnings' in events:
-                        earnings_data = events['earnings']
-                        if isinstance(earnings_data, dict) and 'earningsDate' in earnings_data:
-                            date_value = earnings_data['earningsDate']
-                            if isinstance(date_value, list) and date_value:
-                                date_value = date_value[0]
-                            if date_value:
-                                try:
-                                    dt = datetime.fromtimestamp(date_value) if isinstance(date_value, int) else datetime.strptime(date_value.split('T')[0], '%Y-%m-%d')
-                                    return dt.strftime('%Y-%m-%d')
-                                except:
-                                    pass
-        
-        return None
-        
-    except Exception as e:
-        print(f"Error fetching earnings for {ticker}: {e}")
-        return None
+    
+    return None
 
 
 def test_earnings_lookup():
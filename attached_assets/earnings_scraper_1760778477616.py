@@ -3,61 +3,47 @@
 Earnings date lookup using web scraping as fallback
 """
 
-import requests
-from datetime import datetime
 from typing import Optional
-import re
+from ff_earnings_cache import EarningsCache, get_default_cache
+from ff_earnings_yahoo import fetch_earnings_date_streaming
 
-def get_earnings_date_yahoo(ticker: str) -> Optional[str]:
+def get_earnings_date_yahoo(ticker: str, cache: Optional[EarningsCache] = None) -> Optional[str]:
     """
     Scrape earnings date from Yahoo Finance
     
+    Results (including "no date found") are stored in the shared earnings cache.
+    
     Returns: Earnings date in YYYY-MM-DD format or None
     """
+    cache = cache or get_default_cache()
+    hit, earnings_date = cache.get('yahoo', ticker)
+    if hit:
+        return earnings_date
+    
     try:
-        url = f"https://finance.yahoo.com/quote/{ticker}"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        # Look for earnings date in the HTML
-        # Yahoo Finance shows it in various formats
-        patterns = [
-            r'Earnings Date["\s:]+([A-Za-z]+\s+\d{1,2},\s+\d{4})',
-            r'"earningsTimestamp":\s*(\d+)',
-            r'earningsDate["\s:]+(\d{4}-\d{2}-\d{2})'
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, response.text)
-            if matches:
-                date_str = matches[0]
-                
-                # Try to parse the date
-                try:
-                    # Unix timestamp
-                    if date_str.isdigit():
-                        dt = datetime.fromtimestamp(int(date_str))
-                        return dt.strftime('%Y-%m-%d')
-                    
-                    # Already in YYYY-MM-DD format
-                    if re.match(r'\d{4}-\d{2}-\d{2}', date_str):
-                        return date_str
-                    
-                    # "Month DD, YYYY" format
-                    dt = datetime.strptime(date_str, '%B %d, %Y')
-                    return dt.strftime('%Y-%m-%d')
-                except:
-                    continue
-        
-        return None
-        
+        earnings_date = _scrape_earnings_date(ticker)
     except Exception as e:
         print(f"Error scraping earnings for {ticker}: {e}")
         return None
+    
+    cache.put('yahoo', ticker, earnings_date)
+    return earnings_date
+
+
+def _scrape_earnings_date(ticker: str) -> Optional[str]:
+    """
+    Stream the Yahoo Finance quote page and extract the earnings date
+    
+    Returns: Earnings date in YYYY-MM-DD format or None
+    Raises: Any network or HTTP error
+    """
+    url = f"https://finance.yahoo.com/quote/{ticker}"
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+    }
+    
+    # Stops reading the page as soon as an earnings marker is found
+    return fetch_earnings_date_streaming(url, headers)
 
 
 def test_earnings_scraper():
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3.11
+"""
+Forward Factor Benchmarks
+
+Synthetic workloads and timing / memory harnesses for the ff_cli *-bench
+commands. Kept out of the pipeline modules, which only import what a run
+needs; ff_cli imports this module only when a benchmark runs.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import dataclasses
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+import numpy as np
+
+from ff_nightly_scanner import (MAX_DTE, MAX_IV, MIN_DTE, MIN_FORWARD_FACTOR, MIN_IV, EarningsInfo,
+                                FFScannerService, Opportunity, TradeAnalysis, render_thesis,
+                                render_trade_structure)
+from ff_earnings_yahoo import CHUNK_SIZE, extract_earnings_date_stream
+from ff_montecarlo import DAYS_PER_YEAR, SIMULATION_PATHS, MonteCarloEngine
+from ff_quality_rules import QualityRuleEngine, build_quality_rules
+from ff_report_generator import ReportGenerator, ReportWriter
+
+# Recorded Yahoo quote pages (*.html) benchmarked by default
+QUOTE_PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'yahoo')
+
+
+def synthetic_rows(n: int, seed: int = 42):
+    """Yield n synthetic opportunity field dicts (deterministic for a seed)"""
+    import random
+    
+    rng = random.Random(seed)
+    tickers = [f"T{i:04d}" for i in range(2000)]
+    dates = [(datetime(2026, 1, 2) + timedelta(days=7 * i)).strftime('%Y-%m-%d') for i in range(30)]
+    for i in range(n):
+        front = rng.randrange(len(dates) - 1)
+        front_iv, forward_vol = rng.uniform(15, 120), rng.uniform(15, 80)
+        yield dict(
+            ticker=rng.choice(tickers), forward_factor=(front_iv / forward_vol - 1) * 100,
+            signal='SELL', front_date=dates[front], front_dte=7 * front + 7, front_iv=front_iv,
+            back_date=dates[front + 1], back_dte=7 * front + 14, back_iv=rng.uniform(15, 120),
+            forward_vol=forward_vol, scan_id=1, opportunity_id=i, has_earnings_soon=rng.random() < 0.2
+        )
+
+
+def synthetic_analyses(rejected: int, quality: int = 0):
+    """
+    Yield analyses of synthetic opportunities, one at a time
+    
+    Args:
+        rejected: Rejected setups (Forward Factor capped below the minimum,
+            reason codes from the quality rules)
+        quality: Quality setups following the rejected ones
+    """
+    rules = QualityRuleEngine(build_quality_rules(MIN_FORWARD_FACTOR, MIN_DTE, MAX_DTE, MIN_IV, MAX_IV))
+    rows = synthetic_rows(rejected + quality)
+    
+    # Rules are evaluated in chunks, so only a chunk is held at a time
+    for start in range(0, rejected, 1000):
+        chunk = []
+        for _, row in zip(range(min(1000, rejected - start)), rows):
+            row['forward_factor'] = min(row['forward_factor'], MIN_FORWARD_FACTOR / 2)
+            chunk.append(Opportunity(**row))
+        for opp, (_, codes) in zip(chunk, rules.evaluate(chunk)):
+            yield TradeAnalysis(opp, None, False, probability=70.0, risk_reward=3.0, rating=5, rejection_codes=codes)
+    
+    for i, row in enumerate(rows):
+        yield TradeAnalysis(Opportunity(**row), None, True, probability=70.0, risk_reward=3.0, rating=5 + i % 5)
+
+
+def benchmark_memory(n: int = 100_000) -> Dict[str, float]:
+    """
+    Compare memory of n synthetic analyses in the previous and current models
+    
+    The previous representation (regular dataclasses with thesis, trade
+    structure and reason text rendered up front) is rebuilt locally.
+    
+    Args:
+        n: Number of synthetic opportunities
+    
+    Returns:
+        Dict with 'before_mb', 'after_mb' and 'reduction' (fraction saved)
+    """
+    import tracemalloc
+    
+    EagerOpportunity = dataclasses.make_dataclass(
+        'EagerOpportunity', [(f.name, f.type) for f in dataclasses.fields(Opportunity)])
+    EagerEarningsInfo = dataclasses.make_dataclass(
+        'EagerEarningsInfo', [(f.name, f.type) for f in dataclasses.fields(EarningsInfo)])
+    EagerAnalysis = dataclasses.make_dataclass(
+        'EagerAnalysis', ['opportunity', 'earnings_info', 'is_quality_setup', 'rejection_reasons',
+                          'probability', 'risk_reward', 'rating', 'thesis', 'trade_structure',
+                          'rejection_codes'])
+    
+    service = FFScannerService.__new__(FFScannerService)
+    service.quality_rules = QualityRuleEngine(build_quality_rules(
+        MIN_FORWARD_FACTOR, MIN_DTE, MAX_DTE, MIN_IV, MAX_IV
+    ))
+    
+    rows = list(synthetic_rows(n))
+    
+    def measure(build):
+        tracemalloc.start()
+        kept = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del kept
+        return size / 1e6
+    
+    def build_before():
+        analyses = []
+        for row in rows:
+            opp = EagerOpportunity(**{k: (str(v) if isinstance(v, str) else v) for k, v in row.items()})
+            info = EagerEarningsInfo(opp.ticker, None, opp.has_earnings_soon, False, False, False)
+            is_quality, codes = service.quality_rules.evaluate([opp])[0]
+            analyses.append(EagerAnalysis(
+                opp, info, is_quality, [r.message for r in codes], 70.0, 3.0, 5,
+                render_thesis(opp, None), render_trade_structure(opp), codes
+            ))
+        return analyses
+    
+    def build_after():
+        opportunities = [Opportunity(**{k: (sys.intern(v) if isinstance(v, str) else v) for k, v in row.items()})
+                         for row in rows]
+        results = service.quality_rules.evaluate(opportunities)
+        return [
+            TradeAnalysis(opp, EarningsInfo(opp.ticker, None, opp.has_earnings_soon, False, False, False),
+                          is_quality, probability=70.0, risk_reward=3.0, rating=5, rejection_codes=codes)
+            for opp, (is_quality, codes) in zip(opportunities, results)
+        ]
+    
+    before = measure(build_before)
+    after = measure(build_after)
+    return {'before_mb': before, 'after_mb': after, 'reduction': 1 - after / before}
+
+
+def benchmark_report(n: int = 50_000, quality: int = 20) -> Dict[str, float]:
+    """
+    Compare building a report from analysis lists with streaming it
+    
+    Both paths analyze the same n synthetic opportunities (plus `quality`
+    forced quality setups) and write the report to a temporary file. The
+    list path keeps every analysis and renders the whole report into one
+    string; the streaming path feeds a ReportWriter as analyses are made.
+    
+    Args:
+        n: Number of synthetic opportunities
+        quality: Quality setups added to the report
+    
+    Returns:
+        Dict with seconds and peak traced MB of each path ('list_*', 'stream_*')
+    """
+    import tempfile
+    import tracemalloc
+    
+    def measure(run) -> Dict[str, float]:
+        with tempfile.TemporaryFile('w+') as f:
+            tracemalloc.start()
+            start = time.perf_counter()
+            run(f)
+            seconds = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        return {'seconds': seconds, 'peak_mb': peak / 1e6}
+    
+    def build_list(f):
+        generator = ReportGenerator()
+        analyses = list(synthetic_analyses(n, quality))
+        quality_setups = sorted((a for a in analyses if a.is_quality_setup), key=lambda x: x.rating, reverse=True)
+        rejected_setups = [a for a in analyses if not a.is_quality_setup]
+        f.write(generator.generate_full_report(quality_setups, rejected_setups, 1))
+    
+    def stream(f):
+        writer = ReportWriter(f)
+        for analysis in synthetic_analyses(n, quality):
+            writer.add(analysis)
+        writer.close()
+    
+    results = {}
+    for name, run in (('list', build_list), ('stream', stream)):
+        for key, value in measure(run).items():
+            results[f'{name}_{key}'] = value
+    return results
+
+
+def benchmark_simulation(n: int = 1000, paths: int = SIMULATION_PATHS,
+                         workers: Optional[List[int]] = None) -> Dict[int, float]:
+    """
+    Time the engine on n synthetic opportunities
+    
+    Args:
+        n: Number of opportunities
+        paths: Simulated paths per opportunity
+        workers: Worker counts to time (defaults to 1 and 4)
+    
+    Returns:
+        Dict mapping worker count to seconds
+    """
+    rng = np.random.default_rng(0)
+    opportunities = []
+    for _ in range(n):
+        front_dte = int(rng.integers(7, 60))
+        front_iv, back_iv = rng.uniform(15, 120, size=2)
+        t1, t2 = front_dte / DAYS_PER_YEAR, (front_dte + 30) / DAYS_PER_YEAR
+        forward_var = (back_iv ** 2 * t2 - front_iv ** 2 * t1) / (t2 - t1)
+        forward_vol = np.sqrt(forward_var) if forward_var > 0 else 0.0
+        opportunities.append(SimpleNamespace(
+            forward_factor=(front_iv / forward_vol - 1) * 100 if forward_vol else 0.0,
+            front_dte=front_dte, back_dte=front_dte + 30, front_iv=front_iv, back_iv=back_iv,
+            forward_vol=forward_vol
+        ))
+    
+    timings = {}
+    for count in workers or [1, 4]:
+        engine = MonteCarloEngine(paths=paths, workers=count)
+        start = time.perf_counter()
+        engine.simulate(opportunities)
+        timings[count] = time.perf_counter() - start
+    return timings
+
+
+def synthetic_quote_page(app_state_items: int = 8000) -> bytes:
+    """
+    Synthetic Yahoo quote page (about 2 MB) laid out like a recorded one
+    
+    Head, then the quote page markup, then the app state script. Inside the
+    app state the earnings date follows the news stream, so the marker sits
+    near the end of the page rather than at the start.
+    """
+    app_state = {'context': {'dispatcher': {'stores': {
+        'StreamStore': {'items': [{'id': i, 'title': 'x' * 200} for i in range(app_state_items)]},
+        'QuoteSummaryStore': {'calendarEvents': {'earnings': {'earningsDate': [{'raw': 1761854400}]}}},
+    }}}}
+    return ('<html><head>' + '<meta name="x" content="y">' * 2000 + '</head><body>' + '<div>filler</div>' * 20000
+            + '<script>root.App.main = ' + json.dumps(app_state, separators=(',', ':')) + ';</script>'
+            + '</body></html>').encode()
+
+
+def benchmark_extraction(paths=None, chunk_size: int = CHUNK_SIZE, repeat: int = 5):
+    """
+    Compare the streaming Yahoo extractor with full-page regex + JSON parsing
+    
+    Args:
+        paths: Quote pages (HTML files); defaults to the recorded pages in
+            QUOTE_PAGES_DIR, or a synthetic page when there are none. The
+            synthetic page has none of a real page's markup variety, so its
+            figures are a best case for both approaches.
+        chunk_size: Simulated network chunk size
+        repeat: Runs per page (best CPU time is reported)
+    """
+    def full_page(html: str) -> Optional[str]:
+        # Previous approach: decode everything, then regex + json.loads the app state
+        match = re.search(r'"earningsTimestamp":\{"raw":(\d+)', html)
+        if match:
+            return datetime.fromtimestamp(int(match.group(1))).strftime('%Y-%m-%d')
+        json_match = re.search(r'root\.App\.main\s*=\s*({.*?});', html, re.DOTALL)
+        if json_match:
+            try:
+                data = json.loads(json_match.group(1))
+                stores = data['context']['dispatcher']['stores']
+                raw = stores['QuoteSummaryStore']['calendarEvents']['earnings']['earningsDate'][0]['raw']
+                return datetime.fromtimestamp(raw).strftime('%Y-%m-%d')
+            except Exception:
+                pass
+        return None
+    
+    if not paths and os.path.isdir(QUOTE_PAGES_DIR):
+        paths = sorted(os.path.join(QUOTE_PAGES_DIR, name) for name in os.listdir(QUOTE_PAGES_DIR)
+                       if name.endswith('.html'))
+    pages = []
+    for path in paths or []:
+        with open(path, 'rb') as f:
+            pages.append((os.path.basename(path), f.read()))
+    if not pages:
+        print(f"No recorded pages in {QUOTE_PAGES_DIR}: synthetic page only (best case)")
+        pages.append(('synthetic (best case)', synthetic_quote_page()))
+    
+    print(f"{'Page':<30} {'Size':>10} {'Full CPU':>10} {'Stream CPU':>11} {'Read':>10}  Date")
+    for name, raw in pages:
+        full_cpu = stream_cpu = float('inf')
+        for _ in range(repeat):
+            start = time.process_time()
+            expected = full_page(raw.decode('utf-8', errors='replace'))
+            full_cpu = min(full_cpu, time.process_time() - start)
+            
+            start = time.process_time()
+            chunks = (raw[i:i + chunk_size] for i in range(0, len(raw), chunk_size))
+            found, consumed = extract_earnings_date_stream(chunks)
+            stream_cpu = min(stream_cpu, time.process_time() - start)
+        
+        status = found if found == expected else f"{found} (full: {expected})"
+        print(f"{name[-30:]:<30} {len(raw) / 1024:>8.0f}KB {full_cpu * 1000:>8.2f}ms {stream_cpu * 1000:>9.2f}ms "
+              f"{consumed / 1024:>8.0f}KB  {status}")
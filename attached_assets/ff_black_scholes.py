@@ -0,0 +1,89 @@
+#!/usr/bin/env python3.11
+"""
+Forward Factor Black-Scholes Pricing
+
+Vectorized Black-Scholes prices for the ATM straddles the scanner trades.
+Every function takes NumPy arrays (or scalars) and broadcasts, so a whole
+batch of opportunities times simulated paths is priced in one call.
+
+Prices are normalized to a strike of 1 (moneyness S/K); multiply by the
+strike to get dollars. Rates and dividends are ignored, as in the scanner's
+forward volatility calculation.
+"""
+
+import numpy as np
+
+try:
+    from scipy.special import ndtr as _ndtr
+except ImportError:  # scipy is optional: fall back to an erf approximation
+    _ndtr = None
+
+# Abramowitz & Stegun 7.1.26 erf approximation (max error 1.5e-7)
+_ERF_P = 0.3275911
+_ERF_A = (0.254829592, -0.284496736, 1.421413741, -1.453152027, 1.061405429)
+
+
+def norm_cdf(x):
+    """Standard normal cumulative distribution function"""
+    if _ndtr is not None:
+        return _ndtr(x)
+    
+    x = np.asarray(x, dtype=np.float64)
+    z = np.abs(x) / np.sqrt(2.0)
+    t = 1.0 / (1.0 + _ERF_P * z)
+    a1, a2, a3, a4, a5 = _ERF_A
+    erf = 1.0 - ((((a5 * t + a4) * t + a3) * t + a2) * t + a1) * t * np.exp(-z * z)
+    return 0.5 * (1.0 + np.sign(x) * erf)
+
+
+def d1_d2(moneyness, vol, years):
+    """
+    Black-Scholes d1 and d2
+    
+    Args:
+        moneyness: Underlying price / strike
+        vol: Annualized volatility (decimal, e.g. 0.35)
+        years: Time to expiration in years (must be > 0)
+    
+    Returns:
+        (d1, d2) arrays
+    """
+    vol_sqrt_t = vol * np.sqrt(years)
+    d1 = (np.log(moneyness) + 0.5 * vol_sqrt_t * vol_sqrt_t) / vol_sqrt_t
+    return d1, d1 - vol_sqrt_t
+
+
+def call_price(moneyness, vol, years):
+    """Call price per unit strike"""
+    d1, d2 = d1_d2(moneyness, vol, years)
+    return moneyness * norm_cdf(d1) - norm_cdf(d2)
+
+
+def put_price(moneyness, vol, years):
+    """Put price per unit strike"""
+    d1, d2 = d1_d2(moneyness, vol, years)
+    return norm_cdf(-d2) - moneyness * norm_cdf(-d1)
+
+
+def straddle_price(moneyness, vol, years):
+    """
+    Straddle (call + put, same strike) price per unit strike
+    
+    Args:
+        moneyness: Underlying price / strike
+        vol: Annualized volatility (decimal)
+        years: Time to expiration in years; at 0 the straddle is worth its
+            intrinsic value |S/K - 1|
+    
+    Returns:
+        Array of prices
+    """
+    moneyness = np.asarray(moneyness, dtype=np.float64)
+    years = np.asarray(years, dtype=np.float64)
+    live = np.broadcast_to(years > 0, np.broadcast(moneyness, vol, years).shape)
+    
+    # call + put = S(2N(d1) - 1) - (2N(d2) - 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d1, d2 = d1_d2(moneyness, vol, np.where(years > 0, years, 1.0))
+        price = moneyness * (2.0 * norm_cdf(d1) - 1.0) - (2.0 * norm_cdf(d2) - 1.0)
+    return np.where(live, price, np.abs(moneyness - 1.0))
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3.11
+"""
+Forward Factor Command Line Interface
+
+Single entry point for the scanner tools:
+- scan: ad-hoc Forward Factor scan via Polygon.io (ff_scanner)
+- nightly: full nightly pipeline with report (run_ff_scanner)
+- calendar: trading calendar and run schedule (ff_scheduler)
+- daemon: long-running scans on the market-session schedule (ff_daemon)
+- report: a stored scan's report as markdown, JSON or HTML (ff_report_formats)
+- history: rejection reason code counts across stored scans (ff_scan_store)
+
+Subcommand modules are imported only when their subcommand runs, so
+`--help` and calendar queries do not pay for the scanner dependencies.
+"""
+
+import sys
+import argparse
+import importlib
+
+# Subcommand name -> (module, entry function, help text)
+# Each entry function takes an argv list and parses its own options.
+COMMANDS = {
+    'scan': ('ff_scanner', 'main', 'Scan tickers for Forward Factor opportunities'),
+    'nightly': ('run_ff_scanner', 'main', 'Run the nightly scan and write the markdown report'),
+    'calendar': ('ff_scheduler', 'main', 'Show the trading calendar and run schedule'),
+    'daemon': ('ff_daemon', 'main', 'Run scans at each session close (and intraday) as a long-running process'),
+    'report': ('ff_report_formats', 'main', "Print a stored scan's report as markdown, JSON or HTML"),
+    'history': ('ff_scan_store', 'main', 'Count rejection reason codes across stored scans'),
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the top-level parser (subcommand options are parsed by each module)"""
+    parser = argparse.ArgumentParser(
+        prog='ff_cli',
+        description='Forward Factor scanner tools',
+        epilog="Run 'ff_cli <command> --help' for command options."
+    )
+    subparsers = parser.add_subparsers(dest='command', metavar='<command>')
+    subparsers.required = True
+    
+    for name, (_, _, help_text) in COMMANDS.items():
+        # add_help=False forwards --help to the subcommand's own parser
+        subparsers.add_parser(name, help=help_text, add_help=False)
+    
+    subparsers.add_parser('startup-bench', help='Measure cold-start time of the CLI',
+                          add_help=False)
+    subparsers.add_parser('memory-bench', help='Measure memory of 100k synthetic analyses',
+                          add_help=False)
+    subparsers.add_parser('mc-bench', help='Time the Monte Carlo engine on 1000 synthetic spreads',
+                          add_help=False)
+    subparsers.add_parser('report-bench', help='Compare list and streaming reports for 50k rejected setups',
+                          add_help=False)
+    subparsers.add_parser('yahoo-bench', help='Compare streaming and full-page Yahoo earnings extraction',
+                          add_help=False)
+    
+    return parser
+
+
+def measure_cold_start(commands=None, runs: int = 5) -> dict:
+    """
+    Measure cold-start wall time of CLI invocations in fresh interpreters
+    
+    Args:
+        commands: List of argv lists to time (defaults to --help and calendar queries)
+        runs: Number of runs per command (the median is reported)
+    
+    Returns:
+        Dict mapping command string to median milliseconds
+    """
+    import os
+    import subprocess
+    import time
+    
+    if commands is None:
+        commands = [['--help'], ['calendar', '--help'], ['calendar']]
+    
+    script = os.path.abspath(__file__)
+    results = {}
+    for argv in commands:
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, script, *argv],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        results[' '.join(argv)] = timings[len(timings) // 2]
+    
+    return results
+
+
+def main(argv=None):
+    """Main entry point"""
+    if argv is None:
+        argv = sys.argv[1:]
+    
+    parser = build_parser()
+    args, rest = parser.parse_known_args(argv)
+    
+    if args.command == 'startup-bench':
+        print("Cold-start time (median of 5 runs):")
+        for command, ms in measure_cold_start().items():
+            print(f"  ff_cli {command:<20} {ms:8.1f} ms")
+        return
+    
+    if args.command == 'memory-bench':
+        from ff_bench import benchmark_memory
+        n = int(rest[0]) if rest else 100_000
+        result = benchmark_memory(n)
+        print(f"Memory for {n:,} analyses (tracemalloc):")
+        print(f"  regular dataclasses, eager text: {result['before_mb']:8.1f} MB")
+        print(f"  slotted models, lazy text:       {result['after_mb']:8.1f} MB")
+        print(f"  reduction:                       {result['reduction']:8.1%}")
+        return
+    
+    if args.command == 'mc-bench':
+        from ff_bench import SIMULATION_PATHS, benchmark_simulation
+        n = int(rest[0]) if rest else 1000
+        print(f"Monte Carlo for {n:,} spreads x {SIMULATION_PATHS:,} paths:")
+        for workers, seconds in benchmark_simulation(n).items():
+            print(f"  {workers} worker{'s' if workers > 1 else ' '}: {seconds:8.2f} s")
+        return
+    
+    if args.command == 'report-bench':
+        from ff_bench import benchmark_report
+        n = int(rest[0]) if rest else 50_000
+        result = benchmark_report(n)
+        print(f"Report for {n:,} rejected setups (wall time, peak traced memory):")
+        print(f"  lists + one string: {result['list_seconds']:6.2f} s {result['list_peak_mb']:8.1f} MB")
+        print(f"  streaming writer:   {result['stream_seconds']:6.2f} s {result['stream_peak_mb']:8.1f} MB")
+        return
+    
+    if args.command == 'yahoo-bench':
+        from ff_bench import benchmark_extraction
+        benchmark_extraction(rest)
+        return
+    
+    module_name, func_name, _ = COMMANDS[args.command]
+    module = importlib.import_module(module_name)
+    return getattr(module, func_name)(rest)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\nInterrupted by user")
+        sys.exit(0)
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3.11
+"""
+Forward Factor Scan Daemon
+
+Long-running alternative to a cron-driven nightly run. Scans fire from the
+NYSE session calendar instead of a fixed crontab:
+- close: CLOSE_DELAY after each session's close (13:00 on early-close days)
+- intraday (optional): every N minutes from the open until the close
+
+One FFScannerService lives for the daemon's lifetime, so the earnings cache,
+HTTP connection pools and the local scanner stay warm between runs. Runs
+execute one at a time on the daemon's thread, so they never overlap. Runs
+that come due while another is running, or while the daemon was down, are
+queued and coalesced into one run per job; a close scan supersedes an
+intraday scan waiting behind it. A lock file keeps a second daemon from
+starting against the same cache directory.
+"""
+
+import os
+import json
+import signal
+import threading
+import time as _time
+import traceback
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from ff_scheduler import TradingCalendar
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows: no single-daemon guard
+    fcntl = None
+
+# Configuration
+STATE_DIR = os.environ.get('FF_CACHE_DIR', os.path.expanduser('~/.cache/ff_scanner'))
+STATE_PATH = os.path.join(STATE_DIR, 'daemon_state.json')
+LOCK_PATH = os.path.join(STATE_DIR, 'daemon.lock')
+MARKET_TZ = ZoneInfo('America/New_York')
+MARKET_OPEN = time(9, 30)  # Regular open (ET)
+CLOSE_DELAY = timedelta(minutes=15)  # Wait after the close for settled quotes
+MAX_SLEEP = 300.0  # Seconds; re-check the clock at least this often
+MAX_CATCHUP_DAYS = 7  # Missed runs older than this are dropped
+
+
+@dataclass(frozen=True, slots=True)
+class ScheduledRun:
+    """A scan due to run"""
+    job: str  # 'close' or 'intraday'
+    due: datetime  # Latest fire time folded into this run (naive ET)
+    missed: int = 0  # Earlier fire times of the same job coalesced into it
+
+
+def market_now() -> datetime:
+    """Current time in ET (naive, like the calendar's close times)"""
+    return datetime.now(MARKET_TZ).replace(tzinfo=None)
+
+
+def acquire_daemon_lock(path: str = LOCK_PATH):
+    """
+    Take the single-daemon lock for this process's lifetime
+    
+    Returns:
+        Open lock file (keep a reference), or None if another daemon holds it
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    lock = open(path, 'a+')
+    if fcntl is None:
+        return lock
+    
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock.close()
+        return None
+    lock.seek(0)
+    lock.truncate()
+    lock.write(str(os.getpid()))
+    lock.flush()
+    return lock
+
+
+class ScanDaemon:
+    """Fires scans on the NYSE session schedule, one at a time"""
+    
+    def __init__(self, run_job: Callable[[ScheduledRun], None], calendar: Optional[TradingCalendar] = None,
+                 intraday_every: Optional[timedelta] = None, close_delay: timedelta = CLOSE_DELAY,
+                 state_path: Optional[str] = STATE_PATH, clock: Callable[[], datetime] = market_now):
+        """
+        Args:
+            run_job: Called with each ScheduledRun (exceptions are logged, not raised)
+            calendar: Trading calendar (defaults to a new TradingCalendar)
+            intraday_every: Interval between intraday scans (None for close scans only)
+            close_delay: Delay after the session close before the close scan
+            state_path: File remembering the last schedule check across restarts
+                (None keeps it in memory)
+            clock: Returns the current naive ET time
+        """
+        self.run_job = run_job
+        self.calendar = calendar or TradingCalendar()
+        self.intraday_every = intraday_every
+        self.close_delay = close_delay
+        self.state_path = state_path
+        self.clock = clock
+        self.stopped = threading.Event()
+        self.completed = 0
+        self.failed = 0
+        self.last_checked = self._load_state() or clock()
+    
+    def _load_state(self) -> Optional[datetime]:
+        """Last schedule check saved by a previous daemon (None on first start)"""
+        if not self.state_path or not os.path.exists(self.state_path):
+            return None
+        try:
+            with open(self.state_path) as f:
+                return datetime.fromisoformat(json.load(f)['last_checked'])
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️  Ignoring unreadable daemon state {self.state_path}: {e}")
+            return None
+    
+    def _save_state(self):
+        """Persist the last schedule check so missed runs are found after a restart"""
+        if not self.state_path:
+            return
+        os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'last_checked': self.last_checked.isoformat()}, f)
+        os.replace(tmp_path, self.state_path)
+    
+    def fire_times(self, day: date) -> List[Tuple[datetime, str]]:
+        """
+        Scheduled scans on a day
+        
+        Returns:
+            Sorted (fire time, job) pairs, empty when the market is closed
+        """
+        close = self.calendar.get_market_close(datetime.combine(day, time()))
+        if close is None:
+            return []
+        
+        close_at = datetime.combine(day, close)
+        fires = []
+        if self.intraday_every:
+            at = datetime.combine(day, MARKET_OPEN) + self.intraday_every
+            while at < close_at:
+                fires.append((at, 'intraday'))
+                at += self.intraday_every
+        fires.append((close_at + self.close_delay, 'close'))
+        return fires
+    
+    def fires_between(self, start: datetime, end: datetime) -> List[Tuple[datetime, str]]:
+        """Scheduled scans after start up to and including end (at most MAX_CATCHUP_DAYS back)"""
+        day = max(start, end - timedelta(days=MAX_CATCHUP_DAYS)).date()
+        fires = []
+        while day <= end.date():
+            fires.extend(fire for fire in self.fire_times(day) if start < fire[0] <= end)
+            day += timedelta(days=1)
+        return fires
+    
+    def next_fire(self, now: Optional[datetime] = None) -> Optional[Tuple[datetime, str]]:
+        """Next scheduled (fire time, job) after now"""
+        now = now or self.clock()
+        fires = self.fires_between(now, now + timedelta(days=MAX_CATCHUP_DAYS))
+        return fires[0] if fires else None
+    
+    def due_runs(self, now: datetime) -> List[ScheduledRun]:
+        """
+        Runs due since the last check, coalesced to one per job
+        
+        Returns:
+            Runs in due order; an intraday run queued behind a newer close run is dropped
+        """
+        by_job: Dict[str, List[datetime]] = {}
+        for at, job in self.fires_between(self.last_checked, now):
+            by_job.setdefault(job, []).append(at)
+        
+        runs = {job: ScheduledRun(job, times[-1], len(times) - 1) for job, times in by_job.items()}
+        if 'close' in runs and 'intraday' in runs and runs['intraday'].due < runs['close'].due:
+            del runs['intraday']
+        return sorted(runs.values(), key=lambda run: run.due)
+    
+    def execute(self, run: ScheduledRun):
+        """Run one job, logging (not raising) its failure"""
+        missed = f" ({run.missed} missed run{'s' if run.missed > 1 else ''} coalesced)" if run.missed else ""
+        print(f"▶️  {run.job} scan due {run.due:%Y-%m-%d %H:%M} ET{missed}")
+        start = _time.perf_counter()
+        try:
+            self.run_job(run)
+        except Exception as e:
+            self.failed += 1
+            print(f"❌ {run.job} scan failed: {e}")
+            traceback.print_exc()
+        else:
+            self.completed += 1
+            print(f"✅ {run.job} scan finished in {_time.perf_counter() - start:.1f}s")
+    
+    def run_pending(self, now: Optional[datetime] = None) -> List[ScheduledRun]:
+        """
+        Run every job due since the last check, one after another
+        
+        Args:
+            now: Current ET time (defaults to the clock)
+        
+        Returns:
+            Runs started
+        """
+        now = now or self.clock()
+        started = []
+        for run in self.due_runs(now):
+            if self.stopped.is_set():
+                # Unstarted runs stay due for the next start
+                return started
+            self.execute(run)
+            started.append(run)
+            self.last_checked = run.due
+            self._save_state()
+        
+        self.last_checked = max(self.last_checked, now)
+        self._save_state()
+        return started
+    
+    def run_forever(self):
+        """Scan on schedule until stop() is called"""
+        announced = None
+        while not self.stopped.is_set():
+            self.run_pending()
+            
+            now = self.clock()
+            upcoming = self.next_fire(now)
+            if upcoming and upcoming != announced:
+                print(f"⏳ Next scan: {upcoming[1]} at {upcoming[0]:%Y-%m-%d %H:%M} ET")
+                announced = upcoming
+            
+            delay = MAX_SLEEP if upcoming is None else (upcoming[0] - now).total_seconds()
+            self.stopped.wait(min(max(delay, 0.0), MAX_SLEEP))
+        print(f"Daemon stopped ({self.completed} scans completed, {self.failed} failed)")
+    
+    def stop(self, *_):
+        """Stop after the current scan finishes (also usable as a signal handler)"""
+        self.stopped.set()
+
+
+def main(argv=None):
+    """Run the scan daemon
+    
+    Args:
+        argv: Command line arguments (defaults to sys.argv[1:])
+    """
+    import argparse
+    from ff_run_journal import RunJournal, journal_path
+    from run_ff_scanner import add_scan_arguments, build_service, run_scan
+    
+    parser = argparse.ArgumentParser(prog='ff_daemon', description='Forward Factor scan daemon')
+    parser.add_argument('--intraday', type=int, metavar='MINUTES',
+                        help='Also scan every MINUTES from the open until the close')
+    parser.add_argument('--close-delay', type=int, metavar='MINUTES',
+                        default=int(CLOSE_DELAY.total_seconds() // 60),
+                        help=f'Minutes after the close for the close scan (default: {CLOSE_DELAY.total_seconds() // 60:.0f})')
+    parser.add_argument('--once', action='store_true',
+                        help='Run scans that are due or were missed, then exit')
+    parser.add_argument('--next', type=int, nargs='?', const=5, metavar='N',
+                        help='Print the next N scheduled scans and exit (default: 5)')
+    add_scan_arguments(parser)
+    args = parser.parse_args(argv)
+    
+    intraday_every = timedelta(minutes=args.intraday) if args.intraday else None
+    close_delay = timedelta(minutes=args.close_delay)
+    
+    if args.next:
+        daemon = ScanDaemon(lambda run: None, intraday_every=intraday_every, close_delay=close_delay,
+                            state_path=None)
+        at = daemon.clock()
+        for _ in range(args.next):
+            upcoming = daemon.next_fire(at)
+            if upcoming is None:
+                break
+            at, job = upcoming
+            print(f"  {at:%a %Y-%m-%d %H:%M} ET  {job}")
+        return
+    
+    lock = acquire_daemon_lock()
+    if lock is None:
+        print(f"⚠️  Another scan daemon holds {LOCK_PATH}; not starting")
+        return
+    
+    print("=" * 80)
+    print("FORWARD FACTOR SCAN DAEMON")
+    print("=" * 80)
+    print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"Close scans: {close_delay.total_seconds() // 60:.0f} min after each session close")
+    if intraday_every:
+        print(f"Intraday scans: every {args.intraday} min during the session")
+    print()
+    
+    # One service for every run keeps caches and connections warm
+    scanner = build_service(args)
+    formats = args.report_formats.split(',')
+    
+    def run_job(run: ScheduledRun):
+        if run.job == 'close':
+            # Same journal as the nightly run, so a restarted daemon resumes it
+            journal = RunJournal(journal_path(run.due), resume=True)
+            run_scan(scanner, args.report_dir, journal, report_name=f"ff_scan_{run.due:%Y%m%d}.md",
+                     report_formats=formats, diff=args.diff)
+        else:
+            # Intraday changes are against the last close run, which stays the baseline
+            run_scan(scanner, args.report_dir, report_name=f"ff_scan_{run.due:%Y%m%d_%H%M}.md",
+                     report_formats=formats, diff=args.diff, baseline=False)
+    
+    daemon = ScanDaemon(run_job, intraday_every=intraday_every, close_delay=close_delay)
+    try:
+        if args.once:
+            if not daemon.run_pending():
+                print("No scans due")
+            return
+        
+        signal.signal(signal.SIGTERM, daemon.stop)
+        daemon.run_forever()
+    except KeyboardInterrupt:
+        daemon.stop()
+        print("\nDaemon interrupted by user")
+    finally:
+        scanner.close()
+        lock.close()
+
+
+if __name__ == "__main__":
+    main()
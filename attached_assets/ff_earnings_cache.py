@@ -0,0 +1,168 @@
+#!/usr/bin/env python3.11
+"""
+Persistent Earnings Date Cache
+
+SQLite-backed cache shared by all earnings providers (Polygon, Yahoo,
+Finnhub, Yahoo Finance API) and across processes, so nightly runs start warm.
+
+- Entries expire sooner as the earnings date approaches (dates get revised)
+- "No date found" results are cached too, with a shorter TTL
+- Hit/miss counters are kept per process
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+# Configuration
+CACHE_DIR = os.environ.get('FF_CACHE_DIR', os.path.expanduser('~/.cache/ff_scanner'))
+DEFAULT_CACHE_PATH = os.path.join(CACHE_DIR, 'earnings.sqlite3')
+
+# TTL policy (seconds)
+MAX_TTL = 7 * 86400  # Far-off earnings dates are refreshed weekly
+MIN_TTL = 3600  # Imminent or just-passed dates are refreshed hourly
+TTL_FRACTION = 0.25  # Positive TTL = 25% of the time left until earnings
+NEGATIVE_TTL = 6 * 3600  # "No date found" results
+
+
+def ttl_for(earnings_date: Optional[str], now: Optional[datetime] = None) -> float:
+    """
+    Time-to-live for a cache entry
+    
+    Args:
+        earnings_date: Earnings date (YYYY-MM-DD) or None for a negative result
+        now: Reference time (defaults to now)
+    
+    Returns:
+        TTL in seconds
+    """
+    if not earnings_date:
+        return NEGATIVE_TTL
+    
+    now = now or datetime.now()
+    try:
+        seconds_until = (datetime.strptime(earnings_date[:10], '%Y-%m-%d') - now).total_seconds()
+    except ValueError:
+        return MIN_TTL
+    
+    return min(MAX_TTL, max(MIN_TTL, seconds_until * TTL_FRACTION))
+
+
+class EarningsCache:
+    """Persistent earnings date cache with TTLs and negative caching"""
+    
+    def __init__(self, path: str = DEFAULT_CACHE_PATH):
+        """
+        Open (or create) the cache database
+        
+        Args:
+            path: SQLite file path (':memory:' for a private in-process cache)
+        """
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        with self._lock, self._conn:
+            if path != ':memory:':
+                self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS earnings (
+                    provider TEXT NOT NULL,
+                    ticker TEXT NOT NULL,
+                    earnings_date TEXT,
+                    fetched_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (provider, ticker)
+                )
+            ''')
+        
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.expired = 0
+    
+    def get(self, provider: str, ticker: str) -> Tuple[bool, Optional[str]]:
+        """
+        Look up a cached earnings date
+        
+        Args:
+            provider: Provider name (entries are kept per provider)
+            ticker: Stock ticker symbol
+        
+        Returns:
+            (hit, earnings_date). A hit with earnings_date None is a cached
+            "no date found" result.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT earnings_date, expires_at FROM earnings WHERE provider = ? AND ticker = ?',
+                (provider, ticker.upper())
+            ).fetchone()
+            
+            if row is None:
+                self.misses += 1
+                return False, None
+            
+            earnings_date, expires_at = row
+            if expires_at <= time.time():
+                self.misses += 1
+                self.expired += 1
+                return False, None
+            
+            self.hits += 1
+            if earnings_date is None:
+                self.negative_hits += 1
+            return True, earnings_date
+    
+    def put(self, provider: str, ticker: str, earnings_date: Optional[str]):
+        """
+        Store a lookup result (None records that no date was found)
+        
+        Args:
+            provider: Provider name
+            ticker: Stock ticker symbol
+            earnings_date: Earnings date (YYYY-MM-DD) or None
+        """
+        now = time.time()
+        expires_at = now + ttl_for(earnings_date)
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO earnings (provider, ticker, earnings_date, fetched_at, expires_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (provider, ticker.upper(), earnings_date, now, expires_at)
+            )
+    
+    def purge_expired(self) -> int:
+        """Delete expired entries and return how many were removed"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute('DELETE FROM earnings WHERE expires_at <= ?', (time.time(),))
+            return cursor.rowcount
+    
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters for this process"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'negative_hits': self.negative_hits,
+            'misses': self.misses,
+            'expired': self.expired,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> EarningsCache:
+    """Process-wide cache instance backed by DEFAULT_CACHE_PATH"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = EarningsCache()
+        return _default_cache
@@ -8,18 +8,32 @@ No API key required for basic earnings calendar
 
 import requests
 from datetime import datetime, timedelta
-from typing import Optional, Dict
-import time
+from typing import Optional, Dict, List
+from ff_earnings_cache import EarningsCache, get_default_cache
+from ff_rate_limit import RateLimiter, get_rate_limiter
 
 class FreeEarningsCalendar:
     """Free earnings calendar using Finnhub API"""
     
-    def __init__(self):
-        """Initialize with free Finnhub API"""
+    def __init__(self, cache: Optional[EarningsCache] = None, rate_limiter: Optional[RateLimiter] = None):
+        """
+        Initialize with free Finnhub API
+        
+        Args:
+            cache: Earnings cache (defaults to the shared persistent cache)
+            rate_limiter: Rate limiter (defaults to the 60 calls/minute Finnhub
+                limiter shared with other threads and processes)
+        """
         # Finnhub free API - demo token (public)
         self.api_key = "demo"  # Free demo key
         self.base_url = "https://finnhub.io/api/v1"
-        self.cache = {}  # Cache earnings data
+        self.cache = cache or get_default_cache()  # Cache earnings data
+        self.rate_limiter = rate_limiter or get_rate_limiter('finnhub')
+    
+    def _get(self, url: str, params: Dict, timeout: int = 10) -> requests.Response:
+        """GET a Finnhub endpoint once a rate limit token is available"""
+        self.rate_limiter.acquire()
+        return requests.get(url, params=params, timeout=timeout)
     
     def get_earnings_date(self, ticker: str) -> Optional[str]:
         """
@@ -32,62 +46,123 @@ class FreeEarningsCalendar:
             Earnings date in YYYY-MM-DD format or None
         """
         # Check cache first
-        if ticker in self.cache:
-            return self.cache[ticker]
+        hit, earnings_date = self.cache.get('finnhub', ticker)
+        if hit:
+            return earnings_date
         
         try:
-            # Get company earnings calendar
-            # Use earnings calendar endpoint for next 30 days
-            today = datetime.now()
-            from_date = today.strftime('%Y-%m-%d')
-            to_date = (today + timedelta(days=90)).strftime('%Y-%m-%d')
-            
-            url = f"{self.base_url}/calendar/earnings"
-            params = {
-                'symbol': ticker,
-                'from': from_date,
-                'to': to_date,
-                'token': self.api_key
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
+            return self.fetch_earnings_date(ticker)
+        except Exception as e:
+            print(f"Error fetching earnings for {ticker}: {e}")
+            return None
+    
+    def fetch_earnings_date(self, ticker: str) -> Optional[str]:
+        """
+        Look up the next earnings date (no cache check) and cache the answer
+        
+        Returns: Earnings date in YYYY-MM-DD format or None
+        Raises: requests.HTTPError if neither endpoint answered, or any network error
+        """
+        # Get company earnings calendar
+        # Use earnings calendar endpoint for next 30 days
+        today = datetime.now()
+        from_date = today.strftime('%Y-%m-%d')
+        to_date = (today + timedelta(days=90)).strftime('%Y-%m-%d')
+        
+        url = f"{self.base_url}/calendar/earnings"
+        params = {
+            'symbol': ticker,
+            'from': from_date,
+            'to': to_date,
+            'token': self.api_key
+        }
+        
+        calendar_response = self._get(url, params)
+        
+        if calendar_response.status_code == 200:
+            data = calendar_response.json()
             
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Check if we have earnings data
-                if 'earningsCalendar' in data and len(data['earningsCalendar']) > 0:
-                    # Get the first (next) earnings date
-                    earnings_date = data['earningsCalendar'][0].get('date')
-                    if earnings_date:
-                        self.cache[ticker] = earnings_date
-                        return earnings_date
+            # Check if we have earnings data
+            if 'earningsCalendar' in data and len(data['earningsCalendar']) > 0:
+                # Get the first (next) earnings date
+                earnings_date = data['earningsCalendar'][0].get('date')
+                if earnings_date:
+                    self.cache.put('finnhub', ticker, earnings_date)
+                    return earnings_date
+        
+        # If no data found, try company profile endpoint
+        url = f"{self.base_url}/stock/profile2"
+        params = {
+            'symbol': ticker,
+            'token': self.api_key
+        }
+        
+        response = self._get(url, params)
+        
+        if response.status_code == 200:
+            data = response.json()
+            # Some profiles have earnings announcement date
+            if 'earningsAnnouncement' in data:
+                earnings_date = data['earningsAnnouncement']
+                self.cache.put('finnhub', ticker, earnings_date)
+                return earnings_date
             
-            # If no data found, try company profile endpoint
-            url = f"{self.base_url}/stock/profile2"
+            # Both endpoints answered without a date: cache the negative result
+            self.cache.put('finnhub', ticker, None)
+            return None
+        
+        if calendar_response.status_code != 200:
+            raise requests.HTTPError(f"Finnhub returned HTTP {calendar_response.status_code} (calendar) "
+                                     f"and {response.status_code} (profile) for {ticker}")
+        
+        return None
+    
+    def get_earnings_calendar(self, from_date: str, to_date: str, window_days: int = 7) -> Dict[str, List[str]]:
+        """
+        Get the market-wide earnings calendar for a date range
+        
+        The range is fetched in windows of window_days (one request each) so
+        busy earnings weeks are not truncated by the API.
+        
+        Args:
+            from_date: Start date (YYYY-MM-DD)
+            to_date: End date (YYYY-MM-DD), inclusive
+            window_days: Days covered by each bulk request
+        
+        Returns:
+            Dict mapping ticker to its sorted earnings dates (YYYY-MM-DD)
+        """
+        calendar: Dict[str, List[str]] = {}
+        start = datetime.strptime(from_date, '%Y-%m-%d')
+        end = datetime.strptime(to_date, '%Y-%m-%d')
+        
+        url = f"{self.base_url}/calendar/earnings"
+        while start <= end:
+            window_end = min(start + timedelta(days=window_days - 1), end)
             params = {
-                'symbol': ticker,
+                'from': start.strftime('%Y-%m-%d'),
+                'to': window_end.strftime('%Y-%m-%d'),
                 'token': self.api_key
             }
             
-            response = requests.get(url, params=params, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                # Some profiles have earnings announcement date
-                if 'earningsAnnouncement' in data:
-                    earnings_date = data['earningsAnnouncement']
-                    self.cache[ticker] = earnings_date
-                    return earnings_date
-            
-            # Rate limit: sleep briefly between requests
-            time.sleep(0.1)
-            
-            return None
+            try:
+                response = self._get(url, params, timeout=30)
+                if response.status_code == 200:
+                    for entry in response.json().get('earningsCalendar') or []:
+                        symbol, date = entry.get('symbol'), entry.get('date')
+                        if symbol and date:
+                            calendar.setdefault(symbol, []).append(date)
+                else:
+                    print(f"Error fetching earnings calendar {params['from']}..{params['to']}: HTTP {response.status_code}")
+            except Exception as e:
+                print(f"Error fetching earnings calendar {params['from']}..{params['to']}: {e}")
             
-        except Exception as e:
-            print(f"Error fetching earnings for {ticker}: {e}")
-            return None
+            start = window_end + timedelta(days=1)
+        
+        for dates in calendar.values():
+            dates.sort()
+        
+        return calendar
     
     def get_earnings_info(self, ticker: str, front_date: str, back_date: str) -> Dict:
         """
@@ -155,8 +230,11 @@ def test_earnings_calendar():
             print(f"✓ {ticker}: Next earnings on {earnings_date}")
         else:
             print(f"✗ {ticker}: No earnings date found")
-        time.sleep(0.2)  # Rate limit
     
+    stats = calendar.rate_limiter.stats()
+    print()
+    print(f"Rate limiter: {stats['acquired']} calls, {stats['delayed']} delayed, "
+          f"mean wait {stats['mean_wait']:.2f}s, max wait {stats['max_wait']:.2f}s")
     print()
     print("=" * 80)
 
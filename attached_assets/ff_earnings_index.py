@@ -0,0 +1,148 @@
+#!/usr/bin/env python3.11
+"""
+Forward Factor Earnings Index
+
+Preloads a date-range earnings calendar for the whole ticker universe in a
+few bulk requests and answers earnings positioning for many opportunities
+at once with a vectorized binary search.
+"""
+
+import numpy as np
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+
+# Keys pack (ticker code, day ordinal) into one sortable int64
+_DAY_BITS = 20  # Day ordinals stay below 2**20 until the year 2870
+_NO_EARNINGS = -1
+
+
+def _ordinals(dates: Sequence[str]) -> np.ndarray:
+    """Convert YYYY-MM-DD strings to day ordinals"""
+    return np.fromiter(
+        (datetime.strptime(d, '%Y-%m-%d').toordinal() for d in dates),
+        dtype=np.int64, count=len(dates)
+    )
+
+
+class EarningsIndex:
+    """Sorted in-memory index of earnings dates for a ticker universe"""
+    
+    def __init__(self, calendar: Dict[str, List[str]], tickers: Optional[Sequence[str]] = None):
+        """
+        Build the index
+        
+        Args:
+            calendar: Dict mapping ticker to its earnings dates (YYYY-MM-DD)
+            tickers: Universe covered by the calendar. Tickers in the universe
+                with no calendar entries are known to have no earnings in the
+                preloaded range. Defaults to the calendar's tickers.
+        """
+        universe = list(tickers) if tickers is not None else list(calendar)
+        self.codes = {ticker: code for code, ticker in enumerate(dict.fromkeys(universe))}
+        
+        keys = []
+        for ticker, dates in calendar.items():
+            code = self.codes.get(ticker)
+            if code is None or not dates:
+                continue
+            keys.append((code << _DAY_BITS) + _ordinals(dates))
+        
+        self.keys = np.unique(np.concatenate(keys)) if keys else np.empty(0, dtype=np.int64)
+    
+    def __len__(self) -> int:
+        return len(self.keys)
+    
+    def covers(self, ticker: str) -> bool:
+        """Whether the ticker is part of the preloaded universe"""
+        return ticker in self.codes
+    
+    def next_earnings(self, tickers: Sequence[str], as_of: Optional[datetime] = None) -> np.ndarray:
+        """
+        Next earnings date on or after as_of for each ticker
+        
+        Args:
+            tickers: Ticker per query (repeats allowed)
+            as_of: Reference date (defaults to today)
+        
+        Returns:
+            Array of day ordinals, -1 where there is no earnings date
+        """
+        as_of_ord = (as_of or datetime.now()).toordinal()
+        codes = np.fromiter((self.codes.get(t, -1) for t in tickers), dtype=np.int64, count=len(tickers))
+        if len(self.keys) == 0:
+            return np.full(len(codes), _NO_EARNINGS, dtype=np.int64)
+        
+        queries = (codes << _DAY_BITS) + as_of_ord
+        idx = np.searchsorted(self.keys, queries, side='left')
+        found = (idx < len(self.keys)) & (codes >= 0)
+        
+        hits = self.keys[np.minimum(idx, len(self.keys) - 1)]
+        found &= (hits >> _DAY_BITS) == codes
+        
+        return np.where(found, hits & ((1 << _DAY_BITS) - 1), _NO_EARNINGS)
+    
+    def position(self, tickers: Sequence[str], front_dates: Sequence[str], back_dates: Sequence[str],
+                 as_of: Optional[datetime] = None) -> Dict[str, np.ndarray]:
+        """
+        Position each opportunity's expirations relative to the next earnings date
+        
+        Args:
+            tickers: Ticker per opportunity
+            front_dates: Front expiration per opportunity (YYYY-MM-DD)
+            back_dates: Back expiration per opportunity (YYYY-MM-DD)
+            as_of: Reference time (defaults to now)
+        
+        Returns:
+            Dict of arrays: earnings_ordinal (-1 if none), has_earnings_soon,
+            front_is_pre_earnings, back_is_post_earnings, both_post_earnings
+        """
+        now = as_of or datetime.now()
+        earnings = self.next_earnings(tickers, now)
+        front = _ordinals(front_dates)
+        back = _ordinals(back_dates)
+        has_date = earnings != _NO_EARNINGS
+        
+        # Match abs((earnings_dt - now).days) < 60 where earnings_dt is midnight
+        past_midnight = now != datetime.combine(now.date(), datetime.min.time())
+        days_until = earnings - now.toordinal() - int(past_midnight)
+        
+        return {
+            'earnings_ordinal': earnings,
+            'has_earnings_soon': has_date & (np.abs(days_until) < 60),
+            'front_is_pre_earnings': has_date & (front < earnings),
+            'back_is_post_earnings': has_date & (back > earnings),
+            'both_post_earnings': has_date & (front > earnings) & (back > earnings),
+        }
+
+
+def preload_earnings_index(tickers: Sequence[str], days_ahead: int = 90,
+                           calendar_source=None) -> EarningsIndex:
+    """
+    Pull a date-range earnings calendar for the universe and index it
+    
+    Args:
+        tickers: Ticker universe
+        days_ahead: Length of the preloaded range starting today
+        calendar_source: Object with get_earnings_calendar(from_date, to_date)
+            (defaults to the Finnhub FreeEarningsCalendar)
+    
+    Returns:
+        EarningsIndex covering the universe
+    """
+    if calendar_source is None:
+        from ff_earnings_free import FreeEarningsCalendar
+        calendar_source = FreeEarningsCalendar()
+    
+    today = datetime.now()
+    calendar = calendar_source.get_earnings_calendar(
+        today.strftime('%Y-%m-%d'),
+        (today + timedelta(days=days_ahead)).strftime('%Y-%m-%d')
+    )
+    
+    # An empty calendar means the bulk fetch failed, not that nobody reports:
+    # leave the universe uncovered rather than claim "no earnings" for everyone
+    if not calendar:
+        return EarningsIndex({}, tickers=[])
+    
+    universe = set(tickers)
+    return EarningsIndex({t: d for t, d in calendar.items() if t in universe}, tickers)
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3.11
+"""
+Forward Factor Earnings Providers
+
+One interface over the earnings sources (Polygon ticker details, Yahoo
+Finance scraping, Finnhub, Yahoo Finance API), chained in a configurable
+fallback order.
+
+When the current provider is slower than its own p95 latency, a hedged
+request goes to the next provider and whichever date arrives first wins.
+Per-provider latency and success stats are recorded; latencies are those
+of upstream requests only, not cache hits or rate limiter queue wait. The
+hedge timer starts when the current provider's call starts running, not
+while it is queued for a pool worker.
+"""
+
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from ff_earnings_cache import EarningsCache, get_default_cache
+from ff_rate_limit import RateLimiter
+
+# Configuration
+DEFAULT_PROVIDER_ORDER = os.environ.get('FF_EARNINGS_PROVIDERS', 'polygon,yahoo,finnhub')
+
+# Hedging policy
+HEDGE_DEFAULT_DELAY = 2.0  # Seconds to wait before hedging until enough samples exist
+HEDGE_MIN_DELAY = 0.25  # Floor so a very fast p95 doesn't hedge nearly every lookup
+HEDGE_MIN_SAMPLES = 20  # Samples needed before trusting the measured p95
+HEDGE_QUEUE_POLL = 0.05  # Seconds between checks while the call to hedge is still queued
+LATENCY_WINDOW = 500  # Recent latencies kept per provider
+
+
+class EarningsLookupError(Exception):
+    """Raised when every provider failed (as opposed to finding no date)"""
+
+
+class EarningsProvider(ABC):
+    """Base class: look up the next earnings date for a ticker"""
+    
+    name = 'base'
+    cache: Optional[EarningsCache] = None  # Answers are cached under the provider's name
+    rate_limiter: Optional[RateLimiter] = None  # Limiter fetch() waits on (its wait is not latency)
+    
+    def cached(self, ticker: str) -> Tuple[bool, Optional[str]]:
+        """Cached answer for a ticker: (hit, earnings date)"""
+        if self.cache is None:
+            return False, None
+        return self.cache.get(self.name, ticker)
+    
+    @abstractmethod
+    def fetch(self, ticker: str) -> Optional[str]:
+        """
+        Look up the next earnings date upstream (no cache check) and cache the answer
+        
+        Returns: Earnings date in YYYY-MM-DD format, or None if the provider has no date
+        Raises: Any error if the provider could not answer
+        """
+    
+    def lookup(self, ticker: str) -> Optional[str]:
+        """Next earnings date, from the cache when possible"""
+        hit, earnings_date = self.cached(ticker)
+        return earnings_date if hit else self.fetch(ticker)
+
+
+class PolygonEarningsProvider(EarningsProvider):
+    """Polygon.io ticker details (next_earnings_date)"""
+    
+    name = 'polygon'
+    
+    def __init__(self, api_key: str, cache: Optional[EarningsCache] = None):
+        self.api_key = api_key
+        self.cache = cache or get_default_cache()
+        self._client = None
+        self._client_lock = threading.Lock()
+    
+    @property
+    def client(self):
+        """Polygon REST client, created (and the polygon package imported) on first use"""
+        with self._client_lock:
+            if self._client is None:
+                from polygon import RESTClient
+                self._client = RESTClient(api_key=self.api_key)
+            return self._client
+    
+    def fetch(self, ticker: str) -> Optional[str]:
+        ticker_details = self.client.get_ticker_details(ticker)
+        
+        # Try to get earnings date from results
+        earnings_date = None
+        if hasattr(ticker_details, 'results'):
+            results = ticker_details.results
+            if hasattr(results, 'next_earnings_date'):
+                earnings_date = results.next_earnings_date
+        
+        self.cache.put(self.name, ticker, earnings_date)
+        return earnings_date
+
+
+class YahooEarningsProvider(EarningsProvider):
+    """Yahoo Finance quote page scraping (YahooEarningsCalendar)"""
+    
+    name = 'yahoo'
+    
+    def __init__(self, cache: Optional[EarningsCache] = None):
+        from ff_earnings_yahoo import YahooEarningsCalendar
+        self.calendar = YahooEarningsCalendar(cache=cache)
+        self.cache = self.calendar.cache
+    
+    def fetch(self, ticker: str) -> Optional[str]:
+        return self.calendar.fetch_earnings_date(ticker)
+
+
+class FinnhubEarningsProvider(EarningsProvider):
+    """Finnhub earnings calendar (FreeEarningsCalendar)"""
+    
+    name = 'finnhub'
+    
+    def __init__(self, cache: Optional[EarningsCache] = None):
+        from ff_earnings_free import FreeEarningsCalendar
+        self.calendar = FreeEarningsCalendar(cache=cache)
+        self.cache = self.calendar.cache
+        self.rate_limiter = self.calendar.rate_limiter
+    
+    def cached(self, ticker: str) -> Tuple[bool, Optional[str]]:
+        hit, earnings_date = super().cached(ticker)
+        # Profile announcements may carry a time component
+        return hit, earnings_date[:10] if earnings_date else None
+    
+    def fetch(self, ticker: str) -> Optional[str]:
+        earnings_date = self.calendar.fetch_earnings_date(ticker)
+        return earnings_date[:10] if earnings_date else None
+
+
+class YahooApiEarningsProvider(EarningsProvider):
+    """Yahoo Finance API via the sandbox data_api client (earnings_lookup)"""
+    
+    name = 'yahoo_api'
+    
+    def __init__(self, cache: Optional[EarningsCache] = None):
+        self.cache = cache or get_default_cache()
+    
+    def fetch(self, ticker: str) -> Optional[str]:
+        from earnings_lookup import fetch_earnings_date
+        return fetch_earnings_date(ticker, cache=self.cache)
+
+
+def build_provider(name: str, cache: Optional[EarningsCache] = None) -> Optional[EarningsProvider]:
+    """
+    Create a provider by name
+    
+    Returns: The provider, or None if it is not configured (e.g. no API key)
+    """
+    if name == 'polygon':
+        api_key = os.environ.get('POLYGON_API_KEY', '')
+        return PolygonEarningsProvider(api_key, cache=cache) if api_key else None
+    if name == 'yahoo':
+        return YahooEarningsProvider(cache=cache)
+    if name == 'finnhub':
+        return FinnhubEarningsProvider(cache=cache)
+    if name == 'yahoo_api':
+        return YahooApiEarningsProvider(cache=cache)
+    raise ValueError(f"Unknown earnings provider: {name}")
+
+
+class ProviderStats:
+    """Latency and outcome counters for one provider"""
+    
+    def __init__(self):
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.successes = 0  # Returned a date
+        self.misses = 0  # Answered without a date
+        self.failures = 0  # Raised
+        self.wins = 0  # Supplied the chain's answer
+        self.hedges = 0  # Was slow enough that the next provider was hedged in
+    
+    def percentile(self, pct: float) -> Optional[float]:
+        """Latency percentile in seconds (None without samples)"""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+    
+    def hedge_delay(self) -> float:
+        """How long to wait on this provider before hedging"""
+        if len(self.latencies) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        return max(HEDGE_MIN_DELAY, self.percentile(95))
+    
+    def as_dict(self) -> Dict[str, Optional[float]]:
+        return {
+            'calls': self.successes + self.misses + self.failures,
+            'successes': self.successes,
+            'misses': self.misses,
+            'failures': self.failures,
+            'wins': self.wins,
+            'hedges': self.hedges,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+        }
+
+
+class EarningsProviderChain:
+    """Ordered earnings providers with fallback and hedged requests"""
+    
+    def __init__(self, providers: Sequence[EarningsProvider], hedge: bool = True, max_workers: int = 16):
+        """
+        Args:
+            providers: Providers in fallback order (primary first)
+            hedge: Send a hedged request to the next provider when the
+                current one exceeds its p95 latency
+            max_workers: Size of the pool running provider calls
+        """
+        self.providers = list(providers)
+        self.hedge = hedge
+        self.stats = {p.name: ProviderStats() for p in self.providers}
+        self._stats_lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='earnings')
+    
+    def _call(self, provider: EarningsProvider, ticker: str, started: Optional[Dict[str, float]] = None):
+        """
+        Run one provider lookup and record its outcome
+        
+        Args:
+            provider: Provider to ask
+            ticker: Ticker to look up
+            started: Set to the monotonic start time under the provider's
+                name once a worker runs the call (the hedge timer)
+        
+        Returns: (date, error)
+        """
+        if started is not None:
+            started[provider.name] = time.monotonic()
+        limiter = provider.rate_limiter
+        elapsed = None  # Upstream latency (cache hits are not timed)
+        try:
+            hit, earnings_date = provider.cached(ticker)
+            if not hit:
+                queued = limiter.thread_wait() if limiter is not None else 0.0
+                start = time.perf_counter()
+                try:
+                    earnings_date = provider.fetch(ticker)
+                finally:
+                    elapsed = time.perf_counter() - start
+                    if limiter is not None:
+                        elapsed -= limiter.thread_wait() - queued
+            error = None
+        except Exception as e:
+            earnings_date, error = None, e
+        
+        with self._stats_lock:
+            stats = self.stats[provider.name]
+            if elapsed is not None:
+                stats.latencies.append(elapsed)
+            if error is not None:
+                stats.failures += 1
+            elif earnings_date:
+                stats.successes += 1
+            else:
+                stats.misses += 1
+        
+        return earnings_date, error
+    
+    def get_earnings_date(self, ticker: str) -> Optional[str]:
+        """
+        Look up the next earnings date through the chain
+        
+        Returns: Earnings date in YYYY-MM-DD format, or None if no provider has one
+        Raises: EarningsLookupError if every provider failed
+        """
+        pending = {}
+        started: Dict[str, float] = {}  # Provider name -> when its call started running
+        next_index = 0
+        answered = False  # At least one provider answered cleanly (possibly with no date)
+        errors = []
+        
+        while pending or next_index < len(self.providers):
+            if not pending:
+                provider = self.providers[next_index]
+                pending[self._pool.submit(self._call, provider, ticker, started)] = provider
+                next_index += 1
+                continue
+            
+            # Wait on the most recently launched provider up to its p95 from when
+            # its call started running (time queued for a worker does not count),
+            # then hedge
+            timeout = deadline = None
+            if self.hedge and next_index < len(self.providers):
+                current = self.providers[next_index - 1].name
+                if current in started:
+                    deadline = started[current] + self.stats[current].hedge_delay()
+                    timeout = max(0.0, deadline - time.monotonic())
+                else:
+                    timeout = HEDGE_QUEUE_POLL
+            
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                if deadline is None or time.monotonic() < deadline:
+                    continue  # Still queued when the poll ended: the timer starts once it runs
+                with self._stats_lock:
+                    self.stats[current].hedges += 1
+                provider = self.providers[next_index]
+                pending[self._pool.submit(self._call, provider, ticker, started)] = provider
+                next_index += 1
+                continue
+            
+            for future in done:
+                provider = pending.pop(future)
+                earnings_date, error = future.result()
+                if earnings_date:
+                    with self._stats_lock:
+                        self.stats[provider.name].wins += 1
+                    return earnings_date
+                if error is None:
+                    answered = True
+                else:
+                    errors.append(f"{provider.name}: {error}")
+        
+        if errors and not answered:
+            raise EarningsLookupError('; '.join(errors))
+        return None
+    
+    def stats_summary(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """Per-provider latency and success stats"""
+        with self._stats_lock:
+            return {name: stats.as_dict() for name, stats in self.stats.items()}
+    
+    def close(self):
+        """Shut down the provider pool (hedged lookups still running are not waited for)"""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+
+def build_provider_chain(order: Optional[Sequence[str]] = None, cache: Optional[EarningsCache] = None,
+                         hedge: bool = True) -> EarningsProviderChain:
+    """
+    Build a provider chain in the configured fallback order
+    
+    Args:
+        order: Provider names, primary first (defaults to FF_EARNINGS_PROVIDERS,
+            e.g. "polygon,yahoo,finnhub"). Unconfigured providers are skipped.
+        cache: Earnings cache shared by the providers
+        hedge: Enable hedged requests
+    
+    Returns:
+        EarningsProviderChain
+    """
+    if order is None:
+        order = [name.strip() for name in DEFAULT_PROVIDER_ORDER.split(',') if name.strip()]
+    
+    providers: List[EarningsProvider] = []
+    for name in order:
+        provider = build_provider(name, cache=cache)
+        if provider is not None:
+            providers.append(provider)
+    
+    return EarningsProviderChain(providers, hedge=hedge)
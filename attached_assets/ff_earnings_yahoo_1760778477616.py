@@ -7,16 +7,124 @@ Scrapes earnings dates from Yahoo Finance public pages
 
 import requests
 from datetime import datetime
-from typing import Optional, Dict
+from typing import Optional, Dict, Iterable, Tuple
 import re
-import json
+from ff_earnings_cache import EarningsCache, get_default_cache
+
+# Machine-readable markers, checked in this order; the first match ends the download
+TIMESTAMP_PATTERNS = [
+    re.compile(rb'"earningsTimestamp":\{"raw":(\d+)'),
+    re.compile(rb'"earningsTimestamp":\s*(\d+)'),
+    re.compile(rb'"earningsDate":\[\{"raw":(\d+)'),  # QuoteSummaryStore calendarEvents
+]
+ISO_DATE_PATTERN = re.compile(rb'earningsDate["\s:]+(\d{4}-\d{2}-\d{2})')
+
+# Human-readable fallback, only used if no marker appears anywhere on the page
+TEXT_DATE_PATTERN = re.compile(rb'(?:Next )?Earnings Date[^<]*?([A-Za-z]+\.? \d{1,2}, \d{4})', re.IGNORECASE)
+
+MARKER_HINT = b'arnings'  # Cheap substring check before running the regexes
+CHUNK_SIZE = 16384
+OVERLAP = 256  # Bytes kept between chunks so markers split across chunks still match
+
+
+def _parse_text_date(date_str: str) -> Optional[str]:
+    """Parse 'Oct 30, 2025' / 'October 30, 2025' to YYYY-MM-DD"""
+    for fmt in ('%b %d, %Y', '%B %d, %Y'):
+        try:
+            return datetime.strptime(date_str.replace('.', ''), fmt).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return None
+
+
+def _search_markers(window: bytes, final: bool) -> Optional[str]:
+    """Search one window for a machine-readable marker
+    
+    Unless this is the final window, a match touching the end of the window
+    is ignored: the number may continue in the next chunk.
+    """
+    for pattern in TIMESTAMP_PATTERNS + [ISO_DATE_PATTERN]:
+        match = pattern.search(window)
+        if match and (final or match.end() < len(window)):
+            value = match.group(1)
+            if pattern is ISO_DATE_PATTERN:
+                return value.decode()
+            return datetime.fromtimestamp(int(value)).strftime('%Y-%m-%d')
+    return None
+
+
+def extract_earnings_date_stream(chunks: Iterable[bytes]) -> Tuple[Optional[str], int]:
+    """
+    Extract the earnings date from a quote page delivered in chunks
+    
+    Stops consuming chunks as soon as a machine-readable marker is found.
+    
+    Args:
+        chunks: Iterable of raw page bytes
+    
+    Returns:
+        (earnings_date or None, bytes consumed)
+    """
+    consumed = 0
+    tail = b''
+    text_fallback = None
+    
+    for chunk in chunks:
+        if not chunk:
+            continue
+        consumed += len(chunk)
+        window = tail + chunk
+        tail = window[-OVERLAP:]
+        
+        if MARKER_HINT not in window:
+            continue
+        
+        earnings_date = _search_markers(window, final=False)
+        if earnings_date:
+            return earnings_date, consumed
+        
+        if text_fallback is None:
+            match = TEXT_DATE_PATTERN.search(window)
+            if match and match.end() < len(window):
+                text_fallback = _parse_text_date(match.group(1).decode(errors='ignore'))
+    
+    # A marker may end exactly at the end of the page
+    earnings_date = _search_markers(tail, final=True)
+    if earnings_date:
+        return earnings_date, consumed
+    
+    if text_fallback is None:
+        match = TEXT_DATE_PATTERN.search(tail)
+        if match:
+            text_fallback = _parse_text_date(match.group(1).decode(errors='ignore'))
+    
+    return text_fallback, consumed
+
+
+def fetch_earnings_date_streaming(url: str, headers: Dict[str, str], timeout: int = 10) -> Optional[str]:
+    """
+    Stream a Yahoo Finance quote page and stop downloading once the date is found
+    
+    Returns: Earnings date in YYYY-MM-DD format or None
+    Raises: requests.HTTPError on a non-200 response, or any network error
+    """
+    with requests.get(url, headers=headers, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        earnings_date, _ = extract_earnings_date_stream(response.iter_content(chunk_size=CHUNK_SIZE))
+        return earnings_date
+
 
 class YahooEarningsCalendar:
     """Free earnings calendar using Yahoo Finance scraping"""
     
-    def __init__(self):
-        """Initialize Yahoo Finance scraper"""
-        self.cache = {}
+    def __init__(self, cache: Optional[EarningsCache] = None):
+        """
+        Initialize Yahoo Finance scraper
+        
+        Args:
+            cache: Earnings cache (defaults to the shared persistent cache)
+        """
+        self.cache = cache or get_default_cache()
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
@@ -32,75 +140,33 @@ class YahooEarningsCalendar:
             Earnings date in YYYY-MM-DD format or None
         """
         # Check cache
-        if ticker in self.cache:
-            return self.cache[ticker]
+        hit, earnings_date = self.cache.get('yahoo', ticker)
+        if hit:
+            return earnings_date
         
         try:
-            # Yahoo Finance quote page has earnings date
-            url = f"https://finance.yahoo.com/quote/{ticker}"
-            response = requests.get(url, headers=self.headers, timeout=10)
-            
-            if response.status_code != 200:
-                return None
-            
-            html = response.text
-            
-            # Look for earnings date in various formats
-            # Pattern 1: "earningsTimestamp":1234567890
-            timestamp_match = re.search(r'"earningsTimestamp":\{"raw":(\d+)', html)
-            if timestamp_match:
-                timestamp = int(timestamp_match.group(1))
-                earnings_date = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d')
-                self.cache[ticker] = earnings_date
-                return earnings_date
-            
-            # Pattern 2: Look for earnings date in JSON data
-            json_match = re.search(r'root\.App\.main\s*=\s*({.*?});', html, re.DOTALL)
-            if json_match:
-                try:
-                    json_str = json_match.group(1)
-                    data = json.loads(json_str)
-                    
-                    # Navigate through the JSON structure
-                    if 'context' in data and 'dispatcher' in data['context']:
-                        stores = data['context']['dispatcher']['stores']
-                        if 'QuoteSummaryStore' in stores:
-                            summary = stores['QuoteSummaryStore']
-                            
-                            # Check earnings date
-                            if 'calendarEvents' in summary and 'earnings' in summary['calendarEvents']:
-                                earnings_info = summary['calendarEvents']['earnings']
-                                if 'earningsDate' in earnings_info and len(earnings_info['earningsDate']) > 0:
-                                    timestamp = earnings_info['earningsDate'][0]['raw']
-                                    earnings_date = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d')
-                                    self.cache[ticker] = earnings_date
-                                    return earnings_date
-                except:
-                    pass
-            
-            # Pattern 3: Simple text search for earnings date
-            date_patterns = [
-                r'Earnings Date[^<]*?(\w+ \d{1,2}, \d{4})',
-                r'Next Earnings Date[^<]*?(\w+ \d{1,2}, \d{4})'
-            ]
-            
-            for pattern in date_patterns:
-                match = re.search(pattern, html, re.IGNORECASE)
-                if match:
-                    try:
-                        date_str = match.group(1)
-                        earnings_date = datetime.strptime(date_str, '%b %d, %Y').strftime('%Y-%m-%d')
-                        self.cache[ticker] = earnings_date
-                        return earnings_date
-                    except:
-                        pass
-            
+            return self.fetch_earnings_date(ticker)
+        except requests.HTTPError:
             return None
-            
         except Exception as e:
             print(f"Error fetching earnings for {ticker}: {e}")
             return None
     
+    def fetch_earnings_date(self, ticker: str) -> Optional[str]:
+        """
+        Scrape the next earnings date (no cache check) and cache the answer
+        
+        Returns: Earnings date in YYYY-MM-DD format or None
+        Raises: requests.HTTPError on a non-200 response, or any network error
+        """
+        # Yahoo Finance quote page has earnings date
+        url = f"https://finance.yahoo.com/quote/{ticker}"
+        earnings_date = fetch_earnings_date_streaming(url, self.headers)
+        
+        # A page without a date is cached as a negative result
+        self.cache.put('yahoo', ticker, earnings_date)
+        return earnings_date
+    
     def get_earnings_info(self, ticker: str, front_date: str, back_date: str) -> Dict:
         """
         Get earnings info relative to option expiration dates
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3.11
+"""
+Forward Factor NYSE Holiday Rules
+
+Dependency-free NYSE holiday and early-close generator, so deciding whether
+tonight is a run night does not import pandas_market_calendars (and pandas).
+
+Rules:
+- Fixed dates shifted to the observed weekday (Saturday -> Friday,
+  Sunday -> Monday), except New Year's Day, which is not observed on the
+  preceding Friday when it falls on a Saturday
+- Nth / last weekday of a month (MLK Day, Presidents Day, Memorial Day,
+  Labor Day, Thanksgiving)
+- Good Friday from the Gregorian Easter date
+- Special closures (national days of mourning, 9/11, Hurricane Sandy)
+- 1:00 PM early closes around Independence Day, after Thanksgiving and on
+  Christmas Eve
+
+The rules are complete from FIRST_RULE_YEAR on; earlier years should come
+from pandas_market_calendars. validate_against_mcal() compares both.
+"""
+
+from datetime import date, time, timedelta
+from typing import Dict, List, Optional
+
+# Configuration
+FIRST_RULE_YEAR = 2000  # Rules and special closures are complete from this year on
+RULES_VERSION = 1  # Bump when rules change (invalidates cached session bitmaps)
+EARLY_CLOSE = time(13, 0)  # Regular early close (ET)
+REGULAR_CLOSE = time(16, 0)  # Regular close (ET)
+
+# One-off full-day closures
+SPECIAL_CLOSURES = {
+    date(2001, 9, 11): "September 11 Attacks",
+    date(2001, 9, 12): "September 11 Attacks",
+    date(2001, 9, 13): "September 11 Attacks",
+    date(2001, 9, 14): "September 11 Attacks",
+    date(2004, 6, 11): "National Day of Mourning (Reagan)",
+    date(2007, 1, 2): "National Day of Mourning (Ford)",
+    date(2012, 10, 29): "Hurricane Sandy",
+    date(2012, 10, 30): "Hurricane Sandy",
+    date(2018, 12, 5): "National Day of Mourning (G.H.W. Bush)",
+    date(2025, 1, 9): "National Day of Mourning (Carter)",
+}
+
+# One-off early closes (ET close time)
+SPECIAL_EARLY_CLOSES = {
+    date(2003, 12, 26): time(13, 0),  # Friday after Christmas
+    date(2005, 6, 1): time(15, 56),  # Systems issue
+}
+
+
+def easter_sunday(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """
+    Nth weekday of a month
+    
+    Args:
+        weekday: Monday=0 ... Sunday=6
+        n: 1 for the first, 2 for the second ... or -1 for the last
+    """
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def observed(day: date) -> date:
+    """Weekday a fixed-date holiday is observed on (Saturday -> Friday, Sunday -> Monday)"""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def nyse_holidays(year: int) -> Dict[date, str]:
+    """
+    NYSE full-day closures in a year (weekdays only)
+    
+    Returns:
+        Dict mapping date to holiday name
+    """
+    holidays = {}
+    
+    # New Year's Day: a Saturday holiday is not moved into the previous year
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        holidays[observed(new_year)] = "New Year's Day"
+    
+    if year >= 1998:
+        holidays[nth_weekday(year, 1, 0, 3)] = "Martin Luther King Jr. Day"
+    holidays[nth_weekday(year, 2, 0, 3)] = "Washington's Birthday"
+    holidays[easter_sunday(year) - timedelta(days=2)] = "Good Friday"
+    holidays[nth_weekday(year, 5, 0, -1)] = "Memorial Day"
+    if year >= 2022:
+        holidays[observed(date(year, 6, 19))] = "Juneteenth"
+    holidays[observed(date(year, 7, 4))] = "Independence Day"
+    holidays[nth_weekday(year, 9, 0, 1)] = "Labor Day"
+    holidays[nth_weekday(year, 11, 3, 4)] = "Thanksgiving Day"
+    holidays[observed(date(year, 12, 25))] = "Christmas Day"
+    
+    for day, name in SPECIAL_CLOSURES.items():
+        if day.year == year:
+            holidays[day] = name
+    
+    return holidays
+
+
+def nyse_early_closes(year: int) -> Dict[date, time]:
+    """
+    NYSE early closes in a year
+    
+    Returns:
+        Dict mapping date to ET close time
+    """
+    holidays = nyse_holidays(year)
+    closes = {}
+    
+    # Independence Day: the trading day before, or the Friday after a
+    # Thursday holiday until 2013
+    july_4 = date(year, 7, 4)
+    if july_4.weekday() in (1, 2, 4) or (july_4.weekday() == 3 and year >= 2013):
+        closes[date(year, 7, 3)] = EARLY_CLOSE
+    elif july_4.weekday() == 3:
+        closes[date(year, 7, 5)] = EARLY_CLOSE
+    
+    # Day after Thanksgiving
+    closes[nth_weekday(year, 11, 3, 4) + timedelta(days=1)] = EARLY_CLOSE
+    
+    # Christmas Eve (Friday Dec 24 is the observed Christmas holiday)
+    christmas_eve = date(year, 12, 24)
+    if christmas_eve.weekday() < 4:
+        closes[christmas_eve] = EARLY_CLOSE
+    
+    for day, close in SPECIAL_EARLY_CLOSES.items():
+        if day.year == year:
+            closes[day] = close
+    
+    return {day: close for day, close in closes.items() if day not in holidays}
+
+
+def is_session(day: date) -> bool:
+    """Whether the NYSE trades on a day (by the built-in rules)"""
+    return day.weekday() < 5 and day not in nyse_holidays(day.year)
+
+
+def sessions(first: date, last: date) -> List[date]:
+    """
+    NYSE trading sessions between two dates (inclusive)
+    
+    Args:
+        first: First date
+        last: Last date
+    
+    Returns:
+        Sorted list of session dates
+    """
+    closed = {}
+    for year in range(first.year, last.year + 1):
+        closed.update(nyse_holidays(year))
+    
+    days = []
+    day = first
+    while day <= last:
+        if day.weekday() < 5 and day not in closed:
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def validate_against_mcal(first_year: int = FIRST_RULE_YEAR, last_year: Optional[int] = None) -> List[str]:
+    """
+    Compare the built-in rules with pandas_market_calendars' NYSE calendar
+    
+    Args:
+        first_year: First year to compare
+        last_year: Last year to compare (defaults to 10 years from today)
+    
+    Returns:
+        Descriptions of every mismatching session or early close (empty when they agree)
+    """
+    import pandas_market_calendars as mcal
+    
+    last_year = last_year or date.today().year + 10
+    first, last = date(first_year, 1, 1), date(last_year, 12, 31)
+    nyse = mcal.get_calendar('NYSE')
+    
+    schedule = nyse.schedule(start_date=first, end_date=last)
+    reference_sessions = {ts.date() for ts in schedule.index}
+    reference_closes = {
+        ts.date(): close.tz_convert('America/New_York').time()
+        for ts, close in nyse.early_closes(schedule)['market_close'].items()
+    }
+    
+    built_sessions = set(sessions(first, last))
+    built_closes = {}
+    for year in range(first_year, last_year + 1):
+        built_closes.update(nyse_early_closes(year))
+    
+    mismatches = []
+    for day in sorted(built_sessions ^ reference_sessions):
+        expected = 'session' if day in reference_sessions else 'closed'
+        mismatches.append(f"{day} ({day:%a}): mcal says {expected}, rules say "
+                          f"{'session' if day in built_sessions else 'closed'}")
+    for day in sorted(set(built_closes) | set(reference_closes)):
+        if built_closes.get(day) != reference_closes.get(day):
+            mismatches.append(f"{day} ({day:%a}): mcal early close {reference_closes.get(day)}, "
+                              f"rules {built_closes.get(day)}")
+    return mismatches
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3.11
+"""
+Forward Factor Monte Carlo Engine
+
+Prices the recommended trade for each opportunity across simulated
+underlying paths:
+- FF > 0: calendar (sell front ATM straddle, buy back ATM straddle)
+- FF < 0: reverse calendar (buy front, sell back)
+
+Both legs are bought or sold at Black-Scholes prices from the scanner's
+front and back IVs. The underlying then follows geometric Brownian motion
+to front expiry at the realized volatility assumption (by default the
+forward vol, i.e. the market's own forecast for the front period reverting
+to the term structure). At front expiry the front leg is worth its
+intrinsic value and the back leg is repriced with Black-Scholes at the
+forward vol for its remaining life.
+
+Every opportunity is simulated against the same seeded normal draws
+(common random numbers), so results are reproducible and do not depend on
+how the batch is split into blocks or worker processes. P&L is expressed
+in percent of the strike (the ATM spot price at entry). Earnings jumps are
+not modeled; the quality filters handle earnings separately.
+
+Rows without a priceable spread (a zero or missing IV, or a back leg that
+does not outlive the front leg) are not simulated: MonteCarloEngine returns
+None for them, so callers fall back to the lookup model.
+"""
+
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from operator import attrgetter
+from typing import Dict, List, Optional, Sequence
+
+from ff_black_scholes import straddle_price
+
+# Configuration
+SIMULATION_PATHS = 20_000  # Paths per opportunity (antithetic pairs)
+SIMULATION_SEED = 42
+BLOCK_CELLS = 1_000_000  # Opportunities x paths priced per block (bounds memory)
+DAYS_PER_YEAR = 365.0
+REALIZED_VOL_SOURCES = ('forward', 'front', 'back')  # Which IV the underlying realizes over the front period
+
+
+@dataclass(frozen=True, slots=True)
+class SimulationResult:
+    """Simulated outcome of an opportunity's recommended spread (P&L in % of strike)"""
+    probability_of_profit: float  # Fraction of paths with P&L > 0
+    expected_pnl: float  # Mean P&L
+    max_loss: float  # Worst simulated loss (>= 0)
+    max_gain: float  # Best simulated gain
+    entry_cost: float  # Net debit paid (negative for a net credit)
+    
+    @property
+    def risk_reward(self) -> float:
+        """Max gain per unit of max loss"""
+        return self.max_gain / self.max_loss if self.max_loss > 0 else float('inf')
+
+
+def simulation_columns(opportunities: Sequence) -> Dict[str, np.ndarray]:
+    """
+    Convert opportunities to the column arrays the simulation needs
+    
+    Args:
+        opportunities: Objects with the Opportunity fields
+    
+    Returns:
+        Dict of arrays: direction (+1 calendar, -1 reverse calendar), front
+        and back years to expiry, front/back/forward vols as decimals, and
+        valid (whether the spread can be priced: positive vols and a back
+        leg expiring after the front leg)
+    """
+    fields = ('forward_factor', 'front_dte', 'back_dte', 'front_iv', 'back_iv', 'forward_vol')
+    rows = np.array([attrgetter(*fields)(o) for o in opportunities], dtype=np.float64).reshape(-1, len(fields))
+    forward_factor, front_dte, back_dte, front_iv, back_iv, forward_vol = rows.T
+    
+    columns = {
+        'direction': np.where(forward_factor > 0, 1.0, -1.0),
+        'front_years': np.maximum(front_dte, 0) / DAYS_PER_YEAR,
+        'back_years': np.maximum(back_dte, 0) / DAYS_PER_YEAR,
+        'front_vol': front_iv / 100,
+        'back_vol': back_iv / 100,
+        # The scanner reports 0 when the forward vol is undefined: assume the back IV
+        'forward_vol': np.where(forward_vol > 0, forward_vol, back_iv) / 100,
+    }
+    # NaN compares False, so missing values are invalid too
+    columns['valid'] = ((columns['front_vol'] > 0) & (columns['back_vol'] > 0) & (columns['forward_vol'] > 0)
+                        & (columns['front_years'] > 0) & (columns['back_years'] > columns['front_years']))
+    return columns
+
+
+def standard_normals(paths: int, seed: int) -> np.ndarray:
+    """Seeded antithetic standard normal draws (the same for every opportunity)"""
+    half = np.random.default_rng(seed).standard_normal((paths + 1) // 2)
+    return np.concatenate([half, -half])[:paths]
+
+
+def simulate_columns(columns: Dict[str, np.ndarray], paths: int = SIMULATION_PATHS,
+                     seed: int = SIMULATION_SEED, realized_vol: str = 'forward') -> Dict[str, np.ndarray]:
+    """
+    Simulate the spreads for a batch of column arrays
+    
+    Args:
+        columns: Output of simulation_columns
+        paths: Simulated paths per opportunity
+        seed: Random seed
+        realized_vol: Volatility the underlying realizes until front expiry
+            ('forward', 'front' or 'back' IV)
+    
+    Returns:
+        Dict of per-opportunity arrays named like the SimulationResult fields
+        (NaN for rows that are not valid)
+    """
+    n = len(columns['direction'])
+    valid = columns['valid']
+    if not valid.all():
+        results = {name: np.full(n, np.nan) for name in SimulationResult.__dataclass_fields__}
+        if valid.any():
+            priced = simulate_columns({name: values[valid] for name, values in columns.items()},
+                                      paths, seed, realized_vol)
+            for name, values in priced.items():
+                results[name][valid] = values
+        return results
+    
+    z = standard_normals(paths, seed)
+    results = {name: np.empty(n) for name in SimulationResult.__dataclass_fields__}
+    
+    # Entry prices of each leg
+    front_entry = straddle_price(1.0, columns['front_vol'], columns['front_years'])
+    back_entry = straddle_price(1.0, columns['back_vol'], columns['back_years'])
+    entry_cost = columns['direction'] * (back_entry - front_entry)
+    
+    block = max(1, BLOCK_CELLS // max(paths, 1))
+    for start in range(0, n, block):
+        rows = slice(start, start + block)
+        t1 = columns['front_years'][rows, None]
+        vol = columns[f'{realized_vol}_vol'][rows, None]
+        
+        # Underlying at front expiry (risk-neutral GBM, spot = strike = 1)
+        spot = np.exp(vol * np.sqrt(t1) * z - 0.5 * vol * vol * t1)
+        
+        # Front leg expires at intrinsic value, back leg keeps its remaining time value
+        front_exit = np.abs(spot - 1.0)
+        back_exit = straddle_price(spot, columns['forward_vol'][rows, None],
+                                   columns['back_years'][rows, None] - t1)
+        pnl = columns['direction'][rows, None] * (back_exit - front_exit) - entry_cost[rows, None]
+        pnl *= 100
+        
+        results['probability_of_profit'][rows] = (pnl > 0).mean(axis=1)
+        results['expected_pnl'][rows] = pnl.mean(axis=1)
+        results['max_loss'][rows] = np.maximum(-pnl.min(axis=1), 0.0)
+        results['max_gain'][rows] = pnl.max(axis=1)
+    
+    results['entry_cost'] = entry_cost * 100
+    return results
+
+
+class MonteCarloEngine:
+    """Batched Monte Carlo pricing of calendar spreads"""
+    
+    def __init__(self, paths: int = SIMULATION_PATHS, seed: int = SIMULATION_SEED, workers: int = 1,
+                 realized_vol: str = 'forward'):
+        """
+        Args:
+            paths: Simulated paths per opportunity
+            seed: Random seed (the same seed always gives the same results)
+            workers: Worker processes (1 simulates in this process)
+            realized_vol: Volatility the underlying realizes until front expiry
+                ('forward', 'front' or 'back' IV)
+        """
+        if realized_vol not in REALIZED_VOL_SOURCES:
+            raise ValueError(f"Unknown realized vol source: {realized_vol} "
+                             f"(expected one of {', '.join(REALIZED_VOL_SOURCES)})")
+        
+        self.paths = paths
+        self.seed = seed
+        self.workers = max(1, workers)
+        self.realized_vol = realized_vol
+    
+    def simulate(self, opportunities: Sequence) -> List[Optional[SimulationResult]]:
+        """
+        Simulate the recommended spread of every opportunity
+        
+        Args:
+            opportunities: Opportunities to price
+        
+        Returns:
+            SimulationResult per opportunity, in order (None where the
+            spread cannot be priced)
+        """
+        if not opportunities:
+            return []
+        
+        columns = simulation_columns(opportunities)
+        n = len(opportunities)
+        
+        if self.workers == 1 or n < 2:
+            results = simulate_columns(columns, self.paths, self.seed, self.realized_vol)
+        else:
+            # Contiguous slices per worker; common random numbers keep results identical
+            bounds = np.linspace(0, n, min(self.workers, n) + 1).astype(int)
+            parts = [{name: values[lo:hi] for name, values in columns.items()}
+                     for lo, hi in zip(bounds[:-1], bounds[1:])]
+            with ProcessPoolExecutor(max_workers=len(parts)) as pool:
+                outputs = list(pool.map(simulate_columns, parts, [self.paths] * len(parts),
+                                        [self.seed] * len(parts), [self.realized_vol] * len(parts)))
+            results = {name: np.concatenate([out[name] for out in outputs]) for name in outputs[0]}
+        
+        names = list(SimulationResult.__dataclass_fields__)
+        return [SimulationResult(*row) if valid else None
+                for valid, *row in zip(columns['valid'].tolist(), *(results[name].tolist() for name in names))]
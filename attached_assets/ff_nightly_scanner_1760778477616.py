@@ -16,12 +16,21 @@ import requests
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
-from polygon import RESTClient
+from concurrent.futures import ThreadPoolExecutor
 import math
+import hashlib
+import dataclasses
+from ff_earnings_cache import EarningsCache, get_default_cache
+from ff_earnings_providers import build_provider_chain
+from ff_montecarlo import MonteCarloEngine, SimulationResult
+from ff_quality_rules import QualityRuleEngine, RejectionReason, build_quality_rules
+from ff_scan_store import ScanStore
 
 # Configuration
 SCANNER_API_BASE = "https://factor-forward.replit.app/api"
+SCAN_SOURCES = ('api', 'local')  # Hosted scanner over HTTP, or ForwardFactorScanner in-process
 POLYGON_API_KEY = os.environ.get('POLYGON_API_KEY', '')
+SCANNER_IV_SCALE = 100.0  # Local scanner IV is Polygon's decimal; thresholds below are in percent
 
 # Quality Criteria Thresholds
 MIN_FORWARD_FACTOR = 30.0  # Minimum |FF| to consider
@@ -31,9 +40,13 @@ MIN_IV = 15.0  # Minimum implied volatility
 MAX_IV = 150.0  # Maximum implied volatility
 MIN_PROBABILITY = 70.0  # Minimum probability of profit
 MIN_RISK_REWARD = 3.0  # Minimum risk/reward ratio
+PROBABILITY_MODELS = ('lookup', 'montecarlo')  # |FF| step table, or simulated calendar P&L
 
+# Concurrency
+EARNINGS_WORKERS = 8  # Max concurrent earnings lookups (one per ticker)
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class Opportunity:
     """Represents a Forward Factor opportunity"""
     ticker: str
@@ -59,7 +72,7 @@ class Opportunity:
         return self.back_dte - self.front_dte
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class EarningsInfo:
     """Earnings information for a ticker"""
     ticker: str
@@ -70,52 +83,304 @@ class EarningsInfo:
     both_post_earnings: bool
 
 
-@dataclass
+def render_thesis(opp: Opportunity, earnings_info: Optional[EarningsInfo]) -> str:
+    """Generate trading thesis for the opportunity"""
+    if opp.forward_factor > 0:
+        # Positive FF: Front is overpriced
+        direction = "SELL FRONT / BUY BACK"
+        explanation = (
+            f"Front contract IV ({opp.front_iv:.1f}%) is significantly elevated compared to "
+            f"the implied forward volatility ({opp.forward_vol:.1f}%). This {opp.forward_factor:.1f}% "
+            f"premium suggests the front contract is overpriced relative to the back contract "
+            f"({opp.back_iv:.1f}% IV)."
+        )
+    else:
+        # Negative FF: Front is underpriced
+        direction = "BUY FRONT / SELL BACK"
+        explanation = (
+            f"Front contract IV ({opp.front_iv:.1f}%) is significantly depressed compared to "
+            f"the implied forward volatility ({opp.forward_vol:.1f}%). This {abs(opp.forward_factor):.1f}% "
+            f"discount suggests the front contract is underpriced relative to the back contract "
+            f"({opp.back_iv:.1f}% IV)."
+        )
+    
+    # Add catalyst information
+    catalyst_info = ""
+    if earnings_info and earnings_info.earnings_date:
+        catalyst_info = (
+            f"\n\nCATALYST: Earnings on {earnings_info.earnings_date}. "
+        )
+        if earnings_info.front_is_pre_earnings and earnings_info.back_is_post_earnings:
+            catalyst_info += (
+                "Front expires before earnings, back expires after. "
+                "This creates a natural volatility term structure around the event."
+            )
+        elif earnings_info.both_post_earnings:
+            catalyst_info += (
+                "Both contracts expire after earnings. "
+                "IV differential may reflect post-earnings volatility decay."
+            )
+    else:
+        # Use has_earnings_soon flag from scanner
+        if opp.has_earnings_soon:
+            catalyst_info = (
+                "\n\n⚠️ CATALYST: Earnings expected soon (per scanner data). "
+                "This volatility mispricing may be event-driven. Verify earnings date manually before trading."
+            )
+        else:
+            catalyst_info = (
+                "\n\n✓ NO IMMINENT CATALYST: No earnings expected soon per scanner data. "
+                "However, always verify earnings calendar manually before trading."
+            )
+    
+    return f"{direction}\n\n{explanation}{catalyst_info}"
+
+
+def render_trade_structure(opp: Opportunity) -> str:
+    """Generate recommended trade structure"""
+    if opp.forward_factor > 0:
+        # Sell front, buy back
+        return (
+            f"**Calendar Spread (Credit)**\n"
+            f"- Sell {opp.ticker} {opp.front_date} ATM straddle/strangle\n"
+            f"- Buy {opp.ticker} {opp.back_date} ATM straddle/strangle\n"
+            f"- Net credit from elevated front IV\n"
+            f"- Profit from front IV decay and/or time decay"
+        )
+    else:
+        # Buy front, sell back
+        return (
+            f"**Reverse Calendar Spread (Debit)**\n"
+            f"- Buy {opp.ticker} {opp.front_date} ATM straddle/strangle\n"
+            f"- Sell {opp.ticker} {opp.back_date} ATM straddle/strangle\n"
+            f"- Net debit to capture underpriced front IV\n"
+            f"- Profit from front IV expansion"
+        )
+
+
 class TradeAnalysis:
-    """Complete analysis of a trading opportunity"""
-    opportunity: Opportunity
-    earnings_info: Optional[EarningsInfo]
-    is_quality_setup: bool
-    rejection_reasons: List[str]
-    probability: float
-    risk_reward: float
-    rating: int  # 0-10
-    thesis: str
-    trade_structure: str
+    """Complete analysis of a trading opportunity
+    
+    Immutable and slotted. Thesis, trade structure and rejection reason text
+    are rendered on access from the opportunity, earnings info and reason
+    codes, so analyses held in bulk carry no long strings. Text passed in
+    explicitly is kept and returned as-is.
+    """
+    __slots__ = ('opportunity', 'earnings_info', 'is_quality_setup', 'probability', 'risk_reward',
+                 'rating', 'rejection_codes', 'expected_pnl', 'max_loss',
+                 '_rejection_reasons', '_thesis', '_trade_structure')
+    
+    def __init__(self, opportunity: Opportunity, earnings_info: Optional[EarningsInfo],
+                 is_quality_setup: bool, rejection_reasons: Optional[List[str]] = None,
+                 probability: float = 0.0, risk_reward: float = 0.0, rating: int = 0,
+                 thesis: Optional[str] = None, trade_structure: Optional[str] = None,
+                 rejection_codes: Optional[List[RejectionReason]] = None,
+                 expected_pnl: Optional[float] = None, max_loss: Optional[float] = None):
+        init = object.__setattr__
+        init(self, 'opportunity', opportunity)
+        init(self, 'earnings_info', earnings_info)
+        init(self, 'is_quality_setup', is_quality_setup)
+        init(self, 'probability', probability)
+        init(self, 'risk_reward', risk_reward)
+        init(self, 'rating', rating)  # 0-10
+        init(self, 'rejection_codes', tuple(rejection_codes or ()))
+        # Simulated spread P&L in % of strike (Monte Carlo probability model only)
+        init(self, 'expected_pnl', expected_pnl)
+        init(self, 'max_loss', max_loss)
+        # Explicit text only when it cannot be rendered from the codes
+        init(self, '_rejection_reasons', None if rejection_codes else (tuple(rejection_reasons) if rejection_reasons else None))
+        init(self, '_thesis', thesis)
+        init(self, '_trade_structure', trade_structure)
+    
+    def __setattr__(self, name, value):
+        raise dataclasses.FrozenInstanceError(f"cannot assign to field '{name}'")
+    
+    @property
+    def rejection_reasons(self) -> List[str]:
+        """Human-readable rejection reasons"""
+        if self._rejection_reasons is not None:
+            return list(self._rejection_reasons)
+        return [reason.message for reason in self.rejection_codes]
+    
+    @property
+    def thesis(self) -> str:
+        """Trading thesis (rendered on access)"""
+        return self._thesis if self._thesis is not None else render_thesis(self.opportunity, self.earnings_info)
+    
+    @property
+    def trade_structure(self) -> str:
+        """Recommended trade structure (rendered on access)"""
+        return self._trade_structure if self._trade_structure is not None else render_trade_structure(self.opportunity)
+    
+    def _key(self) -> Tuple:
+        return (self.opportunity, self.earnings_info, self.is_quality_setup, self.rejection_reasons,
+                self.probability, self.risk_reward, self.rating, self.thesis, self.trade_structure,
+                self.rejection_codes, self.expected_pnl, self.max_loss)
+    
+    def __eq__(self, other) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._key() == other._key()
+    
+    __hash__ = None
+    
+    def __repr__(self) -> str:
+        return (f"TradeAnalysis(opportunity={self.opportunity!r}, is_quality_setup={self.is_quality_setup}, "
+                f"rating={self.rating}, probability={self.probability}, risk_reward={self.risk_reward}, "
+                f"rejection_codes={list(self.rejection_codes)!r})")
+
+
+def analysis_to_dict(analysis: TradeAnalysis) -> Dict:
+    """Serialize a TradeAnalysis to plain JSON-compatible data (rendered text is not stored)"""
+    data = {
+        'opportunity': dataclasses.asdict(analysis.opportunity),
+        'earnings_info': dataclasses.asdict(analysis.earnings_info) if analysis.earnings_info else None,
+        'is_quality_setup': analysis.is_quality_setup,
+        'probability': analysis.probability,
+        'risk_reward': analysis.risk_reward,
+        'rating': analysis.rating,
+        'rejection_codes': [{'code': r.code, 'params': r.params} for r in analysis.rejection_codes],
+        'expected_pnl': analysis.expected_pnl,
+        'max_loss': analysis.max_loss,
+    }
+    # Keep only text that cannot be re-rendered
+    if analysis._rejection_reasons is not None:
+        data['rejection_reasons'] = list(analysis._rejection_reasons)
+    if analysis._thesis is not None:
+        data['thesis'] = analysis._thesis
+    if analysis._trade_structure is not None:
+        data['trade_structure'] = analysis._trade_structure
+    return data
+
+
+def analysis_from_dict(data: Dict) -> TradeAnalysis:
+    """Rebuild a TradeAnalysis serialized by analysis_to_dict"""
+    data = dict(data)
+    data['opportunity'] = Opportunity(**data['opportunity'])
+    if data.get('earnings_info') is not None:
+        data['earnings_info'] = EarningsInfo(**data['earnings_info'])
+    data['rejection_codes'] = [RejectionReason(**reason) for reason in data.get('rejection_codes', [])]
+    return TradeAnalysis(**data)
 
 
 class FFScannerService:
     """Forward Factor Scanner Automation Service"""
     
-    def __init__(self):
-        """Initialize the scanner service"""
-        self.polygon_client = None
-        if POLYGON_API_KEY:
-            self.polygon_client = RESTClient(api_key=POLYGON_API_KEY)
-        else:
+    def __init__(self, bulk_earnings: bool = False, earnings_cache: Optional[EarningsCache] = None,
+                 earnings_providers: Optional[List[str]] = None, source: str = 'api',
+                 tickers: Optional[List[str]] = None, scan_store: Optional[ScanStore] = None,
+                 incremental: bool = True, probability_model: str = 'lookup',
+                 simulation_workers: int = 1, time_basis: str = 'calendar'):
+        """
+        Initialize the scanner service
+        
+        Args:
+            bulk_earnings: Preload a market-wide earnings calendar in a few bulk
+                requests instead of looking up each ticker separately
+            earnings_cache: Earnings cache (defaults to the shared persistent cache)
+            earnings_providers: Earnings provider fallback order, primary first
+                (defaults to FF_EARNINGS_PROVIDERS, e.g. polygon,yahoo,finnhub)
+            source: Where opportunities come from: 'api' (hosted scanner app over
+                HTTP) or 'local' (ForwardFactorScanner run in this process)
+            tickers: Tickers for the local scan (defaults to the scanner's DEFAULT_TICKERS)
+            scan_store: Scan history store (defaults to the persistent store)
+            incremental: Revalidate scanner API responses with ETag/If-Modified-Since,
+                skip unchanged scans and reuse stored analyses of opportunities
+                already analyzed
+            probability_model: 'lookup' (probability and risk/reward from |FF|
+                steps) or 'montecarlo' (simulate the recommended spread of
+                quality setups whose spread can be priced)
+            simulation_workers: Worker processes for the Monte Carlo model
+            time_basis: Forward Factor time to expiration for the local scan:
+                'calendar' (days/365) or 'trading' (NYSE sessions/252)
+        """
+        if source not in SCAN_SOURCES:
+            raise ValueError(f"Unknown scan source: {source} (expected one of {', '.join(SCAN_SOURCES)})")
+        if probability_model not in PROBABILITY_MODELS:
+            raise ValueError(f"Unknown probability model: {probability_model} "
+                             f"(expected one of {', '.join(PROBABILITY_MODELS)})")
+        
+        self.source = source
+        self.tickers = tickers
+        self.time_basis = time_basis
+        self.bulk_earnings = bulk_earnings
+        self.scan_store = scan_store or ScanStore()
+        self.incremental = incremental
+        self.earnings_cache = earnings_cache or get_default_cache()
+        self.earnings_chain = build_provider_chain(earnings_providers, cache=self.earnings_cache)
+        self.quality_rules = QualityRuleEngine(build_quality_rules(
+            MIN_FORWARD_FACTOR, MIN_DTE, MAX_DTE, MIN_IV, MAX_IV
+        ))
+        self.probability_model = probability_model
+        self.monte_carlo = MonteCarloEngine(workers=simulation_workers) if probability_model == 'montecarlo' else None
+        
+        # Kept for the service's lifetime so a long-running daemon reuses
+        # keep-alive connections and the scanner's calendar between runs
+        self.http = requests.Session()
+        self._local_scanner = None
+        if not POLYGON_API_KEY:
             print("WARNING: POLYGON_API_KEY not set. Catalyst detection will be limited.")
     
+    def close(self):
+        """Release the earnings lookup pool and HTTP connections"""
+        self.earnings_chain.close()
+        self.http.close()
+    
+    def fetch_json(self, url: str) -> Tuple[Dict, bool]:
+        """
+        GET a scanner API URL, revalidating the stored copy when incremental
+        
+        Returns: (data, modified) - modified is False when the server answered
+        304 Not Modified and the stored body was used
+        """
+        cached = self.scan_store.get_http_cache(url) if self.incremental else None
+        
+        headers = {}
+        if cached:
+            etag, last_modified, _ = cached
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        
+        response = self.http.get(url, headers=headers, timeout=30)
+        if response.status_code == 304 and cached:
+            return json.loads(cached[2]), False
+        
+        response.raise_for_status()
+        if self.incremental:
+            self.scan_store.put_http_cache(
+                url, response.headers.get('ETag'), response.headers.get('Last-Modified'), response.text
+            )
+        return response.json(), True
+    
     def get_latest_scan(self) -> Optional[Dict]:
         """Fetch the most recent scan with opportunities"""
         try:
-            response = requests.get(f"{SCANNER_API_BASE}/scans", timeout=30)
-            response.raise_for_status()
-            data = response.json()
+            data, list_modified = self.fetch_json(f"{SCANNER_API_BASE}/scans")
+            last_seen = self.scan_store.get_state('last_seen_scan_id') if self.incremental else None
             
             # Find most recent scan with opportunities
             scans = data.get('scans', [])
             for scan in scans:
                 if scan.get('total_opportunities', 0) > 0:
                     scan_id = scan['id']
-                    print(f"Found scan {scan_id} with {scan['total_opportunities']} opportunities")
+                    seen = last_seen is not None and str(scan_id) == last_seen
+                    print(f"Found scan {scan_id} with {scan['total_opportunities']} opportunities"
+                          f"{' (already seen)' if seen else ''}")
+                    
+                    # Fetch full scan details; a scan already seen with an unchanged
+                    # scan list is served straight from the store
+                    details_url = f"{SCANNER_API_BASE}/scans/{scan_id}"
+                    cached = self.scan_store.get_http_cache(details_url) if seen and not list_modified else None
+                    if cached:
+                        details = json.loads(cached[2])
+                    else:
+                        details, _ = self.fetch_json(details_url)
                     
-                    # Fetch full scan details
-                    details_response = requests.get(
-                        f"{SCANNER_API_BASE}/scans/{scan_id}",
-                        timeout=30
-                    )
-                    details_response.raise_for_status()
-                    return details_response.json()
+                    if self.incremental:
+                        self.scan_store.set_state('last_seen_scan_id', str(scan_id))
+                    return details
             
             print("No scans with opportunities found")
             return None
@@ -130,14 +395,15 @@ class FFScannerService:
         
         for opp in scan_data.get('opportunities', []):
             try:
+                # Tickers, signals and dates repeat across opportunities: share one string each
                 opportunity = Opportunity(
-                    ticker=opp['ticker'],
+                    ticker=sys.intern(opp['ticker']),
                     forward_factor=float(opp['forward_factor']),
-                    signal=opp['signal'],
-                    front_date=opp['front_date'],
+                    signal=sys.intern(opp['signal']),
+                    front_date=sys.intern(opp['front_date']),
                     front_dte=int(opp['front_dte']),
                     front_iv=float(opp['front_iv']),
-                    back_date=opp['back_date'],
+                    back_date=sys.intern(opp['back_date']),
                     back_dte=int(opp['back_dte']),
                     back_iv=float(opp['back_iv']),
                     forward_vol=float(opp['forward_vol']),
@@ -152,56 +418,256 @@ class FFScannerService:
         
         return opportunities
     
+    def analysis_fingerprint(self, opp: Opportunity, earnings_info: Optional[EarningsInfo]) -> str:
+        """Hash of an opportunity's data, its earnings info and the quality thresholds that judged it"""
+        settings = [MIN_FORWARD_FACTOR, MIN_DTE, MAX_DTE, MIN_IV, MAX_IV, MIN_PROBABILITY, MIN_RISK_REWARD,
+                    self.probability_model]
+        earnings = dataclasses.asdict(earnings_info) if earnings_info else None
+        payload = json.dumps([dataclasses.asdict(opp), earnings, settings], sort_keys=True)
+        return hashlib.sha1(payload.encode()).hexdigest()
+    
+    def load_stored_analyses(self, opportunities: List[Opportunity],
+                             earnings_infos: List[Optional[EarningsInfo]]) -> Dict[int, TradeAnalysis]:
+        """
+        Stored analyses of opportunities already analyzed with identical data
+        
+        An analysis made before the earnings date was found or moved does
+        not match, so it is redone.
+        
+        Args:
+            opportunities: Opportunities of this run
+            earnings_infos: Their current earnings info, in the same order
+        
+        Returns: Dict mapping opportunity_id to its stored TradeAnalysis
+        """
+        stored = self.scan_store.load_analyses([opp.opportunity_id for opp in opportunities])
+        
+        reused = {}
+        for opp, earnings_info in zip(opportunities, earnings_infos):
+            entry = stored.get(opp.opportunity_id)
+            if entry and entry[0] == self.analysis_fingerprint(opp, earnings_info):
+                reused[opp.opportunity_id] = analysis_from_dict(entry[1])
+        return reused
+    
+    def store_analyses(self, analyses: List[TradeAnalysis]):
+        """Persist analyses so later runs can skip their opportunities"""
+        self.scan_store.save_analyses([
+            (a.opportunity.opportunity_id, a.opportunity.scan_id,
+             self.analysis_fingerprint(a.opportunity, a.earnings_info), analysis_to_dict(a))
+            for a in analyses
+        ])
+    
+    def opportunities_from_results(self, results: List[Dict], scan_id: Optional[int] = None) -> List[Opportunity]:
+        """
+        Convert ForwardFactorScanner.scan_multiple results to opportunities
+        
+        Normalized to the hosted scan's units: expirations become YYYY-MM-DD
+        strings and IVs and forward vol become percent (the scanner passes
+        Polygon's decimal IV through, e.g. 0.30 for 30%).
+        
+        Args:
+            results: Scanner results (one dict per ticker with its pairs)
+            scan_id: ID for this scan (defaults to the current Unix time)
+        
+        Returns:
+            List of opportunities, numbered in scanner order
+        """
+        if scan_id is None:
+            scan_id = int(datetime.now().timestamp())
+        
+        opportunities = []
+        for result in results:
+            for pair in result['pairs']:
+                opportunities.append(Opportunity(
+                    ticker=sys.intern(result['ticker']),
+                    forward_factor=float(pair['forward_factor']),
+                    signal='SELL' if pair['forward_factor'] > 0 else 'BUY',
+                    front_date=sys.intern(pair['front_date'].isoformat()),
+                    front_dte=int(pair['front_dte']),
+                    front_iv=float(pair['front_iv']) * SCANNER_IV_SCALE,
+                    back_date=sys.intern(pair['back_date'].isoformat()),
+                    back_dte=int(pair['back_dte']),
+                    back_iv=float(pair['back_iv']) * SCANNER_IV_SCALE,
+                    forward_vol=float(pair['forward_vol']) * SCANNER_IV_SCALE,
+                    scan_id=scan_id,
+                    opportunity_id=len(opportunities) + 1
+                ))
+        
+        return opportunities
+    
+    def scan_local(self) -> List[Dict]:
+        """Run ForwardFactorScanner in-process and return its raw results"""
+        from ff_scanner import ForwardFactorScanner, DEFAULT_TICKERS
+        
+        if not POLYGON_API_KEY:
+            print("POLYGON_API_KEY not set; cannot run the local scanner")
+            return []
+        
+        if self._local_scanner is None:
+            self._local_scanner = ForwardFactorScanner(POLYGON_API_KEY, time_basis=self.time_basis)
+        return self._local_scanner.scan_multiple(self.tickers or DEFAULT_TICKERS)
+    
+    def load_opportunities(self, scanner_results: Optional[List[Dict]] = None) -> List[Opportunity]:
+        """
+        Get opportunities from the configured source
+        
+        Args:
+            scanner_results: ForwardFactorScanner results already produced in this
+                process; used directly instead of fetching anything
+        
+        Returns:
+            List of opportunities (empty if no scan data is available)
+        """
+        if scanner_results is not None:
+            return self.opportunities_from_results(scanner_results)
+        
+        if self.source == 'local':
+            print("Running local Forward Factor scan...")
+            return self.opportunities_from_results(self.scan_local())
+        
+        print("Fetching latest scan data...")
+        scan_data = self.get_latest_scan()
+        if not scan_data:
+            return []
+        return self.parse_opportunities(scan_data)
+    
+    def fetch_earnings_date(self, ticker: str) -> Optional[str]:
+        """
+        Fetch the next earnings date for a ticker through the earnings provider chain
+        
+        Returns: Earnings date in YYYY-MM-DD format or None
+        Raises: EarningsLookupError if every provider failed
+        """
+        return self.earnings_chain.get_earnings_date(ticker)
+    
+    def build_earnings_info(self, ticker: str, earnings_date: Optional[str],
+                            front_date: str, back_date: str) -> EarningsInfo:
+        """Position an earnings date relative to the front and back expirations"""
+        if not earnings_date:
+            return EarningsInfo(
+                ticker=ticker,
+                earnings_date=None,
+                has_earnings_soon=False,
+                front_is_pre_earnings=False,
+                back_is_post_earnings=False,
+                both_post_earnings=False
+            )
+        
+        # Parse dates
+        earnings_dt = datetime.strptime(earnings_date, '%Y-%m-%d')
+        front_dt = datetime.strptime(front_date, '%Y-%m-%d')
+        back_dt = datetime.strptime(back_date, '%Y-%m-%d')
+        
+        # Determine earnings positioning
+        front_is_pre = front_dt < earnings_dt
+        back_is_post = back_dt > earnings_dt
+        both_post = front_dt > earnings_dt and back_dt > earnings_dt
+        has_earnings_soon = abs((earnings_dt - datetime.now()).days) < 60
+        
+        return EarningsInfo(
+            ticker=ticker,
+            earnings_date=earnings_date,
+            has_earnings_soon=has_earnings_soon,
+            front_is_pre_earnings=front_is_pre,
+            back_is_post_earnings=back_is_post,
+            both_post_earnings=both_post
+        )
+    
     def get_earnings_info(self, ticker: str, front_date: str, back_date: str) -> Optional[EarningsInfo]:
         """Get earnings information for a ticker"""
-        if not self.polygon_client:
+        if not self.earnings_chain.providers:
             return None
         
         try:
-            # Get ticker details which includes next earnings date
-            ticker_details = self.polygon_client.get_ticker_details(ticker)
-            
-            # Try to get earnings date from results
-            earnings_date = None
-            if hasattr(ticker_details, 'results'):
-                results = ticker_details.results
-                if hasattr(results, 'next_earnings_date'):
-                    earnings_date = results.next_earnings_date
-            
-            if not earnings_date:
-                return EarningsInfo(
-                    ticker=ticker,
-                    earnings_date=None,
-                    has_earnings_soon=False,
-                    front_is_pre_earnings=False,
-                    back_is_post_earnings=False,
-                    both_post_earnings=False
-                )
-            
-            # Parse dates
-            earnings_dt = datetime.strptime(earnings_date, '%Y-%m-%d')
-            front_dt = datetime.strptime(front_date, '%Y-%m-%d')
-            back_dt = datetime.strptime(back_date, '%Y-%m-%d')
-            
-            # Determine earnings positioning
-            front_is_pre = front_dt < earnings_dt
-            back_is_post = back_dt > earnings_dt
-            both_post = front_dt > earnings_dt and back_dt > earnings_dt
-            has_earnings_soon = abs((earnings_dt - datetime.now()).days) < 60
-            
-            return EarningsInfo(
-                ticker=ticker,
-                earnings_date=earnings_date,
-                has_earnings_soon=has_earnings_soon,
-                front_is_pre_earnings=front_is_pre,
-                back_is_post_earnings=back_is_post,
-                both_post_earnings=both_post
-            )
+            earnings_date = self.fetch_earnings_date(ticker)
+            return self.build_earnings_info(ticker, earnings_date, front_date, back_date)
             
         except Exception as e:
             print(f"Error fetching earnings for {ticker}: {e}")
             return None
     
+    def prefetch_earnings(self, tickers: List[str], max_workers: int = EARNINGS_WORKERS) -> Dict[str, object]:
+        """
+        Fetch earnings dates once per ticker through a bounded worker pool
+        
+        Args:
+            tickers: Tickers to look up (duplicates are looked up once)
+            max_workers: Maximum concurrent lookups
+        
+        Returns:
+            Dict mapping ticker to its earnings date (str or None), or to the
+            exception raised by the lookup
+        """
+        unique_tickers = list(dict.fromkeys(tickers))
+        if not unique_tickers or not self.earnings_chain.providers:
+            return {}
+        
+        def lookup(ticker):
+            try:
+                return self.fetch_earnings_date(ticker)
+            except Exception as e:
+                print(f"Error fetching earnings for {ticker}: {e}")
+                return e
+        
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(unique_tickers))) as pool:
+            return dict(zip(unique_tickers, pool.map(lookup, unique_tickers)))
+    
+    def resolve_earnings_info(self, opp: Opportunity, earnings_dates: Dict[str, object]) -> Optional[EarningsInfo]:
+        """Build EarningsInfo for an opportunity from prefetched earnings dates"""
+        if opp.ticker not in earnings_dates:
+            return None
+        
+        earnings_date = earnings_dates[opp.ticker]
+        if isinstance(earnings_date, Exception):
+            return None
+        
+        try:
+            return self.build_earnings_info(opp.ticker, earnings_date, opp.front_date, opp.back_date)
+        except Exception as e:
+            print(f"Error fetching earnings for {opp.ticker}: {e}")
+            return None
+    
+    def earnings_from_index(self, opportunities: List[Opportunity], index) -> List[Optional[EarningsInfo]]:
+        """
+        Build EarningsInfo for all opportunities at once from a preloaded EarningsIndex
+        
+        Tickers outside the index universe get None (no earnings data).
+        """
+        if not opportunities:
+            return []
+        
+        positions = index.position(
+            [opp.ticker for opp in opportunities],
+            [opp.front_date for opp in opportunities],
+            [opp.back_date for opp in opportunities]
+        )
+        
+        infos = []
+        for i, opp in enumerate(opportunities):
+            if not index.covers(opp.ticker):
+                infos.append(None)
+                continue
+            
+            ordinal = int(positions['earnings_ordinal'][i])
+            infos.append(EarningsInfo(
+                ticker=opp.ticker,
+                earnings_date=datetime.fromordinal(ordinal).strftime('%Y-%m-%d') if ordinal > 0 else None,
+                has_earnings_soon=bool(positions['has_earnings_soon'][i]),
+                front_is_pre_earnings=bool(positions['front_is_pre_earnings'][i]),
+                back_is_post_earnings=bool(positions['back_is_post_earnings'][i]),
+                both_post_earnings=bool(positions['both_post_earnings'][i])
+            ))
+        
+        return infos
+    
+    def preload_earnings(self, opportunities: List[Opportunity]):
+        """Preload the earnings calendar for the universe through the last back expiration"""
+        from ff_earnings_index import preload_earnings_index
+        
+        tickers = list(dict.fromkeys(opp.ticker for opp in opportunities))
+        days_ahead = max((opp.back_dte for opp in opportunities), default=0) + 1
+        return preload_earnings_index(tickers, days_ahead=max(days_ahead, 90))
+    
     def verify_forward_factor(self, opp: Opportunity) -> Tuple[float, bool]:
         """Verify the Forward Factor calculation
         
@@ -281,130 +747,29 @@ class FFScannerService:
         else:
             return 2.0
     
-    def apply_quality_filters(self, opp: Opportunity, earnings_info: Optional[EarningsInfo]) -> Tuple[bool, List[str]]:
+    def apply_quality_filters(self, opp: Opportunity, earnings_info: Optional[EarningsInfo]) -> Tuple[bool, List[RejectionReason]]:
         """
         Apply strict quality filters to opportunity
         
-        Returns: (is_quality_setup, rejection_reasons)
+        Returns: (is_quality_setup, rejection_reasons) with typed reason codes
         """
-        rejection_reasons = []
-        
-        # Filter 1: Forward Factor magnitude
-        if abs(opp.forward_factor) < MIN_FORWARD_FACTOR:
-            rejection_reasons.append(f"Forward Factor too low: {opp.forward_factor:.1f}% (need >{MIN_FORWARD_FACTOR}%)")
-        
-        # Filter 2: DTE range
-        if opp.front_dte < MIN_DTE:
-            rejection_reasons.append(f"Front DTE too short: {opp.front_dte} days (need >{MIN_DTE})")
-        if opp.front_dte > MAX_DTE:
-            rejection_reasons.append(f"Front DTE too long: {opp.front_dte} days (need <{MAX_DTE})")
-        
-        # Filter 3: IV range
-        if opp.front_iv < MIN_IV:
-            rejection_reasons.append(f"Front IV too low: {opp.front_iv:.1f}% (need >{MIN_IV}%)")
-        if opp.front_iv > MAX_IV:
-            rejection_reasons.append(f"Front IV too high: {opp.front_iv:.1f}% (need <{MAX_IV}%)")
-        
-        # Filter 4: Catalyst validation
-        # Only reject if there's a known catalyst AND inverted structure
-        # Allow inverted structures if no catalyst (could be genuine mispricing)
-        if opp.has_earnings_soon and opp.is_inverted():
-            # Has earnings catalyst with inverted structure - be cautious
-            if abs(opp.forward_factor) < 40.0:
-                rejection_reasons.append(
-                    f"FALSE SIGNAL: Inverted term structure (front IV {opp.front_iv:.1f}% > back IV {opp.back_iv:.1f}%) "
-                    f"with earnings soon likely indicates post-earnings IV decay. "
-                    f"FF {opp.forward_factor:.1f}% not strong enough to override (need >40% with earnings catalyst)"
-                )
-        
-        # Filter 5: Verify calculation
-        calculated_ff, matches = self.verify_forward_factor(opp)
-        if not matches:
-            rejection_reasons.append(
-                f"Forward Factor calculation mismatch: "
-                f"reported {opp.forward_factor:.1f}%, calculated {calculated_ff:.1f}%"
-            )
-        
-        # Filter 6: DTE difference (need reasonable spread)
-        dte_diff = opp.get_dte_diff()
-        if dte_diff < 3:
-            rejection_reasons.append(f"DTE difference too small: {dte_diff} days (need >3)")
+        return self.quality_rules.evaluate([opp])[0]
+    
+    def apply_quality_filters_batch(self, opportunities: List[Opportunity]) -> List[Tuple[bool, List[RejectionReason]]]:
+        """
+        Apply strict quality filters to all opportunities at once
         
-        is_quality = len(rejection_reasons) == 0
-        return is_quality, rejection_reasons
+        Returns: (is_quality_setup, rejection_reasons) per opportunity with typed reason codes
+        """
+        return self.quality_rules.evaluate(opportunities)
     
     def generate_thesis(self, opp: Opportunity, earnings_info: Optional[EarningsInfo]) -> str:
         """Generate trading thesis for the opportunity"""
-        if opp.forward_factor > 0:
-            # Positive FF: Front is overpriced
-            direction = "SELL FRONT / BUY BACK"
-            explanation = (
-                f"Front contract IV ({opp.front_iv:.1f}%) is significantly elevated compared to "
-                f"the implied forward volatility ({opp.forward_vol:.1f}%). This {opp.forward_factor:.1f}% "
-                f"premium suggests the front contract is overpriced relative to the back contract "
-                f"({opp.back_iv:.1f}% IV)."
-            )
-        else:
-            # Negative FF: Front is underpriced
-            direction = "BUY FRONT / SELL BACK"
-            explanation = (
-                f"Front contract IV ({opp.front_iv:.1f}%) is significantly depressed compared to "
-                f"the implied forward volatility ({opp.forward_vol:.1f}%). This {abs(opp.forward_factor):.1f}% "
-                f"discount suggests the front contract is underpriced relative to the back contract "
-                f"({opp.back_iv:.1f}% IV)."
-            )
-        
-        # Add catalyst information
-        catalyst_info = ""
-        if earnings_info and earnings_info.earnings_date:
-            catalyst_info = (
-                f"\n\nCATALYST: Earnings on {earnings_info.earnings_date}. "
-            )
-            if earnings_info.front_is_pre_earnings and earnings_info.back_is_post_earnings:
-                catalyst_info += (
-                    "Front expires before earnings, back expires after. "
-                    "This creates a natural volatility term structure around the event."
-                )
-            elif earnings_info.both_post_earnings:
-                catalyst_info += (
-                    "Both contracts expire after earnings. "
-                    "IV differential may reflect post-earnings volatility decay."
-                )
-        else:
-            # Use has_earnings_soon flag from scanner
-            if opp.has_earnings_soon:
-                catalyst_info = (
-                    "\n\n⚠️ CATALYST: Earnings expected soon (per scanner data). "
-                    "This volatility mispricing may be event-driven. Verify earnings date manually before trading."
-                )
-            else:
-                catalyst_info = (
-                    "\n\n✓ NO IMMINENT CATALYST: No earnings expected soon per scanner data. "
-                    "However, always verify earnings calendar manually before trading."
-                )
-        
-        return f"{direction}\n\n{explanation}{catalyst_info}"
+        return render_thesis(opp, earnings_info)
     
     def generate_trade_structure(self, opp: Opportunity) -> str:
         """Generate recommended trade structure"""
-        if opp.forward_factor > 0:
-            # Sell front, buy back
-            return (
-                f"**Calendar Spread (Credit)**\n"
-                f"- Sell {opp.ticker} {opp.front_date} ATM straddle/strangle\n"
-                f"- Buy {opp.ticker} {opp.back_date} ATM straddle/strangle\n"
-                f"- Net credit from elevated front IV\n"
-                f"- Profit from front IV decay and/or time decay"
-            )
-        else:
-            # Buy front, sell back
-            return (
-                f"**Reverse Calendar Spread (Debit)**\n"
-                f"- Buy {opp.ticker} {opp.front_date} ATM straddle/strangle\n"
-                f"- Sell {opp.ticker} {opp.back_date} ATM straddle/strangle\n"
-                f"- Net debit to capture underpriced front IV\n"
-                f"- Profit from front IV expansion"
-            )
+        return render_trade_structure(opp)
     
     def calculate_rating(self, opp: Opportunity, earnings_info: Optional[EarningsInfo], 
                         probability: float, risk_reward: float) -> int:
@@ -448,37 +813,73 @@ class FFScannerService:
         # Get earnings information
         earnings_info = self.get_earnings_info(opp.ticker, opp.front_date, opp.back_date)
         
-        # Apply quality filters
-        is_quality, rejection_reasons = self.apply_quality_filters(opp, earnings_info)
+        return self.analyze_with_earnings(opp, earnings_info)
+    
+    def analyze_with_earnings(self, opp: Opportunity, earnings_info: Optional[EarningsInfo],
+                              filter_result: Optional[Tuple[bool, List[RejectionReason]]] = None,
+                              simulation: Optional[SimulationResult] = None) -> TradeAnalysis:
+        """
+        Run the CPU-only part of the analysis (filters, metrics, rating) given earnings info
         
-        # Calculate metrics
-        probability = self.calculate_probability(opp)
-        risk_reward = self.calculate_risk_reward(opp)
+        Args:
+            opp: Opportunity to analyze
+            earnings_info: Its earnings info
+            filter_result: Quality filter result already evaluated for the
+                whole batch (None evaluates it, and simulates a quality setup)
+            simulation: Batch simulation result; with a filter_result, None
+                means the lookup model's probability and risk/reward
+        """
+        # Apply quality filters (unless already evaluated for the whole batch).
+        # Only quality setups are simulated: rejected ones are never traded.
+        if filter_result is None:
+            filter_result = self.apply_quality_filters(opp, earnings_info)
+            if filter_result[0] and self.monte_carlo is not None:
+                simulation = self.monte_carlo.simulate([opp])[0]
+        is_quality, rejection_codes = filter_result
         
-        # Generate thesis and trade structure
-        thesis = self.generate_thesis(opp, earnings_info)
-        trade_structure = self.generate_trade_structure(opp)
+        # Calculate metrics (lookup model unless simulated)
+        if simulation is not None:
+            probability = simulation.probability_of_profit * 100
+            risk_reward = simulation.risk_reward
+        else:
+            probability = self.calculate_probability(opp)
+            risk_reward = self.calculate_risk_reward(opp)
         
         # Calculate rating
         rating = self.calculate_rating(opp, earnings_info, probability, risk_reward)
         
+        # Thesis, trade structure and reason text are rendered lazily on access
         return TradeAnalysis(
             opportunity=opp,
             earnings_info=earnings_info,
             is_quality_setup=is_quality,
-            rejection_reasons=rejection_reasons,
             probability=probability,
             risk_reward=risk_reward,
             rating=rating,
-            thesis=thesis,
-            trade_structure=trade_structure
+            rejection_codes=rejection_codes,
+            expected_pnl=simulation.expected_pnl if simulation else None,
+            max_loss=simulation.max_loss if simulation else None
         )
     
-    def run_analysis(self) -> Tuple[List[TradeAnalysis], List[TradeAnalysis]]:
+    def run_analysis(self, scanner_results: Optional[List[Dict]] = None,
+                     journal=None, report=None, history=None) -> Tuple[List[TradeAnalysis], List[TradeAnalysis]]:
         """
         Run complete analysis pipeline
         
-        Returns: (quality_setups, rejected_setups)
+        Args:
+            scanner_results: ForwardFactorScanner results to analyze directly
+                (defaults to loading from the configured source)
+            journal: RunJournal to checkpoint into; if it already holds this
+                run's opportunities, the scan fetch and every journaled
+                analysis are skipped
+            report: Report writer (e.g. ff_report_generator.ReportWriter)
+                given each analysis as soon as it is made
+            history: Scan history recorder (e.g. ff_scan_store.ScanRecorder)
+                given each analysis as soon as it is made
+        
+        Returns: (quality_setups, rejected_setups); rejected_setups stays
+            empty when a report writer is given, since the writer tallies
+            the rejections
         """
         print("=" * 80)
         print("FORWARD FACTOR NIGHTLY SCANNER")
@@ -486,42 +887,126 @@ class FFScannerService:
         print(f"Run Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print()
         
-        # Fetch latest scan
-        print("Fetching latest scan data...")
-        scan_data = self.get_latest_scan()
+        # Load opportunities (journal of an interrupted run, hosted scan, local scan, or results passed in)
+        if journal is not None and journal.opportunities is not None:
+            from_scanner = journal.from_scanner
+            opportunities = [Opportunity(**opp) for opp in journal.opportunities]
+            print(f"Resuming from journal {journal.path}: "
+                  f"{len(journal.analyses)}/{len(opportunities)} analyses already done")
+        else:
+            from_scanner = scanner_results is not None or self.source == 'local'
+            opportunities = self.load_opportunities(scanner_results)
+            if journal is not None and opportunities:
+                journal.record_opportunities(opportunities[0].scan_id,
+                                             [dataclasses.asdict(opp) for opp in opportunities], from_scanner)
         
-        if not scan_data:
+        if not opportunities:
             print("No scan data available")
             return [], []
         
-        # Parse opportunities
-        opportunities = self.parse_opportunities(scan_data)
         print(f"Found {len(opportunities)} opportunities to analyze")
+        
+        # Analyses checkpointed before an interruption
+        reused = {}
+        if journal is not None:
+            for opportunity_id, data in journal.analyses.items():
+                reused[opportunity_id] = analysis_from_dict(data)
+        pending = [opp for opp in opportunities if opp.opportunity_id not in reused]
         print()
         
+        # Fetch earnings: one bulk calendar for everything, or once per ticker
+        # concurrently. Stored analyses are only reused if their earnings
+        # info still matches, so this covers them too.
+        tickers = [opp.ticker for opp in pending]
+        if not pending:
+            earnings_infos = []
+        elif self.bulk_earnings:
+            print(f"Preloading earnings calendar for {len(set(tickers))} tickers...")
+            earnings_infos = self.earnings_from_index(pending, self.preload_earnings(pending))
+        else:
+            print(f"Fetching earnings for {len(set(tickers))} tickers...")
+            earnings_dates = self.prefetch_earnings(tickers)
+            earnings_infos = [self.resolve_earnings_info(opp, earnings_dates) for opp in pending]
+        print()
+        
+        # The hosted scanner flags upcoming earnings itself; for our own scans
+        # the flag comes from the earnings lookup
+        if from_scanner:
+            pending = [
+                dataclasses.replace(opp, has_earnings_soon=info.has_earnings_soon) if info else opp
+                for opp, info in zip(pending, earnings_infos)
+            ]
+        
+        # Opportunities already analyzed with the same data and earnings
+        # (hosted scans only: local opportunity ids are numbered per run)
+        if self.incremental and not from_scanner and pending:
+            stored = self.load_stored_analyses(pending, earnings_infos)
+            if stored:
+                print(f"Reusing {len(stored)} stored analyses")
+                print()
+                reused.update(stored)
+                keep = [i for i, opp in enumerate(pending) if opp.opportunity_id not in stored]
+                pending = [pending[i] for i in keep]
+                earnings_infos = [earnings_infos[i] for i in keep]
+        
+        # Filter every new opportunity in one pass over column arrays
+        filter_results = self.apply_quality_filters_batch(pending)
+        
+        # Simulate the spreads of the new quality setups in one batch (rejected
+        # ones are never traded and keep the lookup model's numbers)
+        simulations = [None] * len(pending)
+        passed = [i for i, (is_quality, _) in enumerate(filter_results) if is_quality]
+        if self.monte_carlo is not None and passed:
+            print(f"Simulating {len(passed)} spreads ({self.monte_carlo.paths:,} paths each)...")
+            for i, simulation in zip(passed, self.monte_carlo.simulate([pending[i] for i in passed])):
+                simulations[i] = simulation
+        fresh = iter(zip(pending, earnings_infos, filter_results, simulations))
+        
         # Analyze each opportunity
         quality_setups = []
         rejected_setups = []
+        rejected = 0
+        new_analyses = []
         
         for i, opp in enumerate(opportunities, 1):
             print(f"Analyzing {i}/{len(opportunities)}: {opp.ticker} (FF: {opp.forward_factor:+.1f}%)")
-            analysis = self.analyze_opportunity(opp)
+            if opp.opportunity_id in reused:
+                analysis = reused[opp.opportunity_id]
+            else:
+                analysis = self.analyze_with_earnings(*next(fresh))
+                new_analyses.append(analysis)
+                if journal is not None:
+                    journal.record_analysis(analysis_to_dict(analysis))
+            if report is not None:
+                report.add(analysis)
+            if history is not None:
+                history.add(analysis)
             
             if analysis.is_quality_setup:
                 quality_setups.append(analysis)
                 print(f"  ✓ QUALITY SETUP - Rating: {analysis.rating}/10")
             else:
-                rejected_setups.append(analysis)
+                rejected += 1
+                if report is None:
+                    rejected_setups.append(analysis)
                 print(f"  ✗ REJECTED: {analysis.rejection_reasons[0]}")
             print()
         
+        if self.incremental and not from_scanner and new_analyses:
+            self.store_analyses(new_analyses)
+        
         # Sort quality setups by rating
         quality_setups.sort(key=lambda x: x.rating, reverse=True)
         
         print("=" * 80)
         print(f"ANALYSIS COMPLETE")
         print(f"Quality Setups: {len(quality_setups)}")
-        print(f"Rejected: {len(rejected_setups)}")
+        print(f"Rejected: {rejected}")
+        if not self.bulk_earnings:
+            for name, stats in self.earnings_chain.stats_summary().items():
+                if stats['calls']:
+                    print(f"Earnings [{name}]: {stats['calls']} calls, {stats['wins']} answers, "
+                          f"{stats['failures']} failures, {stats['hedges']} hedged, p95 {stats['p95'] * 1000:.0f}ms")
         print("=" * 80)
         
         return quality_setups, rejected_setups
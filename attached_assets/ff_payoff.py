@@ -0,0 +1,125 @@
+#!/usr/bin/env python3.11
+"""
+Forward Factor Payoff Grid
+
+P&L surfaces of the recommended ATM straddle calendar spread (reverse
+calendar when FF < 0) over a grid of spot prices and dates. A whole batch
+of opportunities is priced in one broadcast: opportunities x dates x spots.
+
+As in the web app's payoff diagram, spots span 50%-150% of the strike,
+dates run from entry to front expiration, and each leg is repriced with
+Black-Scholes at its own entry IV. At front expiration the front leg is
+worth its intrinsic value. Break-evens, max gain and max loss are read off
+the front expiration curve. P&L is in percent of the strike (the ATM spot
+price at entry).
+"""
+
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+from ff_black_scholes import straddle_price
+from ff_montecarlo import simulation_columns
+
+# Grid configuration
+SPOT_RANGE = (0.5, 1.5)  # Spot as a fraction of the strike
+SPOT_POINTS = 201
+DATE_FRACTIONS = (0.0, 0.25, 0.5, 0.75, 1.0)  # Elapsed fraction of the front leg's life
+
+
+@dataclass(frozen=True, slots=True)
+class PayoffSummary:
+    """Front-expiration payoff of an opportunity's spread (P&L in % of strike)"""
+    entry_cost: float  # Net debit paid (negative for a net credit)
+    max_gain: float  # Best P&L on the grid
+    max_loss: float  # Worst loss on the grid (>= 0)
+    lower_breakeven: Optional[float]  # Spot / strike where P&L crosses zero below the strike
+    upper_breakeven: Optional[float]  # Spot / strike where P&L crosses zero above the strike
+
+
+def spot_grid(points: int = SPOT_POINTS, spot_range=SPOT_RANGE) -> np.ndarray:
+    """Spot prices as fractions of the strike (always includes the strike itself when points is odd)"""
+    return np.linspace(spot_range[0], spot_range[1], points)
+
+
+def payoff_surface(columns: Dict[str, np.ndarray], spots: Optional[np.ndarray] = None,
+                   date_fractions: Sequence[float] = DATE_FRACTIONS) -> np.ndarray:
+    """
+    P&L of each spread over spots and dates
+    
+    Args:
+        columns: Output of ff_montecarlo.simulation_columns
+        spots: Spot / strike grid (defaults to spot_grid())
+        date_fractions: Elapsed fractions of the front leg's life (1 = front expiration)
+    
+    Returns:
+        Array of shape (opportunities, dates, spots), P&L in % of strike
+    """
+    spots = spot_grid() if spots is None else np.asarray(spots, dtype=np.float64)
+    fractions = np.asarray(date_fractions, dtype=np.float64)
+    
+    direction = columns['direction'][:, None, None]
+    t1 = columns['front_years'][:, None, None]
+    t2 = columns['back_years'][:, None, None]
+    front_vol = columns['front_vol'][:, None, None]
+    back_vol = columns['back_vol'][:, None, None]
+    elapsed = fractions[None, :, None] * t1
+    spot = spots[None, None, :]
+    
+    entry = straddle_price(1.0, back_vol, t2) - straddle_price(1.0, front_vol, t1)
+    value = straddle_price(spot, back_vol, t2 - elapsed) - straddle_price(spot, front_vol, t1 - elapsed)
+    return direction * (value - entry) * 100
+
+
+def breakevens(spots: np.ndarray, pnl: np.ndarray):
+    """
+    Zero crossings of P&L curves nearest the strike
+    
+    Args:
+        spots: Spot / strike grid (ascending)
+        pnl: P&L curves, shape (opportunities, spots)
+    
+    Returns:
+        (lower, upper) arrays, NaN where the curve does not cross on that side
+    """
+    s0, s1 = spots[:-1], spots[1:]
+    p0, p1 = pnl[:, :-1], pnl[:, 1:]
+    crosses = (np.sign(p0) != np.sign(p1)) & (p0 != p1)
+    
+    # Linear interpolation between the grid points around each crossing
+    with np.errstate(divide='ignore', invalid='ignore'):
+        at = np.where(crosses, s0 - p0 * (s1 - s0) / (p1 - p0), np.nan)
+    
+    below = np.where(at <= 1.0, at, -np.inf).max(axis=1)
+    above = np.where(at > 1.0, at, np.inf).min(axis=1)
+    return np.where(np.isfinite(below), below, np.nan), np.where(np.isfinite(above), above, np.nan)
+
+
+def summarize_payoffs(opportunities: Sequence, spots: Optional[np.ndarray] = None) -> List[PayoffSummary]:
+    """
+    Break-evens, max gain and max loss of every opportunity's spread
+    
+    Args:
+        opportunities: Objects with the Opportunity fields
+        spots: Spot / strike grid (defaults to spot_grid())
+    
+    Returns:
+        PayoffSummary per opportunity, in order
+    """
+    if not opportunities:
+        return []
+    
+    spots = spot_grid() if spots is None else np.asarray(spots, dtype=np.float64)
+    columns = simulation_columns(opportunities)
+    expiration = payoff_surface(columns, spots, (1.0,))[:, 0, :]
+    
+    entry_cost = columns['direction'] * (straddle_price(1.0, columns['back_vol'], columns['back_years'])
+                                         - straddle_price(1.0, columns['front_vol'], columns['front_years'])) * 100
+    lower, upper = breakevens(spots, expiration)
+    
+    return [
+        PayoffSummary(cost, gain, max(-worst, 0.0),
+                      None if np.isnan(lo) else lo, None if np.isnan(hi) else hi)
+        for cost, gain, worst, lo, hi in zip(entry_cost.tolist(), expiration.max(axis=1).tolist(),
+                                             expiration.min(axis=1).tolist(), lower.tolist(), upper.tolist())
+    ]
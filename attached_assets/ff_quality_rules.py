@@ -0,0 +1,222 @@
+#!/usr/bin/env python3.11
+"""
+Forward Factor Quality Rules
+
+Declarative quality filters for scanner opportunities. Each rule has a
+reason code and a vectorized check over column arrays, so a whole scan is
+filtered at once instead of one opportunity at a time. Every rule runs over
+every row, since reports and the scan history need all of an opportunity's
+reasons, not just the first.
+
+Rejections are typed RejectionReason codes with parameters, so reports and
+history queries can count them directly; the English message is rendered
+from a template only when needed. Reasons are reported in rule declaration
+order, matching the original hand-written filter chain.
+"""
+
+import numpy as np
+from dataclasses import dataclass, field
+from operator import attrgetter
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Reason code -> message template (filled from RejectionReason.params)
+REASON_TEMPLATES = {
+    'FF_TOO_LOW': "Forward Factor too low: {forward_factor:.1f}% (need >{min_forward_factor}%)",
+    'FRONT_DTE_TOO_SHORT': "Front DTE too short: {front_dte} days (need >{min_dte})",
+    'FRONT_DTE_TOO_LONG': "Front DTE too long: {front_dte} days (need <{max_dte})",
+    'FRONT_IV_TOO_LOW': "Front IV too low: {front_iv:.1f}% (need >{min_iv}%)",
+    'FRONT_IV_TOO_HIGH': "Front IV too high: {front_iv:.1f}% (need <{max_iv}%)",
+    'INVERTED_WITH_EARNINGS': (
+        "FALSE SIGNAL: Inverted term structure (front IV {front_iv:.1f}% > back IV {back_iv:.1f}%) "
+        "with earnings soon likely indicates post-earnings IV decay. "
+        "FF {forward_factor:.1f}% not strong enough to override (need >{min_forward_factor:.0f}% with earnings catalyst)"
+    ),
+    'FF_MISMATCH': "Forward Factor calculation mismatch: reported {forward_factor:.1f}%, calculated {calculated_ff:.1f}%",
+    'DTE_DIFF_TOO_SMALL': "DTE difference too small: {dte_diff} days (need >{min_dte_diff})",
+}
+
+# Reason code -> report category
+REASON_CATEGORIES = {
+    'INVERTED_WITH_EARNINGS': 'Inverted Term Structure',
+    'FRONT_DTE_TOO_SHORT': 'DTE Out of Range',
+    'FRONT_DTE_TOO_LONG': 'DTE Out of Range',
+    'DTE_DIFF_TOO_SMALL': 'DTE Out of Range',
+    'FF_MISMATCH': 'Calculation Mismatch',
+    'FF_TOO_LOW': 'Forward Factor Too Low',
+    'FRONT_IV_TOO_LOW': 'IV Out of Range',
+    'FRONT_IV_TOO_HIGH': 'IV Out of Range',
+}
+
+
+@dataclass(frozen=True)
+class RejectionReason:
+    """Why an opportunity failed a quality rule: a reason code plus its parameters"""
+    code: str  # Key into REASON_TEMPLATES / REASON_CATEGORIES
+    params: Dict[str, object] = field(default_factory=dict, hash=False)
+    
+    @property
+    def message(self) -> str:
+        """Human-readable reason"""
+        template = REASON_TEMPLATES.get(self.code)
+        return template.format(**self.params) if template else self.code
+    
+    @property
+    def category(self) -> str:
+        """Report category"""
+        return REASON_CATEGORIES.get(self.code, 'Other')
+    
+    def __str__(self) -> str:
+        return self.message
+
+
+@dataclass(frozen=True)
+class QualityRule:
+    """A single quality filter"""
+    code: str  # Reason code emitted on rejection
+    fails: Callable[[Dict[str, np.ndarray]], np.ndarray]  # columns -> bool mask of rejected rows
+    params: Callable[[object], Dict[str, object]]  # opportunity -> reason parameters
+    
+    def reject(self, opp) -> RejectionReason:
+        """Rejection reason for an opportunity that failed this rule"""
+        return RejectionReason(self.code, self.params(opp))
+
+
+def opportunity_columns(opportunities: Sequence) -> Dict[str, np.ndarray]:
+    """
+    Convert opportunities to column arrays
+    
+    Args:
+        opportunities: Objects with the Opportunity fields
+    
+    Returns:
+        Dict mapping field name to array (one row per opportunity)
+    """
+    fields = ('forward_factor', 'front_dte', 'back_dte', 'front_iv', 'back_iv', 'forward_vol', 'has_earnings_soon')
+    # One pass over the objects, then split the matrix into typed columns
+    rows = np.array([attrgetter(*fields)(o) for o in opportunities], dtype=np.float64).reshape(-1, len(fields))
+    columns = {name: rows[:, j] for j, name in enumerate(fields)}
+    for name in ('front_dte', 'back_dte'):
+        columns[name] = columns[name].astype(np.int64)
+    columns['has_earnings_soon'] = columns['has_earnings_soon'].astype(bool)
+    
+    # FF = (Front IV / Forward Vol) - 1, reported as 0 when forward vol is missing
+    with np.errstate(divide='ignore', invalid='ignore'):
+        calculated = (columns['front_iv'] / columns['forward_vol'] - 1) * 100
+    columns['calculated_ff'] = np.where(columns['forward_vol'] == 0, 0.0, calculated)
+    
+    return columns
+
+
+def calculated_ff(opp) -> float:
+    """Forward Factor recalculated from the scanner's forward vol (0 when missing)"""
+    return ((opp.front_iv / opp.forward_vol) - 1) * 100 if opp.forward_vol != 0 else 0.0
+
+
+def build_quality_rules(min_forward_factor: float, min_dte: int, max_dte: int, min_iv: float, max_iv: float,
+                        inverted_earnings_min_ff: float = 40.0, ff_tolerance: float = 2.0,
+                        min_dte_diff: int = 3) -> List[QualityRule]:
+    """
+    Build the standard quality rules
+    
+    Args:
+        min_forward_factor: Minimum |FF| to consider
+        min_dte: Minimum front days to expiration
+        max_dte: Maximum front days to expiration
+        min_iv: Minimum front implied volatility
+        max_iv: Maximum front implied volatility
+        inverted_earnings_min_ff: |FF| needed to accept an inverted structure with earnings soon
+        ff_tolerance: Allowed difference between reported and recalculated FF
+        min_dte_diff: Minimum back - front DTE
+    
+    Returns:
+        Rules in reporting order
+    """
+    return [
+        # Forward Factor magnitude
+        QualityRule(
+            'FF_TOO_LOW',
+            lambda c: np.abs(c['forward_factor']) < min_forward_factor,
+            lambda o: {'forward_factor': o.forward_factor, 'min_forward_factor': min_forward_factor}
+        ),
+        # DTE range
+        QualityRule(
+            'FRONT_DTE_TOO_SHORT',
+            lambda c: c['front_dte'] < min_dte,
+            lambda o: {'front_dte': o.front_dte, 'min_dte': min_dte}
+        ),
+        QualityRule(
+            'FRONT_DTE_TOO_LONG',
+            lambda c: c['front_dte'] > max_dte,
+            lambda o: {'front_dte': o.front_dte, 'max_dte': max_dte}
+        ),
+        # IV range
+        QualityRule(
+            'FRONT_IV_TOO_LOW',
+            lambda c: c['front_iv'] < min_iv,
+            lambda o: {'front_iv': o.front_iv, 'min_iv': min_iv}
+        ),
+        QualityRule(
+            'FRONT_IV_TOO_HIGH',
+            lambda c: c['front_iv'] > max_iv,
+            lambda o: {'front_iv': o.front_iv, 'max_iv': max_iv}
+        ),
+        # Catalyst validation: inverted structure with earnings soon is likely
+        # post-earnings IV decay unless the FF is strong enough to override
+        QualityRule(
+            'INVERTED_WITH_EARNINGS',
+            lambda c: (c['has_earnings_soon'] & (c['front_iv'] > c['back_iv'])
+                       & (np.abs(c['forward_factor']) < inverted_earnings_min_ff)),
+            lambda o: {'front_iv': o.front_iv, 'back_iv': o.back_iv, 'forward_factor': o.forward_factor,
+                       'min_forward_factor': inverted_earnings_min_ff}
+        ),
+        # Verify calculation
+        QualityRule(
+            'FF_MISMATCH',
+            lambda c: ~((c['forward_vol'] != 0) & (np.abs(c['calculated_ff'] - c['forward_factor']) < ff_tolerance)),
+            lambda o: {'forward_factor': o.forward_factor, 'calculated_ff': calculated_ff(o)}
+        ),
+        # DTE difference (need reasonable spread)
+        QualityRule(
+            'DTE_DIFF_TOO_SMALL',
+            lambda c: (c['back_dte'] - c['front_dte']) < min_dte_diff,
+            lambda o: {'dte_diff': o.back_dte - o.front_dte, 'min_dte_diff': min_dte_diff}
+        ),
+    ]
+
+
+class QualityRuleEngine:
+    """Evaluates quality rules over a batch of opportunities"""
+    
+    def __init__(self, rules: List[QualityRule]):
+        """
+        Args:
+            rules: Rules in reporting order
+        """
+        self.rules = list(rules)
+    
+    def evaluate(self, opportunities: Sequence) -> List[Tuple[bool, List[RejectionReason]]]:
+        """
+        Apply every rule to every opportunity
+        
+        Args:
+            opportunities: Opportunities to filter
+        
+        Returns:
+            (is_quality_setup, rejection_reasons) per opportunity
+        """
+        if not opportunities:
+            return []
+        
+        columns = opportunity_columns(opportunities)
+        
+        # Reasons need every rule's verdict, so each rule runs once over all rows
+        failures = {rule.code: np.asarray(rule.fails(columns), dtype=bool) for rule in self.rules}
+        
+        # Collect failures rule by rule in reporting order, so each row's
+        # reasons come out in the same order as the original filter chain
+        reasons: List[List[RejectionReason]] = [[] for _ in opportunities]
+        for rule in self.rules:
+            for i in np.flatnonzero(failures[rule.code]).tolist():
+                reasons[i].append(rule.reject(opportunities[i]))
+        
+        return [(not row, row) for row in reasons]
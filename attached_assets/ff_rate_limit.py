@@ -0,0 +1,183 @@
+#!/usr/bin/env python3.11
+"""
+Forward Factor Rate Limiter
+
+Token bucket shared by every thread in the process and, through a lock file,
+by every process on the machine (nightly run, web app, ad-hoc scans), so
+together they stay within a provider's quota (e.g. Finnhub: 60 calls/minute).
+
+Each caller reserves the next token; if the bucket is empty it waits outside
+the lock until its slot comes. Waits are served in arrival order, and each
+wait is recorded for the queue-time metrics.
+"""
+
+import os
+import json
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows: fall back to per-process limiting
+    fcntl = None
+
+# Configuration
+STATE_DIR = os.environ.get('FF_CACHE_DIR', os.path.expanduser('~/.cache/ff_scanner'))
+WAIT_WINDOW = 1000  # Recent waits kept for percentiles
+
+# Provider quotas: name -> (calls, per seconds)
+PROVIDER_LIMITS = {
+    'finnhub': (60, 60.0),
+    'polygon': (2, 1.0),  # Options chain snapshots (scanner, web app lookups)
+}
+
+
+class RateLimiter:
+    """Token bucket rate limiter, optionally shared across processes"""
+    
+    def __init__(self, rate: float, per: float = 1.0, capacity: Optional[float] = None,
+                 state_path: Optional[str] = None):
+        """
+        Args:
+            rate: Calls allowed per `per` seconds
+            per: Length of the rate period in seconds
+            capacity: Bucket size (max burst), defaults to one call so calls
+                are spaced evenly
+            state_path: Lock/state file shared between processes (None keeps
+                the bucket private to this process)
+        """
+        self.rate = rate / per  # Tokens per second
+        self.capacity = capacity if capacity is not None else 1.0
+        self.state_path = state_path if fcntl is not None else None
+        if self.state_path:
+            os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated = time.time()
+        
+        self.waits = deque(maxlen=WAIT_WINDOW)
+        self._thread = threading.local()  # Per-thread total wait (see thread_wait)
+        self.acquired = 0
+        self.delayed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+    
+    def _reserve(self, now: float, tokens: float, updated: float):
+        """Refill, take one token and return (new tokens, seconds to wait)"""
+        tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+        tokens -= 1
+        # A negative balance is the queue ahead of us
+        return tokens, (-tokens / self.rate if tokens < 0 else 0.0)
+    
+    def _reserve_shared(self, now: float) -> float:
+        """Reserve a token in the lock file shared with other processes"""
+        with open(self.state_path, 'a+') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    state = json.loads(f.read() or '{}')
+                except ValueError:
+                    state = {}
+                tokens, wait = self._reserve(now, state.get('tokens', self.capacity),
+                                             state.get('updated', now))
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps({'tokens': tokens, 'updated': now}))
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        return wait
+    
+    def acquire(self) -> float:
+        """
+        Block until a call is allowed
+        
+        Returns:
+            Seconds spent waiting
+        """
+        with self._lock:
+            now = time.time()
+            if self.state_path:
+                wait = self._reserve_shared(now)
+            else:
+                self._tokens, wait = self._reserve(now, self._tokens, self._updated)
+                self._updated = now
+        
+        if wait > 0:
+            time.sleep(wait)
+        self._thread.wait = self.thread_wait() + wait
+        
+        with self._lock:
+            self.acquired += 1
+            self.waits.append(wait)
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            if wait > 0:
+                self.delayed += 1
+        
+        return wait
+    
+    def thread_wait(self) -> float:
+        """Seconds the calling thread has waited on this limiter so far (to time calls without queue wait)"""
+        return getattr(self._thread, 'wait', 0.0)
+    
+    def wrap(self, func: Callable) -> Callable:
+        """Wrap a function so every call first acquires a token"""
+        def limited(*args, **kwargs):
+            self.acquire()
+            return func(*args, **kwargs)
+        limited.__name__ = getattr(func, '__name__', 'limited')
+        limited.__doc__ = getattr(func, '__doc__', None)
+        return limited
+    
+    def stats(self) -> Dict[str, float]:
+        """Queue wait time metrics for this process"""
+        with self._lock:
+            ordered = sorted(self.waits)
+        
+        def percentile(pct):
+            return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))] if ordered else 0.0
+        
+        return {
+            'acquired': self.acquired,
+            'delayed': self.delayed,
+            'total_wait': self.total_wait,
+            'mean_wait': self.total_wait / self.acquired if self.acquired else 0.0,
+            'p95_wait': percentile(95),
+            'max_wait': self.max_wait,
+        }
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str, rate: Optional[float] = None, per: Optional[float] = None,
+                     shared: bool = True) -> RateLimiter:
+    """
+    Process-wide rate limiter for a provider
+    
+    Args:
+        name: Provider name (quota looked up in PROVIDER_LIMITS if rate is not given)
+        rate: Calls allowed per `per` seconds
+        per: Length of the rate period in seconds
+        shared: Share the bucket with other processes via a lock file in STATE_DIR
+    
+    Returns:
+        RateLimiter (the same instance for every caller using this name)
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            default_rate, default_per = PROVIDER_LIMITS.get(name, (None, 1.0))
+            rate = rate if rate is not None else default_rate
+            if rate is None:
+                raise ValueError(f"No rate limit configured for {name}")
+            state_path = os.path.join(STATE_DIR, f'ratelimit-{name}.json') if shared else None
+            limiter = RateLimiter(rate, per or default_per, state_path=state_path)
+            _limiters[name] = limiter
+        return limiter
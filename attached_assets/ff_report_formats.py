@@ -0,0 +1,540 @@
+#!/usr/bin/env python3.11
+"""
+Forward Factor Report Formats
+
+Renders one ReportModel to markdown, JSON and HTML. The JSON form is the
+model itself (every analysis, payoff and rejection tally), so the web app
+or an email job can rebuild the model and render any format from it
+without re-running the analysis.
+
+Formats are rendered concurrently, each to its own sink. ReportCache keeps
+renderings per scan id, in memory and under FF_CACHE_DIR/reports, so
+repeated requests for the same scan and format are served without
+rendering again. Separately it keeps the models of the last two close runs
+(of different scans), the baseline the night-over-night changes report
+(markdown or JSON) is diffed against. Only the newest stored scans (and the
+baseline scans) keep their files, since daemon runs store one per run.
+"""
+
+import os
+import re
+import html
+import json
+import dataclasses
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, TextIO
+
+from ff_nightly_scanner import Opportunity, analysis_from_dict, analysis_to_dict
+from ff_payoff import PayoffSummary
+from ff_report_generator import (REJECTION_CATEGORIES, REJECTION_EXAMPLES, RejectionTally, ReportDiff,
+                                 ReportGenerator, ReportModel, setup_key)
+
+# Configuration
+FORMATS = {'markdown': '.md', 'json': '.json', 'html': '.html'}  # Format -> file extension
+REPORT_CACHE_DIR = os.path.join(os.environ.get('FF_CACHE_DIR', os.path.expanduser('~/.cache/ff_scanner')),
+                                'reports')
+CACHE_ENTRIES = 32  # Renderings kept in memory
+STORED_SCANS = 60  # Scans whose reports are kept on disk (besides the baseline scans)
+MODEL_VERSION = 1  # Bump when the JSON layout changes
+SCAN_FILE_PATTERN = re.compile(rf"scan_(-?\d+)(?:{'|'.join(map(re.escape, FORMATS.values()))})$")  # Cached renderings
+
+# HTML templates (str.format)
+HTML_HEAD_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Forward Factor Scan {scan_id}</title>
+<style>
+body {{ font-family: -apple-system, Segoe UI, Helvetica, Arial, sans-serif; max-width: 960px; margin: 2em auto; padding: 0 1em; color: #1f2328; }}
+table {{ border-collapse: collapse; margin: 1em 0; }}
+th, td {{ border: 1px solid #d0d7de; padding: 4px 10px; text-align: left; }}
+.setup {{ border-top: 2px solid #d0d7de; margin-top: 2em; }}
+.inverted {{ color: #9a6700; }}
+.muted {{ color: #656d76; }}
+</style>
+</head>
+<body>
+<h1>Forward Factor Nightly Scan Report</h1>
+<p><strong>Date</strong>: {date}<br>
+<strong>Scan ID</strong>: {scan_id}<br>
+<strong>Report Generated</strong>: {generated}</p>
+<h2>Executive Summary</h2>
+<ul>
+<li><strong>Total Opportunities Analyzed</strong>: {analyzed}</li>
+<li><strong>Quality Setups Identified</strong>: {quality}</li>
+<li><strong>Opportunities Rejected</strong>: {rejected}</li>
+</ul>
+"""
+
+HTML_SETUP_TEMPLATE = """<section class="setup">
+<h2>{rank}. {ticker} - {signal} Signal</h2>
+<p><strong>Rating</strong>: {rating}/10<br>
+<strong>Forward Factor</strong>: {forward_factor:+.1f}%<br>
+<strong>Probability</strong>: {probability:.0f}%<br>
+<strong>Risk/Reward</strong>: {risk_reward:.1f}:1</p>
+<table>
+<tr><th>Parameter</th><th>Front Contract</th><th>Back Contract</th></tr>
+<tr><td>Expiration</td><td>{front_date}</td><td>{back_date}</td></tr>
+<tr><td>DTE</td><td>{front_dte} days</td><td>{back_dte} days</td></tr>
+<tr><td>Implied Volatility</td><td>{front_iv:.1f}%</td><td>{back_iv:.1f}%</td></tr>
+<tr><td>Forward Volatility</td><td>{forward_vol:.1f}%</td><td>-</td></tr>
+</table>
+<p class="{term_class}"><strong>Term Structure</strong>: {term_structure}</p>
+<h3>Trading Thesis</h3>
+{thesis}
+<h3>Recommended Trade Structure</h3>
+{trade_structure}
+<h3>Risk Analysis</h3>
+<ul>
+<li><strong>Entry</strong>: Net {entry_side} of {entry_cost:.2f}% of underlying</li>
+<li><strong>Maximum Loss</strong>: {max_loss:.2f}% of underlying (within ±50% of the strike)</li>
+<li><strong>Maximum Gain</strong>: {max_gain:.2f}% of underlying</li>
+<li><strong>Break-Even</strong>: {breakevens}</li>{simulated}
+</ul>
+</section>
+"""
+
+HTML_FOOT = """<hr>
+<p class="muted">This report is for educational and informational purposes only. It is not financial advice.
+Options involve significant risk of loss; verify the analysis and earnings dates independently before trading.</p>
+</body>
+</html>
+"""
+
+
+def model_to_dict(model: ReportModel) -> Dict:
+    """Serialize a report model to JSON-compatible data (rendered thesis text included for readers)"""
+    tally = model.rejections
+    return {
+        'version': MODEL_VERSION,
+        'scan_id': model.scan_id,
+        'generated_at': model.generated_at.isoformat(),
+        'summary': {
+            'analyzed': model.analyzed,
+            'quality': len(model.quality_setups),
+            'rejected': tally.total,
+        },
+        'quality_setups': [
+            {
+                'rank': rank,
+                'analysis': analysis_to_dict(analysis),
+                'thesis': analysis.thesis,
+                'trade_structure': analysis.trade_structure,
+                'payoff': dataclasses.asdict(payoff),
+            }
+            for rank, (analysis, payoff) in enumerate(zip(model.quality_setups, model.payoffs), 1)
+        ],
+        'rejections': {
+            'scan_id': tally.scan_id,
+            'total': tally.total,
+            'categories': [
+                {
+                    'category': category,
+                    'count': tally.counts[category],
+                    'examples': [{'opportunity': dataclasses.asdict(opp), 'reason': reason}
+                                 for opp, reason in tally.examples.get(category, [])],
+                }
+                for category in tally.counts
+            ],
+            'codes': dict(tally.code_counts),
+        },
+    }
+
+
+def model_from_dict(data: Dict) -> ReportModel:
+    """Rebuild a report model serialized by model_to_dict"""
+    if data.get('version') != MODEL_VERSION:
+        raise ValueError(f"Unsupported report model version: {data.get('version')} (expected {MODEL_VERSION})")
+    
+    rejections = data['rejections']
+    tally = RejectionTally()
+    tally.scan_id = rejections['scan_id']
+    tally.total = rejections['total']
+    tally.code_counts = Counter(rejections['codes'])
+    for group in rejections['categories']:
+        tally.counts[group['category']] = group['count']
+        tally.examples[group['category']] = [(Opportunity(**example['opportunity']), example['reason'])
+                                             for example in group['examples']]
+    
+    setups = data['quality_setups']
+    return ReportModel(
+        scan_id=data['scan_id'],
+        generated_at=datetime.fromisoformat(data['generated_at']),
+        quality_setups=tuple(analysis_from_dict(setup['analysis']) for setup in setups),
+        payoffs=tuple(PayoffSummary(**setup['payoff']) for setup in setups),
+        rejections=tally,
+    )
+
+
+def diff_to_dict(diff: ReportDiff) -> Dict:
+    """Serialize a night-over-night diff (new setups carry their full analysis)"""
+    def entry(analysis, full: bool = False) -> Dict:
+        opp = analysis.opportunity
+        data = {'key': setup_key(opp), 'ticker': opp.ticker, 'front_date': opp.front_date,
+                'back_date': opp.back_date, 'forward_factor': opp.forward_factor, 'rating': analysis.rating}
+        if full:
+            data['analysis'] = analysis_to_dict(analysis)
+        return data
+    
+    return {
+        'scan_id': diff.scan_id,
+        'generated_at': diff.generated_at.isoformat(),
+        'previous_scan_id': diff.previous_scan_id,
+        'new': [entry(analysis, full=True) for analysis in diff.new],
+        'dropped': [entry(analysis) for analysis in diff.dropped],
+        'changed': [
+            dict(entry(analysis), previous_rating=earlier.rating,
+                 previous_forward_factor=earlier.opportunity.forward_factor)
+            for earlier, analysis in diff.changed
+        ],
+        'unchanged': diff.unchanged,
+    }
+
+
+def text_to_html(text: str) -> str:
+    """Convert thesis / trade structure text (paragraphs, '- ' bullets, **bold**) to HTML"""
+    blocks = []
+    for paragraph in text.split('\n\n'):
+        lines = paragraph.split('\n')
+        items = [line[2:] for line in lines if line.startswith('- ')]
+        plain = [line for line in lines if not line.startswith('- ')]
+        if plain:
+            blocks.append(f"<p>{'<br>'.join(html.escape(line) for line in plain)}</p>")
+        if items:
+            blocks.append("<ul>" + "".join(f"<li>{html.escape(item)}</li>" for item in items) + "</ul>")
+    return re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', '\n'.join(blocks))
+
+
+def write_markdown(model: ReportModel, out: TextIO):
+    """Render the markdown report"""
+    ReportGenerator().write_report(out, model)
+
+
+def write_json(model: ReportModel, out: TextIO):
+    """Render the report model as JSON"""
+    json.dump(model_to_dict(model), out, indent=2)
+    out.write('\n')
+
+
+def write_html(model: ReportModel, out: TextIO):
+    """Render a standalone HTML report"""
+    generator = ReportGenerator()
+    tally = model.rejections
+    out.write(HTML_HEAD_TEMPLATE.format(
+        scan_id=model.scan_id,
+        date=model.generated_at.strftime('%A, %B %d, %Y'),
+        generated=model.generated_at.strftime('%I:%M %p %Z'),
+        analyzed=model.analyzed,
+        quality=len(model.quality_setups),
+        rejected=tally.total,
+    ))
+    
+    if not model.quality_setups:
+        out.write("<p><strong>No quality setups found tonight.</strong> The scanner is highly selective "
+                  "and rejects most signals; this is normal.</p>\n")
+    
+    for rank, (analysis, payoff) in enumerate(zip(model.quality_setups, model.payoffs), 1):
+        opp = analysis.opportunity
+        simulated = ""
+        if analysis.expected_pnl is not None:
+            simulated = (f"\n<li><strong>Expected P&amp;L (simulated)</strong>: {analysis.expected_pnl:+.2f}% "
+                         f"of underlying, worst path {analysis.max_loss:.2f}% loss</li>")
+        inverted = opp.is_inverted()
+        out.write(HTML_SETUP_TEMPLATE.format(
+            rank=rank, ticker=html.escape(opp.ticker), signal=html.escape(opp.signal), rating=analysis.rating,
+            forward_factor=opp.forward_factor, probability=analysis.probability,
+            risk_reward=analysis.risk_reward, front_date=opp.front_date, back_date=opp.back_date,
+            front_dte=opp.front_dte, back_dte=opp.back_dte, front_iv=opp.front_iv, back_iv=opp.back_iv,
+            forward_vol=opp.forward_vol, term_class='inverted' if inverted else 'normal',
+            term_structure=(f"{'INVERTED' if inverted else 'NORMAL'} "
+                            f"(Front IV {'&gt;' if inverted else '&lt;'} Back IV)"),
+            thesis=text_to_html(analysis.thesis), trade_structure=text_to_html(analysis.trade_structure),
+            entry_side='debit' if payoff.entry_cost >= 0 else 'credit', entry_cost=abs(payoff.entry_cost),
+            max_loss=payoff.max_loss, max_gain=payoff.max_gain,
+            breakevens=html.escape(generator.format_breakevens(payoff)), simulated=simulated,
+        ))
+    
+    if tally.total:
+        out.write("<h2>Rejected Opportunities</h2>\n")
+        for category in REJECTION_CATEGORIES:
+            count = tally.counts[category]
+            if not count:
+                continue
+            out.write(f"<h3>{html.escape(category)} ({count} opportunities)</h3>\n<ul>\n")
+            for opp, reason in tally.examples[category]:
+                out.write(f"<li><strong>{html.escape(opp.ticker)}</strong> (FF: {opp.forward_factor:+.1f}%): "
+                          f"{html.escape(reason)}</li>\n")
+            if count > REJECTION_EXAMPLES:
+                out.write(f"<li><em>...and {count - REJECTION_EXAMPLES} more</em></li>\n")
+            out.write("</ul>\n")
+    
+    out.write(HTML_FOOT)
+
+
+def write_diff_markdown(diff: ReportDiff, out: TextIO):
+    """Render the changes report as markdown"""
+    ReportGenerator().write_diff_report(out, diff)
+
+
+def write_diff_json(diff: ReportDiff, out: TextIO):
+    """Render the changes report as JSON"""
+    json.dump(diff_to_dict(diff), out, indent=2)
+    out.write('\n')
+
+
+RENDERERS = {
+    'markdown': write_markdown,
+    'json': write_json,
+    'html': write_html,
+}
+
+# Formats of the night-over-night changes report
+DIFF_RENDERERS = {
+    'markdown': write_diff_markdown,
+    'json': write_diff_json,
+}
+
+
+def check_formats(formats: Sequence[str]) -> List[str]:
+    """Validate report format names (raises ValueError for unknown ones)"""
+    for name in formats:
+        if name not in FORMATS:
+            raise ValueError(f"Unknown report format: {name} (expected one of {', '.join(FORMATS)})")
+    return list(formats)
+
+
+def render_files(model, paths: Dict[str, str], renderers: Dict = RENDERERS) -> Dict[str, str]:
+    """
+    Render formats concurrently, each straight to its file
+    
+    Args:
+        model: Report model (or ReportDiff with DIFF_RENDERERS)
+        paths: Format name -> output path (written under a temporary name
+            and renamed when complete)
+        renderers: Format name -> render function
+    
+    Returns:
+        The same format -> path mapping
+    """
+    for name in paths:
+        if name not in renderers:
+            raise ValueError(f"Unknown report format: {name} (expected one of {', '.join(renderers)})")
+    
+    def render(name: str):
+        tmp_path = f"{paths[name]}.tmp"
+        with open(tmp_path, 'w') as f:
+            renderers[name](model, f)
+        os.replace(tmp_path, paths[name])
+    
+    with ThreadPoolExecutor(max_workers=max(1, len(paths))) as pool:
+        # list() re-raises the first rendering error
+        list(pool.map(render, paths))
+    return paths
+
+
+class ReportCache:
+    """Rendered reports per scan id, in memory and on disk"""
+    
+    def __init__(self, directory: str = REPORT_CACHE_DIR, entries: int = CACHE_ENTRIES,
+                 scans: int = STORED_SCANS):
+        """
+        Args:
+            directory: Directory for the model JSON and renderings of each scan
+            entries: Renderings kept in memory (least recently used dropped first)
+            scans: Most recently stored scans kept on disk (baseline scans are
+                always kept)
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.entries = entries
+        self.scans = scans
+        self._memory: OrderedDict = OrderedDict()  # (scan_id, format) -> text
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def path(self, scan_id: int, name: str) -> str:
+        """Cache file of a scan's rendering"""
+        return os.path.join(self.directory, f"scan_{scan_id}{FORMATS[name]}")
+    
+    def _load_baseline(self) -> Dict:
+        """Baseline file: {'current': model dict, 'previous': model dict}"""
+        try:
+            with open(os.path.join(self.directory, 'baseline.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def previous_run(self, model: ReportModel) -> Optional[ReportModel]:
+        """
+        Close run a model is diffed against
+        
+        The latest close run, unless that is the model's own scan (a resumed
+        or forced rerun, or an unchanged hosted scan): then the close run
+        before it, so a run is never diffed against itself.
+        
+        Returns:
+            Baseline model, or None if no close run of another scan was recorded
+        """
+        baseline = self._load_baseline()
+        for slot in ('current', 'previous'):
+            data = baseline.get(slot)
+            if data is not None and data['scan_id'] != model.scan_id:
+                return model_from_dict(data)
+        return None
+    
+    def set_baseline(self, model: ReportModel):
+        """Record a close run as the base of the next night-over-night diff"""
+        baseline = self._load_baseline()
+        current = baseline.get('current')
+        if current is not None and current['scan_id'] != model.scan_id:
+            baseline['previous'] = current
+        baseline['current'] = model_to_dict(model)
+        
+        path = os.path.join(self.directory, 'baseline.json')
+        with open(f"{path}.tmp", 'w') as f:
+            json.dump(baseline, f)
+        os.replace(f"{path}.tmp", path)
+    
+    def _remember(self, key, text: str):
+        with self._lock:
+            self._memory[key] = text
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.entries:
+                self._memory.popitem(last=False)
+    
+    def store(self, model: ReportModel, formats: Sequence[str] = ('json',)) -> Dict[str, str]:
+        """
+        Render a new model of a scan, replacing any cached renderings of that scan
+        
+        Args:
+            model: Report model
+            formats: Formats to render now (JSON, the model itself, is always
+                written so other formats can be rendered on request later)
+        
+        Returns:
+            Format -> cache file path
+        """
+        formats = check_formats(formats)
+        scan_id = model.scan_id
+        with self._lock:
+            for key in [key for key in self._memory if key[0] == scan_id]:
+                del self._memory[key]
+        for name in FORMATS:
+            if name not in formats and os.path.exists(self.path(scan_id, name)):
+                os.remove(self.path(scan_id, name))
+        
+        names = ['json'] + [name for name in formats if name != 'json']
+        paths = render_files(model, {name: self.path(scan_id, name) for name in names})
+        self.prune()
+        return paths
+    
+    def prune(self) -> List[int]:
+        """
+        Delete the files of all but the most recently stored scans
+        
+        Scans are ordered by when their model was stored (local scan ids are
+        timestamps, hosted ones a sequence, so the ids themselves do not
+        order a mixed cache). The baseline scans are always kept.
+        
+        Returns:
+            Scan ids whose files were deleted
+        """
+        files: Dict[int, List[str]] = {}
+        for name in os.listdir(self.directory):
+            match = SCAN_FILE_PATTERN.match(name)
+            if match:
+                files.setdefault(int(match.group(1)), []).append(os.path.join(self.directory, name))
+        
+        def stored_at(scan_id: int) -> float:
+            try:
+                return os.path.getmtime(self.path(scan_id, 'json'))
+            except OSError:
+                return 0.0
+        
+        keep = set(sorted(files, key=stored_at, reverse=True)[:self.scans])
+        keep.update(data['scan_id'] for data in self._load_baseline().values() if data)
+        
+        removed = [scan_id for scan_id in files if scan_id not in keep]
+        for scan_id in removed:
+            for path in files[scan_id]:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        if removed:
+            with self._lock:
+                for key in [key for key in self._memory if key[0] in removed]:
+                    del self._memory[key]
+        return removed
+    
+    def model(self, scan_id: int) -> Optional[ReportModel]:
+        """Cached model of a scan (None if the scan was never stored)"""
+        text = self.get(scan_id, 'json')
+        return model_from_dict(json.loads(text)) if text is not None else None
+    
+    def get(self, scan_id: int, name: str) -> Optional[str]:
+        """
+        A scan's report in one format
+        
+        Served from memory, then from the cache file; a format not rendered
+        yet is rendered from the cached model once and kept.
+        
+        Returns:
+            Report text, or None if the scan was never stored
+        """
+        check_formats([name])
+        key = (scan_id, name)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+        
+        path = self.path(scan_id, name)
+        if not os.path.exists(path):
+            model = self.model(scan_id) if name != 'json' else None
+            if model is None:
+                return None
+            render_files(model, {name: path})
+        
+        self.misses += 1
+        with open(path) as f:
+            text = f.read()
+        self._remember(key, text)
+        return text
+
+
+def main(argv=None):
+    """Print a stored scan's report in any format
+    
+    Args:
+        argv: Command line arguments (defaults to sys.argv[1:])
+    """
+    import argparse
+    import sys
+    
+    parser = argparse.ArgumentParser(prog='ff_report', description="Render a stored scan's report")
+    parser.add_argument('scan_id', type=int, help='Scan ID (as shown in the nightly summary)')
+    parser.add_argument('--format', choices=list(FORMATS), default='markdown', help='Output format')
+    parser.add_argument('--output', metavar='PATH', help='Write to a file instead of stdout')
+    args = parser.parse_args(argv)
+    
+    text = ReportCache().get(args.scan_id, args.format)
+    if text is None:
+        print(f"No stored report for scan {args.scan_id}", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+        print(f"✅ Report saved: {args.output}")
+    else:
+        sys.stdout.write(text)
+
+
+if __name__ == "__main__":
+    main()
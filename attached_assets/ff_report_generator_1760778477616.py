@@ -5,42 +5,44 @@ Forward Factor Report Generator
 Generates detailed markdown reports for trade recommendations
 """
 
+import io
+import hashlib
+from collections import Counter
+from dataclasses import dataclass
 from datetime import datetime
-from typing import List
+from typing import Dict, List, Optional, TextIO, Tuple
 from ff_nightly_scanner import TradeAnalysis, Opportunity
-
-
-class ReportGenerator:
-    """Generates formatted reports for Forward Factor analysis"""
-    
-    def __init__(self):
-        """Initialize report generator"""
-        pass
-    
-    def generate_summary_section(self, quality_setups: List[TradeAnalysis], 
-                                 rejected_setups: List[TradeAnalysis],
-                                 scan_id: int) -> str:
-        """Generate executive summary section"""
-        total_analyzed = len(quality_setups) + len(rejected_setups)
-        
-        summary = f"""# Forward Factor Nightly Scan Report
-
-**Date**: {datetime.now().strftime('%A, %B %d, %Y')}  
+from ff_payoff import PayoffSummary, summarize_payoffs
+
+# Report category order for rejected opportunities
+REJECTION_CATEGORIES = [
+    'Inverted Term Structure',
+    'DTE Out of Range',
+    'Calculation Mismatch',
+    'Forward Factor Too Low',
+    'IV Out of Range',
+    'Other',
+]
+REJECTION_EXAMPLES = 5  # Rejections listed per category
+
+# Section templates (str.format), built once at import
+SUMMARY_TEMPLATE = """# Forward Factor Nightly Scan Report
+
+**Date**: {date}  
 **Scan ID**: {scan_id}  
-**Report Generated**: {datetime.now().strftime('%I:%M %p %Z')}
+**Report Generated**: {generated}
 
 ---
 
 ## Executive Summary
 
-- **Total Opportunities Analyzed**: {total_analyzed}
-- **Quality Setups Identified**: {len(quality_setups)}
-- **Opportunities Rejected**: {len(rejected_setups)}
+- **Total Opportunities Analyzed**: {total}
+- **Quality Setups Identified**: {quality}
+- **Opportunities Rejected**: {rejected}
 
 """
-        
-        if len(quality_setups) == 0:
-            summary += """
+
+NO_SETUPS_SECTION = """
 ### ⚠️ No Quality Setups Found Tonight
 
 The scanner applied strict quality filters and rejected all opportunities. This is **normal and expected** - the scanner is designed to be highly selective and only surface truly exceptional setups.
@@ -56,55 +58,60 @@ The scanner applied strict quality filters and rejected all opportunities. This
 **This is a feature, not a bug.** Better to have zero recommendations than to recommend mediocre trades.
 
 """
-        else:
-            summary += f"""
-### ✅ {len(quality_setups)} High-Quality Setup{'s' if len(quality_setups) > 1 else ''} Identified
+
+SETUPS_FOUND_TEMPLATE = """
+### ✅ {count} High-Quality Setup{plural} Identified
 
 The following opportunities passed all quality filters and represent genuine volatility mispricings worth considering.
 
 """
-        
-        return summary
-    
-    def generate_opportunity_section(self, analysis: TradeAnalysis, rank: int) -> str:
-        """Generate detailed section for a single opportunity"""
-        opp = analysis.opportunity
-        
-        # Header
-        section = f"""
+
+RECOMMENDED_TRADES_HEADER = "\n---\n\n# Recommended Trades\n"
+
+# Black-Scholes payoff at front expiration (per 100 of underlying at the ATM strike)
+RISK_LINES_TEMPLATE = (
+    "**Entry**: Net {entry_side} of {entry_cost:.2f}% of underlying  \n"
+    "**Maximum Loss**: {max_loss:.2f}% of underlying (within ±50% of the strike)  \n"
+    "**Maximum Gain**: {max_gain:.2f}% of underlying  \n"
+    "**Break-Even**: {breakevens}"
+)
+SIMULATED_RISK_TEMPLATE = (
+    "  \n**Expected P&L (simulated)**: {expected_pnl:+.2f}% of underlying, "
+    "worst path {max_loss:.2f}% loss"
+)
+
+OPPORTUNITY_TEMPLATE = """
 ---
 
-## {rank}. {opp.ticker} - {opp.signal} Signal
+## {rank}. {ticker} - {signal} Signal
 
-**Rating**: {analysis.rating}/10 ⭐  
-**Forward Factor**: {opp.forward_factor:+.1f}%  
-**Probability**: {analysis.probability:.0f}%  
-**Risk/Reward**: {analysis.risk_reward:.1f}:1
+**Rating**: {rating}/10 ⭐  
+**Forward Factor**: {forward_factor:+.1f}%  
+**Probability**: {probability:.0f}%  
+**Risk/Reward**: {risk_reward:.1f}:1
 
 ### Setup Details
 
 | Parameter | Front Contract | Back Contract |
 |-----------|---------------|---------------|
-| **Expiration** | {opp.front_date} | {opp.back_date} |
-| **DTE** | {opp.front_dte} days | {opp.back_dte} days |
-| **Implied Volatility** | {opp.front_iv:.1f}% | {opp.back_iv:.1f}% |
-| **Forward Volatility** | {opp.forward_vol:.1f}% | - |
+| **Expiration** | {front_date} | {back_date} |
+| **DTE** | {front_dte} days | {back_dte} days |
+| **Implied Volatility** | {front_iv:.1f}% | {back_iv:.1f}% |
+| **Forward Volatility** | {forward_vol:.1f}% | - |
 
-**Term Structure**: {"⚠️ INVERTED" if opp.is_inverted() else "✅ NORMAL"} (Front IV {">" if opp.is_inverted() else "<"} Back IV)
+**Term Structure**: {term_structure} (Front IV {iv_relation} Back IV)
 
 ### Trading Thesis
 
-{analysis.thesis}
+{thesis}
 
 ### Recommended Trade Structure
 
-{analysis.trade_structure}
+{trade_structure}
 
 ### Risk Analysis
 
-**Maximum Loss**: Limited to debit paid (for debit spreads) or credit received (for credit spreads)  
-**Maximum Gain**: Difference in option premiums at optimal price level  
-**Break-Even**: Depends on entry prices and strike selection
+{risk_lines}
 
 **Key Risks**:
 - Volatility risk: Actual volatility may differ from implied
@@ -121,15 +128,8 @@ The following opportunities passed all quality filters and represent genuine vol
 5. **Paper Trade First**: Consider paper trading if new to calendar spreads
 
 """
-        
-        return section
-    
-    def generate_rejection_summary(self, rejected_setups: List[TradeAnalysis]) -> str:
-        """Generate summary of rejected opportunities"""
-        if len(rejected_setups) == 0:
-            return ""
-        
-        section = """
+
+REJECTION_HEADER = """
 ---
 
 ## Rejected Opportunities
@@ -137,51 +137,11 @@ The following opportunities passed all quality filters and represent genuine vol
 The following opportunities were analyzed but rejected for failing to meet quality criteria:
 
 """
-        
-        # Group rejections by reason
-        rejection_categories = {
-            'Inverted Term Structure': [],
-            'DTE Out of Range': [],
-            'Calculation Mismatch': [],
-            'Forward Factor Too Low': [],
-            'IV Out of Range': [],
-            'Other': []
-        }
-        
-        for analysis in rejected_setups:
-            opp = analysis.opportunity
-            reason = analysis.rejection_reasons[0] if analysis.rejection_reasons else "Unknown"
-            
-            # Categorize
-            if 'Inverted term structure' in reason or 'FALSE SIGNAL' in reason:
-                category = 'Inverted Term Structure'
-            elif 'DTE' in reason:
-                category = 'DTE Out of Range'
-            elif 'calculation mismatch' in reason:
-                category = 'Calculation Mismatch'
-            elif 'Forward Factor too low' in reason:
-                category = 'Forward Factor Too Low'
-            elif 'IV' in reason:
-                category = 'IV Out of Range'
-            else:
-                category = 'Other'
-            
-            rejection_categories[category].append((opp, reason))
-        
-        # Generate summary by category
-        for category, items in rejection_categories.items():
-            if items:
-                section += f"\n### {category} ({len(items)} opportunities)\n\n"
-                for opp, reason in items[:5]:  # Show first 5 in each category
-                    section += f"- **{opp.ticker}** (FF: {opp.forward_factor:+.1f}%): {reason}\n"
-                if len(items) > 5:
-                    section += f"- *...and {len(items) - 5} more*\n"
-        
-        return section
-    
-    def generate_disclaimer(self) -> str:
-        """Generate disclaimer section"""
-        return """
+REJECTION_CATEGORY_TEMPLATE = "\n### {category} ({count} opportunities)\n\n"
+REJECTION_EXAMPLE_TEMPLATE = "- **{ticker}** (FF: {forward_factor:+.1f}%): {reason}\n"
+REJECTION_MORE_TEMPLATE = "- *...and {more} more*\n"
+
+DISCLAIMER_SECTION = """
 ---
 
 ## Important Disclaimers
@@ -215,6 +175,251 @@ The following opportunities were analyzed but rejected for failing to meet quali
 *Report generated by Forward Factor Nightly Scanner*  
 *For questions or issues, please review the documentation*
 """
+
+
+# Diff report templates (str.format)
+DIFF_HEADER_TEMPLATE = """# Forward Factor Night-over-Night Changes
+
+**Date**: {date}  
+**Scan ID**: {scan_id} (previous run: {previous})
+
+- **New Setups**: {new}
+- **Dropped Setups**: {dropped}
+- **Rating Changes**: {changed}
+- **Unchanged**: {unchanged}
+
+"""
+DIFF_SECTION_TEMPLATE = "\n## {title} ({count})\n\n"
+DIFF_SETUP_TEMPLATE = "- **{ticker}** {front_date} / {back_date} (FF: {forward_factor:+.1f}%): Rating {rating}/10\n"
+DIFF_CHANGE_TEMPLATE = ("- **{ticker}** {front_date} / {back_date} (FF: {previous_ff:+.1f}% -> {forward_factor:+.1f}%): "
+                        "Rating {previous_rating}/10 -> {rating}/10\n")
+DIFF_NO_PREVIOUS = "\nNo previous run is stored; every setup is new.\n"
+
+
+def setup_key(opp: Opportunity) -> str:
+    """Stable hashed key of a setup: (ticker, front_date, back_date)"""
+    return hashlib.blake2b(f"{opp.ticker}|{opp.front_date}|{opp.back_date}".encode(), digest_size=8).hexdigest()
+
+
+class RejectionTally:
+    """Rejection counts by category and code, keeping only the first examples of each category"""
+    
+    def __init__(self):
+        self.total = 0
+        self.counts = Counter()
+        self.code_counts = Counter()
+        self.examples = {category: [] for category in REJECTION_CATEGORIES}
+        self.scan_id = None  # Scan of the first rejection
+    
+    def add(self, analysis: TradeAnalysis, category: str):
+        """Count a rejected analysis under its report category"""
+        if self.scan_id is None:
+            self.scan_id = analysis.opportunity.scan_id
+        self.total += 1
+        self.counts[category] += 1
+        self.code_counts.update(reason.code for reason in analysis.rejection_codes)
+        
+        examples = self.examples.setdefault(category, [])
+        if len(examples) < REJECTION_EXAMPLES:
+            reason = analysis.rejection_reasons[0] if analysis.rejection_reasons else "Unknown"
+            examples.append((analysis.opportunity, reason))
+
+
+@dataclass(frozen=True)
+class ReportModel:
+    """
+    Everything a report shows, built once per run
+    
+    Every output format (markdown, JSON, HTML) renders from this model, so
+    payoffs are priced and rejections tallied only once.
+    """
+    scan_id: int
+    generated_at: datetime
+    quality_setups: Tuple[TradeAnalysis, ...]  # Report order (best rating first)
+    payoffs: Tuple[PayoffSummary, ...]  # One per quality setup
+    rejections: RejectionTally
+    
+    @property
+    def analyzed(self) -> int:
+        """Total opportunities analyzed"""
+        return len(self.quality_setups) + self.rejections.total
+
+
+@dataclass(frozen=True)
+class ReportDiff:
+    """Quality setups that changed since the previous stored run"""
+    scan_id: int
+    generated_at: datetime  # This run's report time
+    previous_scan_id: Optional[int]  # None when there was no previous run
+    new: Tuple[TradeAnalysis, ...]  # Quality now, not in the previous run (current order)
+    dropped: Tuple[TradeAnalysis, ...]  # Quality in the previous run, not now (previous order)
+    changed: Tuple[Tuple[TradeAnalysis, TradeAnalysis], ...]  # (previous, current) with a new rating
+    unchanged: int
+
+
+class ReportGenerator:
+    """Generates formatted reports for Forward Factor analysis"""
+    
+    def __init__(self):
+        """Initialize report generator"""
+        pass
+    
+    def summary_text(self, quality_count: int, rejected_count: int, scan_id: int,
+                     generated_at: Optional[datetime] = None) -> str:
+        """Executive summary from the setup counts"""
+        generated_at = generated_at or datetime.now()
+        summary = SUMMARY_TEMPLATE.format(
+            date=generated_at.strftime('%A, %B %d, %Y'),
+            scan_id=scan_id,
+            generated=generated_at.strftime('%I:%M %p %Z'),
+            total=quality_count + rejected_count,
+            quality=quality_count,
+            rejected=rejected_count,
+        )
+        if quality_count == 0:
+            return summary + NO_SETUPS_SECTION
+        return summary + SETUPS_FOUND_TEMPLATE.format(count=quality_count, plural='s' if quality_count > 1 else '')
+    
+    def generate_summary_section(self, quality_setups: List[TradeAnalysis], 
+                                 rejected_setups: List[TradeAnalysis],
+                                 scan_id: int) -> str:
+        """Generate executive summary section"""
+        return self.summary_text(len(quality_setups), len(rejected_setups), scan_id)
+    
+    def format_breakevens(self, payoff: PayoffSummary) -> str:
+        """Break-even moves from the strike at front expiration"""
+        moves = [f"{(level - 1) * 100:+.1f}%" for level in (payoff.lower_breakeven, payoff.upper_breakeven)
+                 if level is not None]
+        if not moves:
+            return "None within ±50% of the strike"
+        return " / ".join(moves) + " move in the underlying at front expiration"
+    
+    def generate_opportunity_section(self, analysis: TradeAnalysis, rank: int,
+                                     payoff: Optional[PayoffSummary] = None) -> str:
+        """
+        Generate detailed section for a single opportunity
+        
+        Args:
+            analysis: Quality trade setup
+            rank: Position in the report
+            payoff: Payoff summary of the spread (computed here if not given)
+        """
+        opp = analysis.opportunity
+        if payoff is None:
+            payoff = summarize_payoffs([opp])[0]
+        
+        risk_lines = RISK_LINES_TEMPLATE.format(
+            entry_side='debit' if payoff.entry_cost >= 0 else 'credit',
+            entry_cost=abs(payoff.entry_cost),
+            max_loss=payoff.max_loss,
+            max_gain=payoff.max_gain,
+            breakevens=self.format_breakevens(payoff),
+        )
+        # Simulated figures when the Monte Carlo model priced the spread
+        if analysis.expected_pnl is not None:
+            risk_lines += SIMULATED_RISK_TEMPLATE.format(expected_pnl=analysis.expected_pnl,
+                                                         max_loss=analysis.max_loss)
+        
+        inverted = opp.is_inverted()
+        return OPPORTUNITY_TEMPLATE.format(
+            rank=rank, ticker=opp.ticker, signal=opp.signal, rating=analysis.rating,
+            forward_factor=opp.forward_factor, probability=analysis.probability,
+            risk_reward=analysis.risk_reward, front_date=opp.front_date, back_date=opp.back_date,
+            front_dte=opp.front_dte, back_dte=opp.back_dte, front_iv=opp.front_iv, back_iv=opp.back_iv,
+            forward_vol=opp.forward_vol, term_structure="⚠️ INVERTED" if inverted else "✅ NORMAL",
+            iv_relation=">" if inverted else "<", thesis=analysis.thesis,
+            trade_structure=analysis.trade_structure, risk_lines=risk_lines,
+        )
+    
+    def rejection_category(self, analysis: TradeAnalysis) -> str:
+        """Report category of a rejected opportunity (from its first reason code)"""
+        if analysis.rejection_codes:
+            return analysis.rejection_codes[0].category
+        
+        # Analyses built without reason codes: fall back to the message text
+        reason = analysis.rejection_reasons[0] if analysis.rejection_reasons else ""
+        if 'Inverted term structure' in reason or 'FALSE SIGNAL' in reason:
+            return 'Inverted Term Structure'
+        if 'DTE' in reason:
+            return 'DTE Out of Range'
+        if 'calculation mismatch' in reason:
+            return 'Calculation Mismatch'
+        if 'Forward Factor too low' in reason:
+            return 'Forward Factor Too Low'
+        if 'IV' in reason:
+            return 'IV Out of Range'
+        return 'Other'
+    
+    def tally_rejections(self, rejected_setups: List[TradeAnalysis]) -> RejectionTally:
+        """Group rejections by the category of their first reason code"""
+        tally = RejectionTally()
+        for analysis in rejected_setups:
+            tally.add(analysis, self.rejection_category(analysis))
+        return tally
+    
+    def write_rejection_summary(self, out: TextIO, tally: RejectionTally):
+        """Write the rejected opportunities section (nothing when there are none)"""
+        if tally.total == 0:
+            return
+        
+        out.write(REJECTION_HEADER)
+        for category in REJECTION_CATEGORIES:
+            count = tally.counts[category]
+            if not count:
+                continue
+            out.write(REJECTION_CATEGORY_TEMPLATE.format(category=category, count=count))
+            for opp, reason in tally.examples[category]:
+                out.write(REJECTION_EXAMPLE_TEMPLATE.format(ticker=opp.ticker, forward_factor=opp.forward_factor,
+                                                            reason=reason))
+            if count > REJECTION_EXAMPLES:
+                out.write(REJECTION_MORE_TEMPLATE.format(more=count - REJECTION_EXAMPLES))
+    
+    def generate_rejection_summary(self, rejected_setups: List[TradeAnalysis]) -> str:
+        """Generate summary of rejected opportunities"""
+        buffer = io.StringIO()
+        self.write_rejection_summary(buffer, self.tally_rejections(rejected_setups))
+        return buffer.getvalue()
+    
+    def generate_disclaimer(self) -> str:
+        """Generate disclaimer section"""
+        return DISCLAIMER_SECTION
+    
+    def build_model(self, quality_setups: List[TradeAnalysis], rejections: RejectionTally,
+                    scan_id: int) -> ReportModel:
+        """
+        Build the report model, pricing every setup's payoff in one batch
+        
+        Args:
+            quality_setups: Quality trade setups, in report order
+            rejections: Tally of the rejected opportunities
+            scan_id: Scanner scan ID
+        """
+        payoffs = summarize_payoffs([analysis.opportunity for analysis in quality_setups])
+        return ReportModel(scan_id, datetime.now(), tuple(quality_setups), tuple(payoffs), rejections)
+    
+    def write_report(self, out: TextIO, model: ReportModel):
+        """
+        Write the complete markdown report section by section
+        
+        Args:
+            out: Writable text stream
+            model: Report model
+        """
+        # Summary section
+        out.write(self.summary_text(len(model.quality_setups), model.rejections.total, model.scan_id,
+                                    model.generated_at))
+        
+        # Quality setups (detailed)
+        if model.quality_setups:
+            out.write(RECOMMENDED_TRADES_HEADER)
+            for i, (analysis, payoff) in enumerate(zip(model.quality_setups, model.payoffs), 1):
+                out.write(self.generate_opportunity_section(analysis, i, payoff))
+        
+        # Rejected opportunities (summary)
+        self.write_rejection_summary(out, model.rejections)
+        
+        # Disclaimer
+        out.write(DISCLAIMER_SECTION)
     
     def generate_full_report(self, quality_setups: List[TradeAnalysis],
                             rejected_setups: List[TradeAnalysis],
@@ -230,24 +435,83 @@ The following opportunities were analyzed but rejected for failing to meet quali
         Returns:
             Complete markdown report as string
         """
-        report = ""
+        buffer = io.StringIO()
+        self.write_report(buffer, self.build_model(quality_setups, self.tally_rejections(rejected_setups), scan_id))
+        return buffer.getvalue()
+    
+    def diff_models(self, current: ReportModel, previous: Optional[ReportModel]) -> ReportDiff:
+        """
+        Compare a run's quality setups with the previous run's
         
-        # Summary section
-        report += self.generate_summary_section(quality_setups, rejected_setups, scan_id)
+        Setups are matched by setup_key (ticker, front and back expiration)
+        through hash maps, so the comparison is linear in the number of setups.
         
-        # Quality setups (detailed)
-        if quality_setups:
-            report += "\n---\n\n# Recommended Trades\n"
-            for i, analysis in enumerate(quality_setups, 1):
-                report += self.generate_opportunity_section(analysis, i)
+        Args:
+            current: This run's report model
+            previous: The previous stored run's model (None if there is none)
         
-        # Rejected opportunities (summary)
-        report += self.generate_rejection_summary(rejected_setups)
+        Returns:
+            New, dropped and re-rated setups
+        """
+        before: Dict[str, TradeAnalysis] = {}
+        for analysis in (previous.quality_setups if previous else ()):
+            before.setdefault(setup_key(analysis.opportunity), analysis)
         
-        # Disclaimer
-        report += self.generate_disclaimer()
+        now: Dict[str, TradeAnalysis] = {}
+        for analysis in current.quality_setups:
+            now.setdefault(setup_key(analysis.opportunity), analysis)
+        
+        new, changed = [], []
+        unchanged = 0
+        for key, analysis in now.items():
+            earlier = before.get(key)
+            if earlier is None:
+                new.append(analysis)
+            elif earlier.rating != analysis.rating:
+                changed.append((earlier, analysis))
+            else:
+                unchanged += 1
+        dropped = [analysis for key, analysis in before.items() if key not in now]
         
-        return report
+        return ReportDiff(current.scan_id, current.generated_at, previous.scan_id if previous else None,
+                          tuple(new), tuple(dropped), tuple(changed), unchanged)
+    
+    def write_diff_report(self, out: TextIO, diff: ReportDiff):
+        """
+        Write the markdown changes report (deltas only)
+        
+        Args:
+            out: Writable text stream
+            diff: Output of diff_models
+        """
+        out.write(DIFF_HEADER_TEMPLATE.format(
+            date=diff.generated_at.strftime('%A, %B %d, %Y'),
+            scan_id=diff.scan_id,
+            previous='none' if diff.previous_scan_id is None else f"scan {diff.previous_scan_id}",
+            new=len(diff.new), dropped=len(diff.dropped), changed=len(diff.changed), unchanged=diff.unchanged,
+        ))
+        if diff.previous_scan_id is None:
+            out.write(DIFF_NO_PREVIOUS)
+        
+        for title, setups in (('New Setups', diff.new), ('Dropped Setups', diff.dropped)):
+            if not setups:
+                continue
+            out.write(DIFF_SECTION_TEMPLATE.format(title=title, count=len(setups)))
+            for analysis in setups:
+                opp = analysis.opportunity
+                out.write(DIFF_SETUP_TEMPLATE.format(ticker=opp.ticker, front_date=opp.front_date,
+                                                     back_date=opp.back_date, forward_factor=opp.forward_factor,
+                                                     rating=analysis.rating))
+        
+        if diff.changed:
+            out.write(DIFF_SECTION_TEMPLATE.format(title='Rating Changes', count=len(diff.changed)))
+            for earlier, analysis in diff.changed:
+                opp = analysis.opportunity
+                out.write(DIFF_CHANGE_TEMPLATE.format(
+                    ticker=opp.ticker, front_date=opp.front_date, back_date=opp.back_date,
+                    previous_ff=earlier.opportunity.forward_factor, forward_factor=opp.forward_factor,
+                    previous_rating=earlier.rating, rating=analysis.rating,
+                ))
     
     def save_report(self, report: str, filename: str) -> str:
         """
@@ -266,6 +530,62 @@ The following opportunities were analyzed but rejected for failing to meet quali
         return filename
 
 
+class ReportWriter:
+    """
+    Builds the report model from analyses as they are produced
+    
+    Pass it to FFScannerService.run_analysis(report=...) and close() it
+    afterwards. Rejected setups are only tallied (counts plus the first few
+    examples per category), so memory does not grow with the number of
+    rejections. Quality setups are kept: they are few, are ranked by rating
+    and have their payoffs priced in one batch. Nothing is rendered until
+    close(), which builds the model and, given an output stream, writes the
+    markdown report to it.
+    """
+    
+    def __init__(self, out: Optional[TextIO] = None, generator: Optional[ReportGenerator] = None):
+        """
+        Args:
+            out: Optional text stream close() writes the markdown report to
+                (e.g. an open report file); by default only the model is
+                built (for ff_report_formats)
+            generator: Report generator providing the sections
+        """
+        self.out = out
+        self.generator = generator or ReportGenerator()
+        self.quality_setups: List[TradeAnalysis] = []
+        self.rejections = RejectionTally()
+    
+    def add(self, analysis: TradeAnalysis):
+        """Take the next analysis from the pipeline"""
+        if analysis.is_quality_setup:
+            self.quality_setups.append(analysis)
+        else:
+            self.rejections.add(analysis, self.generator.rejection_category(analysis))
+    
+    @property
+    def scan_id(self) -> int:
+        """Scan ID of the analyses added (0 when there were none)"""
+        if self.quality_setups:
+            return self.quality_setups[0].opportunity.scan_id
+        return self.rejections.scan_id or 0
+    
+    def close(self) -> ReportModel:
+        """
+        Build the report model and write it as markdown to the output stream, if any (left open)
+        
+        Returns:
+            Report model, for rendering other formats
+        """
+        # Same order as run_analysis returns: best rating first
+        self.quality_setups.sort(key=lambda x: x.rating, reverse=True)
+        model = self.generator.build_model(self.quality_setups, self.rejections, self.scan_id)
+        if self.out is not None:
+            self.generator.write_report(self.out, model)
+            self.out.flush()
+        return model
+
+
 def main():
     """Test report generator with sample data"""
     from ff_nightly_scanner import Opportunity, TradeAnalysis, EarningsInfo
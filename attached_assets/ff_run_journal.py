@@ -0,0 +1,134 @@
+#!/usr/bin/env python3.11
+"""
+Forward Factor Run Journal
+
+Append-only JSONL checkpoint of a nightly run: the opportunities being
+analyzed, then one line per completed analysis, then a completion marker.
+A run that dies halfway can be resumed from the journal, skipping the scan
+fetch and every analysis already written. Journals are named after the day
+the run started, so a run that dies after midnight is found with
+latest_incomplete_journal().
+"""
+
+import os
+import re
+import json
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Configuration
+JOURNAL_DIR = os.path.join(os.environ.get('FF_CACHE_DIR', os.path.expanduser('~/.cache/ff_scanner')), 'journal')
+JOURNAL_NAME = re.compile(r'run_\d{8}\.jsonl$')
+
+
+def journal_path(run_date: Optional[datetime] = None) -> str:
+    """Journal file for a nightly run (named after the day the run starts)"""
+    return os.path.join(JOURNAL_DIR, f"run_{(run_date or datetime.now()).strftime('%Y%m%d')}.jsonl")
+
+
+def journal_complete(path: str) -> bool:
+    """Whether a journal ends with its completion marker (read from the end of the file)"""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 4096))
+        lines = f.read().splitlines()
+    try:
+        return bool(lines) and json.loads(lines[-1]).get('type') == 'complete'
+    except ValueError:  # Torn last line
+        return False
+
+
+def latest_incomplete_journal(directory: str = JOURNAL_DIR) -> Optional[str]:
+    """
+    The newest journal, if its run never completed
+    
+    Journals older than a completed run are not considered: that run
+    superseded them.
+    
+    Returns:
+        Journal path, or None
+    """
+    try:
+        names = sorted(name for name in os.listdir(directory) if JOURNAL_NAME.match(name))
+    except FileNotFoundError:
+        return None
+    if not names:
+        return None
+    path = os.path.join(directory, names[-1])
+    return None if journal_complete(path) else path
+
+
+class RunJournal:
+    """Checkpoint journal for one nightly run"""
+    
+    def __init__(self, path: str, resume: bool = False):
+        """
+        Open the journal
+        
+        Args:
+            path: Journal file path
+            resume: Keep and load the existing journal (otherwise start fresh)
+        """
+        self.path = path
+        self.scan_id = None
+        self.from_scanner = False  # Opportunities came from our own scanner (not the hosted API)
+        self.opportunities: Optional[List[Dict]] = None
+        self.analyses: Dict[int, Dict] = {}  # opportunity_id -> serialized analysis
+        self.complete = False
+        
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        if resume and os.path.exists(path):
+            self._load()
+        self._file = open(path, 'a' if resume else 'w')
+    
+    def _load(self):
+        """Replay the journal, dropping a last line torn by a crash"""
+        good_size = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b'\n'):
+                    break
+                good_size += len(line)
+                
+                if entry['type'] == 'opportunities':
+                    self.scan_id = entry['scan_id']
+                    self.from_scanner = entry.get('from_scanner', False)
+                    self.opportunities = entry['opportunities']
+                elif entry['type'] == 'analysis':
+                    analysis = entry['analysis']
+                    self.analyses[analysis['opportunity']['opportunity_id']] = analysis
+                elif entry['type'] == 'complete':
+                    self.complete = True
+        
+        # Appends must start on a fresh line
+        if good_size < os.path.getsize(self.path):
+            os.truncate(self.path, good_size)
+    
+    def _append(self, entry: Dict):
+        self._file.write(json.dumps(entry) + '\n')
+        self._file.flush()
+    
+    def record_opportunities(self, scan_id: int, opportunities: List[Dict], from_scanner: bool = False):
+        """Checkpoint the opportunities of this run (so a resume skips the scan fetch)"""
+        self.scan_id = scan_id
+        self.opportunities = opportunities
+        self.from_scanner = from_scanner
+        self._append({'type': 'opportunities', 'scan_id': scan_id, 'opportunities': opportunities,
+                      'from_scanner': from_scanner})
+    
+    def record_analysis(self, analysis: Dict):
+        """Checkpoint one completed analysis"""
+        self.analyses[analysis['opportunity']['opportunity_id']] = analysis
+        self._append({'type': 'analysis', 'analysis': analysis})
+    
+    def mark_complete(self, report_path: str):
+        """Record that the report was written"""
+        self.complete = True
+        self._append({'type': 'complete', 'report': report_path, 'at': datetime.now().isoformat()})
+    
+    def close(self):
+        self._file.close()
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3.11
+"""
+Forward Factor Scan Store
+
+SQLite history of nightly scans. Each scan records its totals and the typed
+rejection reason codes (with parameters) of every rejected opportunity, so
+history queries count codes in SQL instead of parsing report text
+(`ff_cli history`).
+
+The store also keeps what incremental runs need: the last scan seen, HTTP
+validators (ETag / Last-Modified) with the cached response bodies, and the
+serialized analysis of every opportunity already analyzed.
+"""
+
+import os
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+# Configuration
+DATA_DIR = os.environ.get('FF_CACHE_DIR', os.path.expanduser('~/.cache/ff_scanner'))
+DEFAULT_STORE_PATH = os.path.join(DATA_DIR, 'scans.sqlite3')
+REJECTION_BATCH = 1000  # Rejection rows a ScanRecorder writes per insert
+
+
+def rejection_rows(scan_id: int, analysis) -> List[Tuple]:
+    """Rejection table rows of a rejected TradeAnalysis, one per reason code"""
+    opp = analysis.opportunity
+    return [(scan_id, opp.opportunity_id, opp.ticker, position, reason.code, json.dumps(reason.params))
+            for position, reason in enumerate(analysis.rejection_codes)]
+
+
+class ScanStore:
+    """Persistent scan history with rejection reason codes"""
+    
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        """
+        Open (or create) the scan database
+        
+        Args:
+            path: SQLite file path (':memory:' for a private in-process store)
+        """
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        with self._lock, self._conn:
+            if path != ':memory:':
+                self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS scans (
+                    scan_id INTEGER PRIMARY KEY,
+                    run_at REAL NOT NULL,
+                    analyzed INTEGER NOT NULL,
+                    quality INTEGER NOT NULL,
+                    rejected INTEGER NOT NULL
+                )
+            ''')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS rejections (
+                    scan_id INTEGER NOT NULL,
+                    opportunity_id INTEGER NOT NULL,
+                    ticker TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    code TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    PRIMARY KEY (scan_id, opportunity_id, position)
+                )
+            ''')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS rejections_code ON rejections (code, scan_id)')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS analyses (
+                    opportunity_id INTEGER PRIMARY KEY,
+                    scan_id INTEGER NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    analyzed_at REAL NOT NULL
+                )
+            ''')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS http_cache (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    body TEXT NOT NULL,
+                    fetched_at REAL NOT NULL
+                )
+            ''')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS state (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                )
+            ''')
+    
+    def recorder(self) -> 'ScanRecorder':
+        """Record a scan analysis by analysis (see ScanRecorder)"""
+        return ScanRecorder(self)
+    
+    def clear_rejections(self, scan_id: int):
+        """Drop a scan's rejection codes (before recording it again)"""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM rejections WHERE scan_id = ?', (scan_id,))
+    
+    def add_rejections(self, rows: List[Tuple]):
+        """Append rejection rows built by rejection_rows()"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT INTO rejections (scan_id, opportunity_id, ticker, position, code, params) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                rows
+            )
+    
+    def save_totals(self, scan_id: int, quality: int, rejected: int):
+        """Record a scan's totals (replacing any earlier run of the same scan)"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO scans (scan_id, run_at, analyzed, quality, rejected) VALUES (?, ?, ?, ?, ?)',
+                (scan_id, time.time(), quality + rejected, quality, rejected)
+            )
+    
+    def rejection_counts(self, scan_id: Optional[int] = None, primary_only: bool = False) -> Counter:
+        """
+        Count rejection reason codes
+        
+        Args:
+            scan_id: Limit to one scan (defaults to all scans)
+            primary_only: Count only each opportunity's first reason
+        
+        Returns:
+            Counter mapping reason code to occurrences
+        """
+        query = 'SELECT code, COUNT(*) FROM rejections WHERE 1 = 1'
+        args: Tuple = ()
+        if scan_id is not None:
+            query += ' AND scan_id = ?'
+            args += (scan_id,)
+        if primary_only:
+            query += ' AND position = 0'
+        query += ' GROUP BY code'
+        
+        with self._lock:
+            return Counter(dict(self._conn.execute(query, args).fetchall()))
+    
+    def code_history(self, code: str, limit: int = 30) -> List[Dict]:
+        """
+        How often a reason code fired in recent scans
+        
+        Args:
+            code: Rejection reason code (e.g. FF_TOO_LOW)
+            limit: Number of most recent scans
+        
+        Returns:
+            List of dicts (scan_id, run_at, analyzed, count), newest first
+        """
+        with self._lock:
+            rows = self._conn.execute('''
+                SELECT s.scan_id, s.run_at, s.analyzed, COUNT(r.code)
+                FROM scans s LEFT JOIN rejections r ON r.scan_id = s.scan_id AND r.code = ?
+                GROUP BY s.scan_id ORDER BY s.run_at DESC LIMIT ?
+            ''', (code, limit)).fetchall()
+        
+        return [{'scan_id': scan_id, 'run_at': run_at, 'analyzed': analyzed, 'count': count}
+                for scan_id, run_at, analyzed, count in rows]
+    
+    def get_state(self, key: str) -> Optional[str]:
+        """Read a persisted state value (e.g. last_seen_scan_id)"""
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM state WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+    
+    def set_state(self, key: str, value: str):
+        """Persist a state value"""
+        with self._lock, self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)', (key, value))
+    
+    def get_http_cache(self, url: str) -> Optional[Tuple[Optional[str], Optional[str], str]]:
+        """
+        Cached response for a URL
+        
+        Returns:
+            (etag, last_modified, body) or None if the URL was never fetched
+        """
+        with self._lock:
+            return self._conn.execute(
+                'SELECT etag, last_modified, body FROM http_cache WHERE url = ?', (url,)
+            ).fetchone()
+    
+    def put_http_cache(self, url: str, etag: Optional[str], last_modified: Optional[str], body: str):
+        """Store a response body with its validators"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO http_cache (url, etag, last_modified, body, fetched_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (url, etag, last_modified, body, time.time())
+            )
+    
+    def load_analyses(self, opportunity_ids: List[int]) -> Dict[int, Tuple[str, Dict]]:
+        """
+        Stored analyses for opportunities
+        
+        Returns:
+            Dict mapping opportunity_id to (fingerprint, payload dict)
+        """
+        analyses = {}
+        ids = list(opportunity_ids)
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                rows = self._conn.execute(
+                    f'SELECT opportunity_id, fingerprint, payload FROM analyses '
+                    f'WHERE opportunity_id IN ({",".join("?" * len(chunk))})',
+                    chunk
+                ).fetchall()
+                for opportunity_id, fingerprint, payload in rows:
+                    analyses[opportunity_id] = (fingerprint, json.loads(payload))
+        return analyses
+    
+    def save_analyses(self, rows: List[Tuple[int, int, str, Dict]]):
+        """
+        Store analyses
+        
+        Args:
+            rows: (opportunity_id, scan_id, fingerprint, payload dict) tuples
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO analyses (opportunity_id, scan_id, fingerprint, payload, analyzed_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                [(opportunity_id, scan_id, fingerprint, json.dumps(payload), now)
+                 for opportunity_id, scan_id, fingerprint, payload in rows]
+            )
+
+
+class ScanRecorder:
+    """
+    Records a scan's history as analyses are produced
+    
+    Pass it to FFScannerService.run_analysis(history=...) and close() it
+    afterwards. Rejection codes are written every REJECTION_BATCH rows, so
+    a run never holds its rejected analyses just to save them; only the
+    totals wait for close().
+    """
+    
+    def __init__(self, store: ScanStore, batch_size: int = REJECTION_BATCH):
+        self.store = store
+        self.batch_size = batch_size
+        self.scan_id: Optional[int] = None  # Scan of the first analysis
+        self.quality = 0
+        self.rejected = 0
+        self._rows: List[Tuple] = []
+    
+    def add(self, analysis):
+        """Take the next analysis from the pipeline"""
+        if self.scan_id is None:
+            self.scan_id = analysis.opportunity.scan_id
+            self.store.clear_rejections(self.scan_id)
+        if analysis.is_quality_setup:
+            self.quality += 1
+            return
+        
+        self.rejected += 1
+        self._rows.extend(rejection_rows(self.scan_id, analysis))
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+    
+    def flush(self):
+        """Write the buffered rejection rows"""
+        if self._rows:
+            self.store.add_rejections(self._rows)
+            self._rows = []
+    
+    def close(self):
+        """Write the remaining rejections and the scan totals (nothing if no analysis was added)"""
+        self.flush()
+        if self.scan_id is not None:
+            self.store.save_totals(self.scan_id, self.quality, self.rejected)
+
+
+def main(argv=None):
+    """Print rejection reason code counts from the scan history
+    
+    Args:
+        argv: Command line arguments (defaults to sys.argv[1:])
+    """
+    import argparse
+    from datetime import datetime
+    
+    parser = argparse.ArgumentParser(prog='ff_history', description='Rejection reason codes of stored scans')
+    parser.add_argument('--scan', type=int, metavar='ID', help='Count one scan only (default: every stored scan)')
+    parser.add_argument('--primary', action='store_true', help="Count only each opportunity's first reason")
+    parser.add_argument('--code', help='Show how often one code (e.g. FF_TOO_LOW) fired in recent scans instead')
+    parser.add_argument('--limit', type=int, default=30, help='Recent scans shown with --code (default: 30)')
+    args = parser.parse_args(argv)
+    
+    store = ScanStore()
+    
+    if args.code:
+        rows = store.code_history(args.code, args.limit)
+        if not rows:
+            print("No stored scans")
+            return
+        print(f"{args.code} in the last {len(rows)} scans:")
+        for row in rows:
+            share = row['count'] / row['analyzed'] if row['analyzed'] else 0.0
+            print(f"  scan {row['scan_id']:<12} {datetime.fromtimestamp(row['run_at']):%Y-%m-%d %H:%M}  "
+                  f"{row['count']:7,} of {row['analyzed']:7,} analyzed ({share:.0%})")
+        return
+    
+    scope = f"scan {args.scan}" if args.scan is not None else "all stored scans"
+    counts = store.rejection_counts(args.scan, args.primary)
+    if not counts:
+        print(f"No rejections recorded for {scope}")
+        return
+    print(f"Rejection reason codes, {scope}{' (first reason only)' if args.primary else ''}:")
+    for code, count in counts.most_common():
+        print(f"  {code:<28} {count:9,}")
+
+
+if __name__ == "__main__":
+    main()
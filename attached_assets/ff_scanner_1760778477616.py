@@ -9,15 +9,12 @@ import sys
 import requests
 import json
 from datetime import datetime, timedelta
-from collections import defaultdict
 import time
+import numpy as np
+from ff_rate_limit import get_rate_limiter
 
-# Configuration
+# Configuration (validated in main() so importing the module has no side effects)
 POLYGON_API_KEY = os.environ.get('POLYGON_API_KEY')
-if not POLYGON_API_KEY:
-    print("ERROR: POLYGON_API_KEY environment variable not set")
-    print("Please set it with: export POLYGON_API_KEY='your_key_here'")
-    sys.exit(1)
 
 # Default stock list - Quality mid-caps with retail edge
 # Criteria: $2B-$50B market cap, liquid options, long-term potential
@@ -59,10 +56,46 @@ DEFAULT_TICKERS = [
     'X', 'CLF', 'NUE', 'STLD',
 ]
 
+# Contract liquidity thresholds (applied before IV averaging)
+MIN_CONTRACT_OI = 10  # Minimum open interest, unless the contract traded today
+MIN_CONTRACT_VOLUME = 1  # Minimum day volume, unless open interest is sufficient
+MAX_SPREAD_PCT = 0.25  # Maximum bid/ask width as a fraction of mid price
+
+# Ticker liquidity prefilter
+LIQUIDITY_PROBE_SIZE = 50  # Contracts fetched for the cheap first pass
+MIN_LIQUIDITY_SCORE = 40.0  # Minimum liquidity index (0-100) to get a full chain fetch
+
+# Time to expiration for the Forward Factor: calendar days / 365, or NYSE sessions / 252
+TIME_BASES = ('calendar', 'trading')
+CALENDAR_DAYS_PER_YEAR = 365.0
+TRADING_DAYS_PER_YEAR = 252.0
+
 class ForwardFactorScanner:
-    def __init__(self, api_key):
+    def __init__(self, api_key, time_basis='calendar', rate_limiter=None):
+        """
+        Args:
+            api_key: Polygon API key
+            time_basis: 'calendar' (days/365) or 'trading' (NYSE sessions/252)
+            rate_limiter: Limiter for chain requests (defaults to the 'polygon'
+                limiter shared with the web app and other processes)
+        """
+        if time_basis not in TIME_BASES:
+            raise ValueError(f"Unknown time basis: {time_basis} (expected one of {', '.join(TIME_BASES)})")
+        
         self.api_key = api_key
         self.base_url = 'https://api.polygon.io/v3/snapshot/options'
+        self.time_basis = time_basis
+        self._trading_calendar = None
+        self.session = requests.Session()  # Keep-alive connections to Polygon across chains
+        self.rate_limiter = rate_limiter or get_rate_limiter('polygon')
+    
+    @property
+    def trading_calendar(self):
+        """NYSE session calendar for trading-day DTE (created on first use)"""
+        if self._trading_calendar is None:
+            from ff_scheduler import TradingCalendar
+            self._trading_calendar = TradingCalendar()
+        return self._trading_calendar
         
     def fetch_options_chain(self, ticker, max_results=250):
         """Fetch options chain snapshot for a ticker"""
@@ -73,7 +106,8 @@ class ForwardFactorScanner:
         }
         
         try:
-            response = requests.get(url, params=params, timeout=10)
+            self.rate_limiter.acquire()
+            response = self.session.get(url, params=params, timeout=10)
             if response.status_code == 200:
                 data = response.json()
                 return data.get('results', [])
@@ -108,10 +142,147 @@ class ForwardFactorScanner:
         delta = expiration_date - today
         return delta.days
     
-    def group_by_expiration(self, options_data):
-        """Group options by expiration date and calculate average IV (ATM options only)"""
-        expirations = defaultdict(list)
+    def calculate_trading_dte(self, expiration_dates):
+        """Trading sessions from today through each expiration (NumPy array)"""
+        return self.trading_calendar.trading_days_to(expiration_dates)
+    
+    def contract_arrays(self, options_data):
+        """
+        Extract per-contract fields from a chain snapshot into NumPy arrays
+        
+        Missing values are NaN so they can be masked in vectorized form.
+        
+        Returns:
+            Dict of equal-length arrays: strike, iv, open_interest, volume,
+            bid, ask, delta, plus 'expiration' (list of date or None)
+        """
+        n = len(options_data)
+        fields = {name: np.full(n, np.nan) for name in
+                  ('strike', 'iv', 'open_interest', 'volume', 'bid', 'ask', 'delta')}
+        expiration = [None] * n
+        
+        for i, option in enumerate(options_data):
+            details = option.get('details') or {}
+            day = option.get('day') or {}
+            quote = option.get('last_quote') or {}
+            greeks = option.get('greeks') or {}
+            
+            expiration[i] = self.parse_expiration_date(details.get('expiration_date'))
+            for name, value in (('strike', details.get('strike_price')),
+                                ('iv', option.get('implied_volatility')),
+                                ('open_interest', option.get('open_interest')),
+                                ('volume', day.get('volume')),
+                                ('bid', quote.get('bid')),
+                                ('ask', quote.get('ask')),
+                                ('delta', greeks.get('delta'))):
+                if isinstance(value, (int, float)):
+                    fields[name][i] = value
+        
+        fields['expiration'] = expiration
+        return fields
+    
+    def spread_pct(self, arrays):
+        """Bid/ask width as a fraction of mid price (NaN when no usable quote)"""
+        bid, ask = arrays['bid'], arrays['ask']
+        mid = (bid + ask) / 2
+        with np.errstate(invalid='ignore', divide='ignore'):
+            spread = np.where((mid > 0) & (ask >= bid), (ask - bid) / mid, np.nan)
+        return spread
+    
+    def liquid_contract_mask(self, arrays):
+        """
+        Vectorized contract quality mask
+        
+        A contract is liquid if it has open interest or traded today, and its
+        bid/ask spread is not too wide. Fields the data plan does not provide
+        (NaN) do not count against a contract.
+        """
+        oi, volume = arrays['open_interest'], arrays['volume']
+        spread = self.spread_pct(arrays)
+        
+        has_interest = (np.isnan(oi) & np.isnan(volume)) | (oi >= MIN_CONTRACT_OI) | (volume >= MIN_CONTRACT_VOLUME)
+        tight_enough = np.isnan(spread) | (spread <= MAX_SPREAD_PCT)
+        return has_interest & tight_enough
+    
+    def liquidity_index(self, options_data):
+        """
+        Per-ticker liquidity index from open interest, volume and bid/ask width
+        
+        Each component is scaled to 0-1 (100k total OI, 10k total volume and a
+        zero-width spread score 1.0) and combined into a 0-100 score. Components
+        missing from the data plan are left out of the weighting.
+        
+        Returns:
+            Dict with score, total_oi, total_volume, median_spread_pct, liquid_fraction
+        """
+        if not options_data:
+            return {'score': 0.0, 'total_oi': 0, 'total_volume': 0,
+                    'median_spread_pct': None, 'liquid_fraction': 0.0}
+        
+        arrays = self.contract_arrays(options_data)
+        
+        # Prefer near-the-money contracts when greeks are available
+        near_money = (np.abs(arrays['delta']) >= 0.2) & (np.abs(arrays['delta']) <= 0.8)
+        if near_money.any():
+            arrays = {k: (v[near_money] if isinstance(v, np.ndarray) else v) for k, v in arrays.items()}
+        
+        oi, volume = arrays['open_interest'], arrays['volume']
+        spread = self.spread_pct(arrays)
+        
+        total_oi = float(np.nansum(oi))
+        total_volume = float(np.nansum(volume))
+        median_spread = float(np.nanmedian(spread)) if np.isfinite(spread).any() else None
+        
+        components = []
+        if np.isfinite(oi).any():
+            components.append((0.4, min(1.0, np.log10(1 + total_oi) / 5)))
+        if np.isfinite(volume).any():
+            components.append((0.3, min(1.0, np.log10(1 + total_volume) / 4)))
+        if median_spread is not None:
+            components.append((0.3, float(np.clip(1 - median_spread / MAX_SPREAD_PCT, 0, 1))))
+        
+        if components:
+            score = float(100 * sum(w * c for w, c in components) / sum(w for w, _ in components))
+        else:
+            score = 0.0
         
+        return {
+            'score': score,
+            'total_oi': int(total_oi),
+            'total_volume': int(total_volume),
+            'median_spread_pct': median_spread,
+            'liquid_fraction': float(self.liquid_contract_mask(arrays).mean())
+        }
+    
+    def prefilter_universe(self, tickers, min_score=MIN_LIQUIDITY_SCORE, probe_size=LIQUIDITY_PROBE_SIZE):
+        """
+        Cheap first pass: drop illiquid tickers before the full chain fetch
+        
+        Args:
+            tickers: List of ticker symbols
+            min_score: Minimum liquidity index (0-100) to keep a ticker
+            probe_size: Number of contracts fetched per ticker for the probe
+        
+        Returns:
+            (kept_tickers, liquidity) where liquidity maps ticker to its index dict
+        """
+        kept = []
+        liquidity = {}
+        
+        print(f"\n💧 Liquidity prefilter on {len(tickers)} tickers (min score {min_score:.0f})...")
+        for ticker in tickers:
+            index = self.liquidity_index(self.fetch_options_chain(ticker, max_results=probe_size))
+            liquidity[ticker] = index
+            if index['score'] >= min_score:
+                kept.append(ticker)
+            else:
+                print(f"  ⏭️  Skipping {ticker}: liquidity score {index['score']:.0f}")
+        
+        print(f"  ✅ {len(kept)}/{len(tickers)} tickers passed the liquidity prefilter")
+        return kept, liquidity
+    
+    def group_by_expiration(self, options_data):
+        """Group options by expiration date and calculate average IV (ATM, liquid options only)"""
         # First, estimate the stock price from the options with highest delta
         stock_price = None
         for option in options_data:
@@ -129,52 +300,53 @@ class ForwardFactorScanner:
         if not stock_price:
             return {}
         
-        for option in options_data:
-            try:
-                # Get expiration date from details
-                exp_date_str = option['details']['expiration_date']
-                exp_date = self.parse_expiration_date(exp_date_str)
-                if not exp_date:
-                    continue
-                
-                # Get strike price
-                strike = option['details']['strike_price']
-                
-                # Filter for ATM options only (within 10% of stock price)
-                if abs(strike - stock_price) / stock_price > 0.10:
-                    continue
-                
-                # Get implied volatility (already in percentage form from Polygon)
-                iv = option.get('implied_volatility')
-                if iv is None or iv <= 0 or iv > 500:  # Filter out bad data
-                    continue
-                
-                # Store IV for this expiration
-                expirations[exp_date].append(iv)
-            except (KeyError, TypeError) as e:
-                continue
+        arrays = self.contract_arrays(options_data)
+        strike, iv = arrays['strike'], arrays['iv']
+        has_expiration = np.array([d is not None for d in arrays['expiration']], dtype=bool)
+        
+        # Filter for ATM options only (within 10% of stock price)
+        with np.errstate(invalid='ignore'):
+            atm = np.abs(strike - stock_price) / stock_price <= 0.10
+            # Implied volatility is already in percentage form from Polygon; filter out bad data
+            valid_iv = (iv > 0) & (iv <= 500)
+        
+        keep = has_expiration & atm & valid_iv & self.liquid_contract_mask(arrays)
+        if not keep.any():
+            return {}
+        
+        # Average IV per expiration via a grouped sum over the kept contracts
+        kept_dates = [d for d, k in zip(arrays['expiration'], keep) if k]
+        unique_dates, group = np.unique(np.array([d.toordinal() for d in kept_dates]), return_inverse=True)
+        counts = np.bincount(group)
+        iv_sums = np.bincount(group, weights=iv[keep])
+        
+        # Trading-day DTE of every expiration in one lookup
+        trading_dtes = self.calculate_trading_dte(unique_dates)
         
-        # Calculate average IV for each expiration
         result = {}
-        for exp_date, iv_list in expirations.items():
-            if len(iv_list) >= 3:  # Need at least 3 ATM options
-                avg_iv = sum(iv_list) / len(iv_list)
+        for ordinal, count, iv_sum, trading_dte in zip(unique_dates, counts, iv_sums, trading_dtes):
+            if count >= 3:  # Need at least 3 ATM options
+                exp_date = datetime.fromordinal(int(ordinal)).date()
                 dte = self.calculate_dte(exp_date)
                 if dte and dte > 0:
                     result[exp_date] = {
-                        'iv': avg_iv,  # Already in percentage form
+                        'iv': float(iv_sum / count),  # Already in percentage form
                         'dte': dte,
-                        'count': len(iv_list)
+                        'trading_dte': int(trading_dte),
+                        'count': int(count)
                     }
         
         return result
     
-    def calculate_forward_factor(self, front_iv, front_dte, back_iv, back_dte):
-        """Calculate Forward Factor"""
+    def calculate_forward_factor(self, front_iv, front_dte, back_iv, back_dte, days_per_year=CALENDAR_DAYS_PER_YEAR):
+        """Calculate Forward Factor
+        
+        DTEs are calendar days with days_per_year=365, or trading days with 252.
+        """
         try:
             # Convert to years
-            T1 = front_dte / 365.0
-            T2 = back_dte / 365.0
+            T1 = front_dte / days_per_year
+            T2 = back_dte / days_per_year
             
             # Convert IV to decimal
             sigma1 = front_iv / 100.0
@@ -201,6 +373,12 @@ class ForwardFactorScanner:
         # Sort by DTE
         sorted_exp = sorted(expirations.items(), key=lambda x: x[1]['dte'])
         
+        # Time to expiration: calendar or trading days
+        if self.time_basis == 'trading':
+            dte_key, days_per_year = 'trading_dte', TRADING_DAYS_PER_YEAR
+        else:
+            dte_key, days_per_year = 'dte', CALENDAR_DAYS_PER_YEAR
+        
         pairs = []
         for i in range(len(sorted_exp) - 1):
             front_date, front_data = sorted_exp[i]
@@ -208,8 +386,9 @@ class ForwardFactorScanner:
             
             # Calculate Forward Factor
             fwd_vol, ff, error = self.calculate_forward_factor(
-                front_data['iv'], front_data['dte'],
-                back_data['iv'], back_data['dte']
+                front_data['iv'], front_data[dte_key],
+                back_data['iv'], back_data[dte_key],
+                days_per_year
             )
             
             if error:
@@ -219,9 +398,11 @@ class ForwardFactorScanner:
                 'front_date': front_date,
                 'front_iv': front_data['iv'],
                 'front_dte': front_data['dte'],
+                'front_trading_dte': front_data['trading_dte'],
                 'back_date': back_date,
                 'back_iv': back_data['iv'],
                 'back_dte': back_data['dte'],
+                'back_trading_dte': back_data['trading_dte'],
                 'forward_vol': fwd_vol,
                 'forward_factor': ff
             })
@@ -257,7 +438,7 @@ class ForwardFactorScanner:
             'expirations': expirations
         }
     
-    def scan_multiple(self, tickers, min_ff=-100, max_ff=100, sort_by='abs'):
+    def scan_multiple(self, tickers, min_ff=-100, max_ff=100, sort_by='abs', min_liquidity=None):
         """
         Scan multiple tickers and return opportunities
         
@@ -266,9 +447,14 @@ class ForwardFactorScanner:
             min_ff: Minimum Forward Factor to include
             max_ff: Maximum Forward Factor to include
             sort_by: How to sort results ('abs', 'ff', 'ticker')
+            min_liquidity: If set, run the liquidity prefilter first and only
+                fetch full chains for tickers scoring at least this much
         """
         results = []
         
+        if min_liquidity is not None:
+            tickers, _ = self.prefilter_universe(tickers, min_score=min_liquidity)
+        
         print(f"\n🔍 Starting Forward Factor scan of {len(tickers)} tickers...")
         print(f"Filter: {min_ff}% <= FF <= {max_ff}%")
         print("=" * 70)
@@ -287,10 +473,6 @@ class ForwardFactorScanner:
                 if filtered_pairs:
                     result['pairs'] = filtered_pairs
                     results.append(result)
-            
-            # Rate limiting: wait between requests
-            if i < len(tickers):
-                time.sleep(0.5)  # 2 requests per second max
         
         # Sort results
         if sort_by == 'abs':
@@ -401,27 +583,44 @@ class ForwardFactorScanner:
         print(f"\n💾 Results exported to {filename}")
 
 
-def main():
-    """Main function"""
+def main(argv=None):
+    """Main function
+    
+    Args:
+        argv: Command line arguments (defaults to sys.argv[1:])
+    """
     import argparse
     
-    parser = argparse.ArgumentParser(description='Forward Factor Scanner using Polygon.io')
+    parser = argparse.ArgumentParser(prog='ff_scanner', description='Forward Factor Scanner using Polygon.io')
     parser.add_argument('--tickers', nargs='+', help='List of tickers to scan (default: popular stocks)')
     parser.add_argument('--min-ff', type=float, default=-100, help='Minimum Forward Factor (default: -100)')
     parser.add_argument('--max-ff', type=float, default=100, help='Maximum Forward Factor (default: 100)')
     parser.add_argument('--top', type=int, default=10, help='Number of top opportunities to display (default: 10)')
     parser.add_argument('--export', type=str, help='Export results to CSV file')
+    parser.add_argument('--prefilter', action='store_true',
+                        help='Drop illiquid tickers with a cheap probe before the full chain fetch')
+    parser.add_argument('--min-liquidity', type=float, default=MIN_LIQUIDITY_SCORE,
+                        help=f'Minimum liquidity index (0-100) for --prefilter (default: {MIN_LIQUIDITY_SCORE:.0f})')
+    parser.add_argument('--time-basis', choices=TIME_BASES, default='calendar',
+                        help="Forward Factor time to expiration: 'calendar' (days/365) or 'trading' (NYSE sessions/252)")
+    
+    args = parser.parse_args(argv)
     
-    args = parser.parse_args()
+    if not POLYGON_API_KEY:
+        print("ERROR: POLYGON_API_KEY environment variable not set")
+        print("Please set it with: export POLYGON_API_KEY='your_key_here'")
+        sys.exit(1)
     
     # Use provided tickers or default list
     tickers = args.tickers if args.tickers else DEFAULT_TICKERS
     
     # Create scanner
-    scanner = ForwardFactorScanner(POLYGON_API_KEY)
+    scanner = ForwardFactorScanner(POLYGON_API_KEY, time_basis=args.time_basis)
     
     # Run scan
-    results = scanner.scan_multiple(tickers, min_ff=args.min_ff, max_ff=args.max_ff)
+    min_liquidity = args.min_liquidity if args.prefilter else None
+    results = scanner.scan_multiple(tickers, min_ff=args.min_ff, max_ff=args.max_ff,
+                                    min_liquidity=min_liquidity)
     
     # Print results
     scanner.print_results(results, top_n=args.top)
@@ -5,16 +5,188 @@ Forward Factor Scanner Scheduling Module
 Handles scheduling logic and US trading holiday calendar
 """
 
-import pandas_market_calendars as mcal
-from datetime import datetime, time, timedelta
-from typing import Optional
+import os
+import json
+from bisect import bisect_right
+from datetime import date as Date, datetime, time, timedelta
+from typing import Dict, Optional
+
+import ff_holidays
+
+# Configuration
+CACHE_DIR = os.environ.get('FF_CACHE_DIR', os.path.expanduser('~/.cache/ff_scanner'))
+SESSIONS_CACHE = os.path.join(CACHE_DIR, 'nyse_sessions.json')
+CALENDAR_YEARS_BACK = 1  # Years of sessions kept before the current year
+CALENDAR_YEARS_AHEAD = 2  # Years of sessions kept after the current year
+TRADING_DAYS_PER_YEAR = 252  # Year length for trading-time T
+
+_EPOCH_ORDINAL = Date(1970, 1, 1).toordinal()  # datetime64[D] zero
+
+
+def _day_number(day) -> int:
+    """Proleptic Gregorian ordinal of a date or datetime (Monday is ordinal % 7 == 1)"""
+    if isinstance(day, datetime):
+        day = day.date()
+    return day.toordinal()
+
+
+def _day_numbers(days):
+    """
+    Day ordinals of many dates as a NumPy int64 array
+    
+    Args:
+        days: date/datetime objects, 'YYYY-MM-DD' strings, ordinals, or a datetime64 array
+    """
+    import numpy as np
+    
+    if isinstance(days, np.ndarray):
+        if np.issubdtype(days.dtype, np.datetime64):
+            return days.astype('datetime64[D]').astype(np.int64) + _EPOCH_ORDINAL
+        if np.issubdtype(days.dtype, np.integer):
+            return days.astype(np.int64)
+    return np.array([
+        day if isinstance(day, (int, np.integer))
+        else (Date.fromisoformat(day) if isinstance(day, str) else day).toordinal()
+        for day in days
+    ], dtype=np.int64)
+
+
+def _calendar_version() -> str:
+    """Installed pandas_market_calendars version (read without importing it)"""
+    try:
+        from importlib.metadata import version
+        return version('pandas_market_calendars')
+    except Exception:
+        return 'unknown'
+
 
 class TradingCalendar:
-    """US Trading Calendar with holiday support"""
+    """US Trading Calendar with holiday support
+    
+    Trading sessions are held as a bitmap with one byte per calendar day, so
+    day lookups are indexing and next-session queries are a bisect. Sessions
+    and early closes come from the built-in NYSE rules (ff_holidays); only
+    years before ff_holidays.FIRST_RULE_YEAR load pandas_market_calendars.
+    The bitmap is cached on disk and extended when a query falls outside the
+    covered years.
+    """
+    
+    def __init__(self, cache_path: Optional[str] = SESSIONS_CACHE):
+        """
+        Initialize NYSE calendar
+        
+        Args:
+            cache_path: Session bitmap cache file (None disables the disk cache)
+        """
+        self._nyse = None
+        self.cache_path = cache_path
+        self.origin = 0  # Day number of bitmap[0]
+        self.bitmap = bytearray()  # bitmap[i]: day origin + i is a trading session
+        self.sessions = []  # Sorted day numbers of trading sessions
+        self.early_closes: Dict[int, time] = {}  # Day number -> ET close time
+        self._cumulative = None  # Sessions before each bitmap index (built on first DTE query)
+        
+        this_year = datetime.now().year
+        self._ensure_years(this_year - CALENDAR_YEARS_BACK, this_year + CALENDAR_YEARS_AHEAD)
+    
+    @property
+    def nyse(self):
+        """NYSE calendar, loaded on first use (pandas_market_calendars is slow to import)"""
+        if self._nyse is None:
+            import pandas_market_calendars as mcal
+            self._nyse = mcal.get_calendar('NYSE')
+        return self._nyse
+    
+    def _set_bitmap(self, origin: int, bitmap: bytearray, early_closes: Dict[int, time]):
+        self.origin = origin
+        self.bitmap = bitmap
+        self.sessions = [origin + i for i, open_ in enumerate(bitmap) if open_]
+        self.early_closes = early_closes
+        self._cumulative = None
+    
+    def _covers(self, first_day: int, last_day: int) -> bool:
+        return self.origin <= first_day and last_day < self.origin + len(self.bitmap)
+    
+    def _ensure_years(self, first_year: int, last_year: int):
+        """Make sure the bitmap covers whole calendar years first_year..last_year"""
+        first_day = _day_number(Date(first_year, 1, 1))
+        last_day = _day_number(Date(last_year, 12, 31))
+        if self._covers(first_day, last_day):
+            return
+        
+        # Never shrink what is already covered
+        if len(self.bitmap):
+            first_day = min(first_day, self.origin)
+            last_day = max(last_day, self.origin + len(self.bitmap) - 1)
+        
+        # Rule-built years depend only on the rules; older years on the library
+        version = f"rules-{ff_holidays.RULES_VERSION}"
+        if Date.fromordinal(first_day).year < ff_holidays.FIRST_RULE_YEAR:
+            version += f"+mcal-{_calendar_version()}"
+        if self._load_cache(version) and self._covers(first_day, last_day):
+            return
+        
+        self._build(first_day, last_day)
+        self._save_cache(version)
+    
+    def _build(self, first_day: int, last_day: int):
+        """Build the session bitmap from the built-in rules (and mcal for older years)"""
+        first, last = Date.fromordinal(first_day), Date.fromordinal(last_day)
+        bitmap = bytearray(last_day - first_day + 1)
+        early_closes = {}
+        
+        rules_start = max(first, Date(ff_holidays.FIRST_RULE_YEAR, 1, 1))
+        if rules_start <= last:
+            for day in ff_holidays.sessions(rules_start, last):
+                bitmap[day.toordinal() - first_day] = 1
+            for year in range(rules_start.year, last.year + 1):
+                for day, close in ff_holidays.nyse_early_closes(year).items():
+                    early_closes[day.toordinal()] = close
+        
+        if first < rules_start:
+            rules_end = min(last, rules_start - timedelta(days=1))
+            schedule = self.nyse.schedule(start_date=first, end_date=rules_end)
+            for ts in schedule.index:
+                bitmap[ts.date().toordinal() - first_day] = 1
+            for ts, close in self.nyse.early_closes(schedule)['market_close'].items():
+                early_closes[ts.date().toordinal()] = close.tz_convert('America/New_York').time()
+        
+        self._set_bitmap(first_day, bitmap, early_closes)
+    
+    def _load_cache(self, version: str) -> bool:
+        """Load the cached bitmap if it was built by the same rules / calendar version"""
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return False
+        try:
+            with open(self.cache_path) as f:
+                data = json.load(f)
+            if data['version'] != version:
+                return False
+            early_closes = {int(day): time.fromisoformat(close) for day, close in data['early_closes'].items()}
+            self._set_bitmap(data['origin'], bytearray.fromhex(data['bitmap']), early_closes)
+            return True
+        except (OSError, KeyError, ValueError):
+            return False
+    
+    def _save_cache(self, version: str):
+        if not self.cache_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+            tmp_path = f"{self.cache_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({'version': version, 'origin': self.origin, 'bitmap': self.bitmap.hex(),
+                           'early_closes': {day: close.isoformat() for day, close in self.early_closes.items()}}, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"WARNING: Could not cache trading sessions: {e}")
     
-    def __init__(self):
-        """Initialize NYSE calendar"""
-        self.nyse = mcal.get_calendar('NYSE')
+    def _index(self, day: int) -> int:
+        """Bitmap index of a day number, extending the bitmap if needed"""
+        if not self._covers(day, day):
+            year = Date.fromordinal(day).year
+            self._ensure_years(year, year)
+        return day - self.origin
     
     def is_trading_day(self, date: Optional[datetime] = None) -> bool:
         """
@@ -29,13 +201,25 @@ class TradingCalendar:
         if date is None:
             date = datetime.now()
         
-        # Get date only (no time)
-        check_date = date.date()
+        index = self._index(_day_number(date))  # May extend the bitmap
+        return bool(self.bitmap[index])
+    
+    def get_market_close(self, date: Optional[datetime] = None) -> Optional[time]:
+        """
+        ET market close time on a date
+        
+        Args:
+            date: Date to check (defaults to today)
         
-        # Get schedule for the date
-        schedule = self.nyse.schedule(start_date=check_date, end_date=check_date)
+        Returns:
+            Close time (e.g. 13:00 on early-close days), or None if the market is closed
+        """
+        if date is None:
+            date = datetime.now()
         
-        return len(schedule) > 0
+        if not self.is_trading_day(date):
+            return None
+        return self.early_closes.get(_day_number(date), ff_holidays.REGULAR_CLOSE)
     
     def get_next_trading_day(self, date: Optional[datetime] = None) -> datetime:
         """
@@ -50,17 +234,51 @@ class TradingCalendar:
         if date is None:
             date = datetime.now()
         
-        # Start checking from tomorrow
-        check_date = (date + timedelta(days=1)).date()
+        day = _day_number(date)
+        self._index(day + 10)  # Long weekends never exceed a few days
+        next_day = self.sessions[bisect_right(self.sessions, day)]
+        return datetime.combine(Date.fromordinal(next_day), time())
+    
+    def cumulative_sessions(self):
+        """
+        Prefix sums of the session bitmap
+        
+        Returns:
+            NumPy int64 array c with c[i] = sessions in bitmap[:i]
+        """
+        if self._cumulative is None:
+            import numpy as np
+            counts = np.frombuffer(bytes(self.bitmap), dtype=np.uint8)
+            self._cumulative = np.concatenate(([0], np.cumsum(counts, dtype=np.int64)))
+        return self._cumulative
+    
+    def trading_days_to(self, expirations, as_of: Optional[datetime] = None):
+        """
+        Trading sessions after as_of up to and including each expiration
         
-        # Check up to 10 days ahead (handles long weekends)
-        for i in range(10):
-            if self.is_trading_day(datetime.combine(check_date, time())):
-                return datetime.combine(check_date, time())
-            check_date += timedelta(days=1)
+        Two cumulative-sum lookups per expiration, done as one array operation.
         
-        # Fallback: return date + 1 day
-        return date + timedelta(days=1)
+        Args:
+            expirations: Expiration dates (date/datetime objects, 'YYYY-MM-DD'
+                strings, day ordinals or a datetime64 array)
+            as_of: Reference date (defaults to today)
+        
+        Returns:
+            NumPy int64 array of trading-day counts (negative for expirations before as_of)
+        """
+        days = _day_numbers(expirations)
+        start = _day_number(as_of or datetime.now())
+        
+        # Extend first: extending may move the origin
+        for day in (start, int(days.min()) if len(days) else start, int(days.max()) if len(days) else start):
+            self._index(day)
+        
+        cumulative = self.cumulative_sessions()
+        return cumulative[days - self.origin + 1] - cumulative[start - self.origin + 1]
+    
+    def trading_days_between(self, start: datetime, end: datetime) -> int:
+        """Trading sessions after start up to and including end"""
+        return int(self.trading_days_to([_day_number(end)], as_of=start)[0])
     
     def get_upcoming_holidays(self, days_ahead: int = 30) -> list:
         """
@@ -72,25 +290,16 @@ class TradingCalendar:
         Returns:
             List of holiday dates
         """
-        start_date = datetime.now().date()
-        end_date = start_date + timedelta(days=days_ahead)
-        
-        # Get all dates in range
-        all_dates = []
-        current = start_date
-        while current <= end_date:
-            all_dates.append(current)
-            current += timedelta(days=1)
-        
-        # Filter out trading days to get holidays
-        holidays = []
-        for date in all_dates:
-            if not self.is_trading_day(datetime.combine(date, time())):
-                # Skip regular weekends
-                if date.weekday() < 5:  # Monday=0, Friday=4
-                    holidays.append(date)
+        start = _day_number(datetime.now())
+        self._index(start + days_ahead)
+        first = self._index(start)
         
-        return holidays
+        # Weekdays (ordinal % 7: Monday=1 ... Friday=5) without a session
+        return [
+            Date.fromordinal(start + i)
+            for i, open_ in enumerate(self.bitmap[first:first + days_ahead + 1])
+            if not open_ and 1 <= (start + i) % 7 <= 5
+        ]
     
     def should_run_tonight(self) -> bool:
         """
@@ -134,8 +343,49 @@ class TradingCalendar:
         }
 
 
-def main():
-    """Test the trading calendar"""
+def main(argv=None):
+    """Test the trading calendar
+    
+    Args:
+        argv: Command line arguments (defaults to sys.argv[1:])
+    """
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog='ff_scheduler', description='US trading calendar and nightly run schedule')
+    parser.add_argument('--dates', nargs='+', metavar='YYYY-MM-DD',
+                        help='Dates to check (default: a sample of 2025 holidays)')
+    parser.add_argument('--bench', type=int, nargs='?', const=10000, metavar='N',
+                        help='Time calendar load and N schedule reports (default N: 10000)')
+    parser.add_argument('--validate', nargs='*', type=int, metavar='YEAR',
+                        help='Check the built-in holiday rules against pandas_market_calendars '
+                             '(optional first and last year)')
+    args = parser.parse_args(argv)
+    
+    if args.validate is not None:
+        years = args.validate + [None] * (2 - len(args.validate))
+        first_year, last_year = years[0] or ff_holidays.FIRST_RULE_YEAR, years[1]
+        mismatches = ff_holidays.validate_against_mcal(first_year, last_year)
+        for mismatch in mismatches:
+            print(f"  ✗ {mismatch}")
+        print(f"{'✅' if not mismatches else '❌'} Built-in NYSE rules vs pandas_market_calendars "
+              f"from {first_year}: {len(mismatches)} mismatches")
+        return 1 if mismatches else 0
+    
+    if args.bench:
+        import time as timer
+        start = timer.perf_counter()
+        calendar = TradingCalendar()
+        load = timer.perf_counter() - start
+        
+        start = timer.perf_counter()
+        for _ in range(args.bench):
+            calendar.get_run_schedule_info()
+        report = (timer.perf_counter() - start) / args.bench
+        
+        print(f"Calendar load ({len(calendar.bitmap)} days, {len(calendar.sessions)} sessions): {load * 1000:.1f} ms")
+        print(f"Schedule report: {report * 1e6:.1f} µs (mean of {args.bench})")
+        return
+    
     calendar = TradingCalendar()
     
     print("=" * 80)
@@ -162,12 +412,15 @@ def main():
     
     # Test specific dates
     print("\nTesting specific dates:")
-    test_dates = [
-        datetime(2025, 12, 25),  # Christmas
-        datetime(2025, 11, 28),  # Thanksgiving
-        datetime(2025, 7, 4),    # Independence Day
-        datetime(2025, 1, 1),    # New Year's Day
-    ]
+    if args.dates:
+        test_dates = [datetime.strptime(d, '%Y-%m-%d') for d in args.dates]
+    else:
+        test_dates = [
+            datetime(2025, 12, 25),  # Christmas
+            datetime(2025, 11, 28),  # Thanksgiving
+            datetime(2025, 7, 4),    # Independence Day
+            datetime(2025, 1, 1),    # New Year's Day
+        ]
     
     for date in test_dates:
         is_trading = calendar.is_trading_day(date)
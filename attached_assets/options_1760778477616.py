@@ -1,124 +1,376 @@
 import os
+import json
+import time
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from flask import Blueprint, jsonify
-from collections import defaultdict
+from flask import Blueprint, Response, jsonify, request
+from collections import defaultdict, OrderedDict
 
 options_bp = Blueprint('options', __name__)
 
 # Get API key from environment variable
 POLYGON_API_KEY = os.environ.get('POLYGON_API_KEY')
 
+# Lookup response cache
+LOOKUP_CACHE_TTL = float(os.environ.get('OPTIONS_CACHE_TTL', 60))  # Seconds a response is fresh
+LOOKUP_STALE_TTL = float(os.environ.get('OPTIONS_STALE_TTL', 300))  # Seconds a stale response is served while refreshing
+LOOKUP_CACHE_SIZE = 256  # Tickers kept (least recently used dropped first)
+
+# Batch lookup
+BATCH_MAX_TICKERS = 50  # Tickers accepted per batch request
+BATCH_WORKERS = 8  # Chains fetched at once (requests still start at the shared Polygon rate)
+
+
+class _Flight:
+    """One upstream fetch that concurrent requests for the same key wait on"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ResponseCache:
+    """
+    TTL LRU cache of (body, status) responses with single-flight loading.
+    
+    - Fresh entries are served directly.
+    - Stale entries (older than ttl, within stale_ttl more) are served at once
+      while one background refresh replaces them.
+    - On a miss, the first request fetches; concurrent requests for the same
+      key wait for that fetch instead of starting their own.
+    Only 200 responses are cached; errors are shared with the requests that
+    waited on the fetch but not stored.
+    """
+    
+    def __init__(self, ttl=LOOKUP_CACHE_TTL, stale_ttl=LOOKUP_STALE_TTL, max_entries=LOOKUP_CACHE_SIZE,
+                 clock=time.monotonic):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()  # key -> (body, status, fetched_at)
+        self._flights = {}  # key -> _Flight
+        self._lock = threading.Lock()
+        self.stats = {'hit': 0, 'stale': 0, 'miss': 0, 'coalesced': 0, 'refresh': 0}
+    
+    def _store(self, key, result):
+        body, status = result
+        if status != 200:
+            return
+        self._entries[key] = (body, status, self.clock())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def _run(self, key, flight, loader):
+        """Fetch, cache and hand the result to every waiter"""
+        try:
+            flight.result = loader()
+        except Exception as e:
+            flight.error = e
+        with self._lock:
+            if flight.result is not None:
+                self._store(key, flight.result)
+            self._flights.pop(key, None)
+        flight.done.set()
+    
+    def get(self, key, loader):
+        """
+        Cached response for a key, loading it with loader() when needed.
+        
+        Returns (body, status, cache_state) where cache_state is one of
+        HIT, STALE, MISS or COALESCED.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            age = self.clock() - entry[2] if entry else None
+            
+            if entry and age < self.ttl:
+                self._entries.move_to_end(key)
+                self.stats['hit'] += 1
+                return entry[0], entry[1], 'HIT'
+            
+            flight = self._flights.get(key)
+            if entry and age < self.ttl + self.stale_ttl:
+                # Serve stale, revalidate in the background (once)
+                if flight is None:
+                    flight = self._flights[key] = _Flight()
+                    self.stats['refresh'] += 1
+                    threading.Thread(target=self._run, args=(key, flight, loader), daemon=True).start()
+                self._entries.move_to_end(key)
+                self.stats['stale'] += 1
+                return entry[0], entry[1], 'STALE'
+            
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.stats['miss'] += 1
+            else:
+                self.stats['coalesced'] += 1
+        
+        if leader:
+            self._run(key, flight, loader)
+        else:
+            flight.done.wait()
+        
+        if flight.error is not None:
+            raise flight.error
+        body, status = flight.result
+        return body, status, 'MISS' if leader else 'COALESCED'
+
+
+lookup_cache = ResponseCache()
+batch_cache = ResponseCache()
+
+_scanner = None
+_scanner_lock = threading.Lock()  # Grouping shares one scanner (and its trading calendar)
+
+
 @options_bp.route('/lookup/<ticker>', methods=['GET'])
 def lookup_options(ticker):
     """
     Lookup options data for a given ticker symbol.
     Returns IV and DTE for front and back month contracts.
+    Responses are cached per ticker (see ResponseCache); the X-Cache header
+    tells whether this one was fetched, shared or served from the cache.
     """
     try:
         if not POLYGON_API_KEY:
             return jsonify({'error': 'Polygon API key not configured'}), 500
         
-        # Get current date
-        today = datetime.now().date()
-        
-        # Use the direct REST API endpoint for options chain snapshot
-        url = f'https://api.polygon.io/v3/snapshot/options/{ticker.upper()}'
-        params = {
-            'apiKey': POLYGON_API_KEY,
-            'limit': 250
-        }
+        body, status, cache_state = lookup_cache.get(ticker.upper(), lambda: fetch_lookup(ticker))
+        return jsonify(body), status, {'X-Cache': cache_state}
         
-        try:
-            response = requests.get(url, params=params, timeout=30)
-            
-            if response.status_code == 403:
-                return jsonify({
-                    'error': 'Access denied. This feature requires a Polygon.io subscription with options data access.'
-                }), 403
-            elif response.status_code == 429:
-                return jsonify({
-                    'error': 'Rate limit exceeded. Please wait a moment and try again.'
-                }), 429
-            elif response.status_code != 200:
-                return jsonify({
-                    'error': f'API returned status code {response.status_code}: {response.text}'
-                }), response.status_code
-            
-            data = response.json()
-            
-            if data.get('status') != 'OK' or 'results' not in data:
-                return jsonify({
-                    'error': f'No options data found for {ticker}'
-                }), 404
-            
-            # Group options by expiration date and collect IVs
-            expirations_data = defaultdict(list)
-            
-            for option in data['results']:
-                # Check if we have the required data
-                if 'details' not in option or 'implied_volatility' not in option:
-                    continue
-                
-                details = option['details']
-                exp_date = details.get('expiration_date')
-                iv = option.get('implied_volatility')
-                
-                # Only include valid IVs and future expirations
-                if iv and iv > 0 and exp_date:
-                    exp_datetime = datetime.strptime(exp_date, '%Y-%m-%d').date()
-                    if exp_datetime > today:
-                        expirations_data[exp_date].append(iv)
-            
-            if len(expirations_data) < 2:
-                return jsonify({
-                    'error': f'Need at least 2 expiration dates with valid IV data for {ticker}. Found {len(expirations_data)}.'
-                }), 404
-            
-            # Sort expiration dates
-            sorted_expirations = sorted(expirations_data.keys())
-            
-            # Get the two nearest expirations
-            front_exp = sorted_expirations[0]
-            back_exp = sorted_expirations[1]
-            
-            # Calculate average IV for each expiration (more robust than single contract)
-            front_ivs = expirations_data[front_exp]
-            back_ivs = expirations_data[back_exp]
-            
-            front_iv = sum(front_ivs) / len(front_ivs)
-            back_iv = sum(back_ivs) / len(back_ivs)
-            
-            # Calculate DTE for each expiration
-            front_dte = (datetime.strptime(front_exp, '%Y-%m-%d').date() - today).days
-            back_dte = (datetime.strptime(back_exp, '%Y-%m-%d').date() - today).days
-            
-            # Return the data (convert IV to percentage)
-            return jsonify({
-                'ticker': ticker.upper(),
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@options_bp.route('/batch', methods=['GET', 'POST'])
+def batch_lookup():
+    """
+    Lookup Forward Factor pairs for several tickers in one request.
+    
+    Tickers come from a JSON body ({"tickers": ["AAPL", "MSFT"]}) or a
+    comma-separated ?tickers= query parameter. Chains are fetched concurrently
+    under the shared Polygon rate limit and results stream back as
+    newline-delimited JSON, one line per ticker in completion order. Each line
+    carries the ticker's own status; a failed ticker does not fail the batch.
+    """
+    if not POLYGON_API_KEY:
+        return jsonify({'error': 'Polygon API key not configured'}), 500
+    
+    if request.method == 'POST':
+        payload = request.get_json(silent=True) or {}
+        tickers = payload.get('tickers')
+    else:
+        tickers = request.args.get('tickers', '').split(',')
+    
+    if not isinstance(tickers, list) or not all(isinstance(t, str) for t in tickers):
+        return jsonify({'error': 'tickers must be a list of ticker symbols'}), 400
+    
+    # Normalize and drop duplicates, keeping the request order
+    tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t.strip()))
+    if not tickers:
+        return jsonify({'error': 'No tickers given'}), 400
+    if len(tickers) > BATCH_MAX_TICKERS:
+        return jsonify({
+            'error': f'Too many tickers: {len(tickers)} (at most {BATCH_MAX_TICKERS} per request)'
+        }), 400
+    
+    return Response(stream_batch(tickers), mimetype='application/x-ndjson')
+
+
+def stream_batch(tickers):
+    """Yield one NDJSON line per ticker as its lookup completes"""
+    executor = ThreadPoolExecutor(max_workers=min(BATCH_WORKERS, len(tickers)))
+    try:
+        futures = [executor.submit(batch_result, ticker) for ticker in tickers]
+        for future in as_completed(futures):
+            yield json.dumps(future.result()) + '\n'
+    finally:
+        # A client that disconnects early cancels the lookups not yet started
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def batch_result(ticker):
+    """One ticker's batch line: the cached scan plus its status"""
+    try:
+        body, status, cache_state = batch_cache.get(ticker, lambda: scan_lookup(ticker))
+    except Exception as e:
+        body, status, cache_state = {'error': str(e)}, 500, 'MISS'
+    return {'ticker': ticker, 'status': status, 'cache': cache_state, **body}
+
+
+def scan_lookup(ticker):
+    """
+    Fetch a chain and find its Forward Factor pairs with ForwardFactorScanner's
+    expiration grouping (ATM, liquid contracts) and adjacent-expiration pairing.
+    Returns (body dict, HTTP status).
+    """
+    global _scanner
+    
+    contracts, error = fetch_chain(ticker)
+    if error:
+        return error
+    
+    with _scanner_lock:
+        if _scanner is None:
+            from ff_scanner import ForwardFactorScanner
+            _scanner = ForwardFactorScanner(POLYGON_API_KEY)
+        expirations = _scanner.group_by_expiration(contracts)
+        pairs = _scanner.find_best_pairs(expirations) if len(expirations) >= 2 else []
+    
+    if len(expirations) < 2:
+        return {
+            'error': f'Need at least 2 expiration dates with ATM, liquid contracts for {ticker}. Found {len(expirations)}.'
+        }, 404
+    if not pairs:
+        return {'error': f'No valid Forward Factor pairs for {ticker}'}, 404
+    
+    # The scanner keeps Polygon's decimal IV; return percent like /lookup
+    return {
+        'pairs': [
+            {
                 'front_contract': {
-                    'iv': round(front_iv * 100, 2),  # Convert to percentage
-                    'dte': front_dte,
-                    'expiration': front_exp,
-                    'sample_size': len(front_ivs)
+                    'iv': round(pair['front_iv'] * 100, 2),  # Convert to percentage
+                    'dte': pair['front_dte'],
+                    'trading_dte': pair['front_trading_dte'],
+                    'expiration': pair['front_date'].isoformat()
                 },
                 'back_contract': {
-                    'iv': round(back_iv * 100, 2),  # Convert to percentage
-                    'dte': back_dte,
-                    'expiration': back_exp,
-                    'sample_size': len(back_ivs)
-                }
-            })
-            
-        except requests.exceptions.Timeout:
-            return jsonify({
-                'error': 'Request timed out. Please try again.'
-            }), 504
-        except requests.exceptions.RequestException as e:
-            return jsonify({
-                'error': f'Network error: {str(e)}'
-            }), 500
+                    'iv': round(pair['back_iv'] * 100, 2),  # Convert to percentage
+                    'dte': pair['back_dte'],
+                    'trading_dte': pair['back_trading_dte'],
+                    'expiration': pair['back_date'].isoformat()
+                },
+                'forward_vol': round(pair['forward_vol'] * 100, 2),  # Convert to percentage
+                'forward_factor': round(pair['forward_factor'], 2)
+            }
+            for pair in pairs
+        ]
+    }, 200
+
+
+def fetch_chain(ticker):
+    """
+    Fetch the options chain snapshot from Polygon.
+    Returns (contracts, None) on success or (None, (error body dict, HTTP status)).
+    """
+    from ff_rate_limit import get_rate_limiter
+    
+    # Use the direct REST API endpoint for options chain snapshot
+    url = f'https://api.polygon.io/v3/snapshot/options/{ticker.upper()}'
+    params = {
+        'apiKey': POLYGON_API_KEY,
+        'limit': 250
+    }
+    
+    try:
+        # Same quota as ForwardFactorScanner's chain requests (across processes)
+        get_rate_limiter('polygon').acquire()
+        response = requests.get(url, params=params, timeout=30)
         
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        if response.status_code == 403:
+            return None, ({
+                'error': 'Access denied. This feature requires a Polygon.io subscription with options data access.'
+            }, 403)
+        elif response.status_code == 429:
+            return None, ({
+                'error': 'Rate limit exceeded. Please wait a moment and try again.'
+            }, 429)
+        elif response.status_code != 200:
+            return None, ({
+                'error': f'API returned status code {response.status_code}: {response.text}'
+            }, response.status_code)
+        
+        data = response.json()
+        
+        if data.get('status') != 'OK' or 'results' not in data:
+            return None, ({
+                'error': f'No options data found for {ticker}'
+            }, 404)
+        
+        return data['results'], None
+        
+    except requests.exceptions.Timeout:
+        return None, ({
+            'error': 'Request timed out. Please try again.'
+        }, 504)
+    except requests.exceptions.RequestException as e:
+        return None, ({
+            'error': f'Network error: {str(e)}'
+        }, 500)
 
+
+def fetch_lookup(ticker):
+    """
+    Fetch the options chain from Polygon and compute the front/back contract data.
+    Returns (body dict, HTTP status).
+    """
+    # Get current date
+    today = datetime.now().date()
+    
+    contracts, error = fetch_chain(ticker)
+    if error:
+        return error
+    
+    # Group options by expiration date and collect IVs
+    expirations_data = defaultdict(list)
+    
+    for option in contracts:
+        # Check if we have the required data
+        if 'details' not in option or 'implied_volatility' not in option:
+            continue
+        
+        details = option['details']
+        exp_date = details.get('expiration_date')
+        iv = option.get('implied_volatility')
+        
+        # Only include valid IVs and future expirations
+        if iv and iv > 0 and exp_date:
+            exp_datetime = datetime.strptime(exp_date, '%Y-%m-%d').date()
+            if exp_datetime > today:
+                expirations_data[exp_date].append(iv)
+    
+    if len(expirations_data) < 2:
+        return {
+            'error': f'Need at least 2 expiration dates with valid IV data for {ticker}. Found {len(expirations_data)}.'
+        }, 404
+    
+    # Sort expiration dates
+    sorted_expirations = sorted(expirations_data.keys())
+    
+    # Get the two nearest expirations
+    front_exp = sorted_expirations[0]
+    back_exp = sorted_expirations[1]
+    
+    # Calculate average IV for each expiration (more robust than single contract)
+    front_ivs = expirations_data[front_exp]
+    back_ivs = expirations_data[back_exp]
+    
+    front_iv = sum(front_ivs) / len(front_ivs)
+    back_iv = sum(back_ivs) / len(back_ivs)
+    
+    # Calculate DTE for each expiration
+    front_dte = (datetime.strptime(front_exp, '%Y-%m-%d').date() - today).days
+    back_dte = (datetime.strptime(back_exp, '%Y-%m-%d').date() - today).days
+    
+    # Return the data (convert IV to percentage)
+    return {
+        'ticker': ticker.upper(),
+        'front_contract': {
+            'iv': round(front_iv * 100, 2),  # Convert to percentage
+            'dte': front_dte,
+            'expiration': front_exp,
+            'sample_size': len(front_ivs)
+        },
+        'back_contract': {
+            'iv': round(back_iv * 100, 2),  # Convert to percentage
+            'dte': back_dte,
+            'expiration': back_exp,
+            'sample_size': len(back_ivs)
+        }
+    }, 200
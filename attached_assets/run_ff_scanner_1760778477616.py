@@ -13,13 +13,178 @@ Run this script nightly to get trade recommendations.
 import sys
 import os
 from datetime import datetime
-from ff_nightly_scanner import FFScannerService
+from typing import Optional, Sequence
+from ff_nightly_scanner import FFScannerService, SCAN_SOURCES, PROBABILITY_MODELS
 from ff_scheduler import TradingCalendar
-from ff_report_generator import ReportGenerator
+from ff_report_generator import ReportGenerator, ReportWriter
+from ff_report_formats import DIFF_RENDERERS, FORMATS, ReportCache, check_formats, render_files
+from ff_run_journal import RunJournal, journal_path, latest_incomplete_journal
 
 
-def main():
-    """Main entry point for nightly scanner"""
+REPORT_DIR = "/home/ubuntu/ff_reports"
+
+
+def add_scan_arguments(parser):
+    """Add the scan options shared by the nightly run and the scan daemon"""
+    parser.add_argument('--report-dir', default=REPORT_DIR,
+                        help=f'Directory for reports (default: {REPORT_DIR})')
+    parser.add_argument('--report-formats', metavar='NAMES', default='markdown',
+                        help='Comma-separated report formats: markdown, json, html (default: markdown)')
+    parser.add_argument('--diff', action='store_true',
+                        help='Also write new, dropped and re-rated setups since the previous stored run')
+    parser.add_argument('--bulk-earnings', action='store_true',
+                        help='Preload a market-wide earnings calendar instead of per-ticker lookups')
+    parser.add_argument('--earnings-providers', metavar='NAMES',
+                        help='Comma-separated earnings provider fallback order (e.g. polygon,yahoo,finnhub)')
+    parser.add_argument('--source', choices=SCAN_SOURCES, default='api',
+                        help="Opportunity source: 'api' (hosted scanner) or 'local' (run ForwardFactorScanner here)")
+    parser.add_argument('--tickers', nargs='+', help='Tickers for --source local (default: scanner default list)')
+    parser.add_argument('--full', action='store_true',
+                        help='Refetch the scan and re-analyze every opportunity instead of reusing stored results')
+    parser.add_argument('--probability-model', choices=PROBABILITY_MODELS, default='lookup',
+                        help="Probability and risk/reward: 'lookup' (|FF| steps) or 'montecarlo' (simulated spread P&L)")
+    parser.add_argument('--simulation-workers', type=int, default=1,
+                        help='Worker processes for --probability-model montecarlo (default: 1)')
+    parser.add_argument('--time-basis', choices=('calendar', 'trading'), default='calendar',
+                        help="Forward Factor time for --source local: 'calendar' (days/365) or 'trading' (sessions/252)")
+
+
+def build_service(args) -> FFScannerService:
+    """Create the scanner service from parsed scan options"""
+    providers = args.earnings_providers.split(',') if args.earnings_providers else None
+    return FFScannerService(bulk_earnings=args.bulk_earnings, earnings_providers=providers,
+                            source=args.source, tickers=args.tickers, incremental=not args.full,
+                            probability_model=args.probability_model,
+                            simulation_workers=args.simulation_workers, time_basis=args.time_basis)
+
+
+def run_scan(scanner: FFScannerService, report_dir: str, journal: Optional[RunJournal] = None,
+             report_name: Optional[str] = None, report_formats: Sequence[str] = ('markdown',),
+             diff: bool = False, baseline: bool = True) -> str:
+    """
+    Analyze the latest scan, write the reports and record the scan history
+    
+    Args:
+        scanner: Scanner service (a long-running caller keeps it warm between runs)
+        report_dir: Directory for reports
+        journal: Checkpoint journal (None runs without one)
+        report_name: Report file name (defaults to ff_scan_YYYYMMDD.md); other
+            formats swap the extension
+        report_formats: Formats to write (markdown, json, html)
+        diff: Also write the changes since the previous close run
+            (<name>_diff.md / .json for the markdown and JSON formats)
+        baseline: Record this run as the close run later runs are diffed
+            against (False for intraday runs)
+    
+    Returns:
+        Path of the saved report (the markdown one when written)
+    """
+    # Report files with timestamp
+    timestamp = datetime.now().strftime('%Y%m%d')
+    os.makedirs(report_dir, exist_ok=True)
+    stem = os.path.splitext(report_name or f'ff_scan_{timestamp}.md')[0]
+    report_paths = {name: f"{report_dir}/{stem}{FORMATS[name]}" for name in check_formats(report_formats)}
+    
+    if journal is not None and journal.complete:
+        print("Journal shows tonight's run completed; rebuilding the report from it")
+    # Analyses stream into the report model and the scan history as they are made
+    writer = ReportWriter()
+    history = scanner.scan_store.recorder()
+    quality_setups, _ = scanner.run_analysis(journal=journal, report=writer, history=history)
+    print()
+    
+    # Generate every format from one model, concurrently
+    print("Generating report...")
+    model = writer.close()
+    render_files(model, report_paths)
+    
+    for report_filename in report_paths.values():
+        print(f"✅ Report saved: {report_filename}")
+    report_filename = report_paths.get('markdown', report_filename)
+    
+    # Night-over-night changes (against the last close run of another scan)
+    if diff:
+        try:
+            previous = ReportCache().previous_run(model)
+        except Exception as e:
+            print(f"⚠️  Could not load the previous run: {e}")
+            previous = None
+        changes = ReportGenerator().diff_models(model, previous)
+        diff_paths = {name: f"{report_dir}/{stem}_diff{FORMATS[name]}"
+                      for name in report_paths if name in DIFF_RENDERERS}
+        if not diff_paths:  # HTML only: changes as markdown
+            diff_paths = {'markdown': f"{report_dir}/{stem}_diff.md"}
+        render_files(changes, diff_paths, DIFF_RENDERERS)
+        since = f"scan {changes.previous_scan_id}" if changes.previous_scan_id is not None else "no previous run"
+        print(f"Changes since {since}: {len(changes.new)} new, {len(changes.dropped)} dropped, "
+              f"{len(changes.changed)} re-rated")
+        for path in diff_paths.values():
+            print(f"✅ Changes saved: {path}")
+    if journal is not None:
+        journal.mark_complete(report_filename)
+        journal.close()
+    
+    # Persist the last rejection codes and the totals for history queries
+    try:
+        history.close()
+    except Exception as e:
+        print(f"⚠️  Could not save scan history: {e}")
+    
+    # Keep the model for report requests of this scan in any format
+    try:
+        cache = ReportCache()
+        cache.store(model)
+        if baseline:
+            cache.set_baseline(model)
+    except Exception as e:
+        print(f"⚠️  Could not cache report: {e}")
+    print()
+    
+    # Print summary
+    print("=" * 80)
+    print("SCAN COMPLETE")
+    print("=" * 80)
+    print(f"Quality Setups: {len(quality_setups)}")
+    print(f"Rejected: {writer.rejections.total}")
+    for code, count in writer.rejections.code_counts.most_common():
+        print(f"  {code}: {count}")
+    print(f"Report: {report_filename}")
+    
+    if len(quality_setups) > 0:
+        print()
+        print("🎯 HIGH-QUALITY OPPORTUNITIES FOUND:")
+        for i, analysis in enumerate(quality_setups, 1):
+            opp = analysis.opportunity
+            print(f"  {i}. {opp.ticker} - FF: {opp.forward_factor:+.1f}% - Rating: {analysis.rating}/10")
+    else:
+        print()
+        print("ℹ️  No quality setups found tonight (this is normal)")
+        print("   The scanner is highly selective and rejects most signals")
+    
+    print()
+    print("=" * 80)
+    print(f"Completed: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("=" * 80)
+    
+    return report_filename
+
+
+def main(argv=None):
+    """Main entry point for nightly scanner
+    
+    Args:
+        argv: Command line arguments (defaults to sys.argv[1:])
+    """
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog='run_ff_scanner', description='Forward Factor nightly scanner')
+    parser.add_argument('--force', action='store_true',
+                        help='Run even if the trading calendar says not to run tonight')
+    parser.add_argument('--resume', action='store_true',
+                        help="Resume tonight's interrupted run from its journal (or rebuild its report); "
+                             "without a journal for today, the latest run that did not complete")
+    add_scan_arguments(parser)
+    args = parser.parse_args(argv)
     
     print("=" * 80)
     print("FORWARD FACTOR NIGHTLY SCANNER")
@@ -39,7 +204,7 @@ def main():
     print()
     
     # Check if we should run
-    if not schedule_info['should_run_tonight']:
+    if not schedule_info['should_run_tonight'] and not args.force:
         print("⏸️  Scanner will not run tonight:")
         if not schedule_info['is_weekday']:
             print("   - Today is a weekend")
@@ -50,63 +215,30 @@ def main():
         print("=" * 80)
         return
     
-    print("✅ Proceeding with scan (weeknight before trading day)")
+    if schedule_info['should_run_tonight']:
+        print("✅ Proceeding with scan (weeknight before trading day)")
+    else:
+        print("✅ Proceeding with scan (--force)")
     print()
     
     # Run scanner analysis
     print("Running Forward Factor analysis...")
     print("-" * 80)
-    scanner = FFScannerService()
-    quality_setups, rejected_setups = scanner.run_analysis()
-    print()
-    
-    # Generate report
-    print("Generating report...")
-    generator = ReportGenerator()
-    
-    # Get scan ID from first opportunity (if any)
-    scan_id = 0
-    if quality_setups:
-        scan_id = quality_setups[0].opportunity.scan_id
-    elif rejected_setups:
-        scan_id = rejected_setups[0].opportunity.scan_id
-    
-    report = generator.generate_full_report(quality_setups, rejected_setups, scan_id)
-    
-    # Save report with timestamp
-    timestamp = datetime.now().strftime('%Y%m%d')
-    report_dir = "/home/ubuntu/ff_reports"
-    os.makedirs(report_dir, exist_ok=True)
+    scanner = build_service(args)
     
-    report_filename = f"{report_dir}/ff_scan_{timestamp}.md"
-    generator.save_report(report, report_filename)
-    
-    print(f"✅ Report saved: {report_filename}")
-    print()
-    
-    # Print summary
-    print("=" * 80)
-    print("SCAN COMPLETE")
-    print("=" * 80)
-    print(f"Quality Setups: {len(quality_setups)}")
-    print(f"Rejected: {len(rejected_setups)}")
-    print(f"Report: {report_filename}")
-    
-    if len(quality_setups) > 0:
-        print()
-        print("🎯 HIGH-QUALITY OPPORTUNITIES FOUND:")
-        for i, analysis in enumerate(quality_setups, 1):
-            opp = analysis.opportunity
-            print(f"  {i}. {opp.ticker} - FF: {opp.forward_factor:+.1f}% - Rating: {analysis.rating}/10")
-    else:
-        print()
-        print("ℹ️  No quality setups found tonight (this is normal)")
-        print("   The scanner is highly selective and rejects most signals")
-    
-    print()
-    print("=" * 80)
-    print(f"Completed: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print("=" * 80)
+    # Checkpoint every completed analysis so an interrupted run can --resume
+    # (a run that started before midnight is journaled under the day before)
+    path = journal_path()
+    if args.resume and not os.path.exists(path):
+        interrupted = latest_incomplete_journal()
+        if interrupted is not None:
+            print(f"Resuming the interrupted run journaled in {interrupted}")
+            path = interrupted
+    journal = RunJournal(path, resume=args.resume)
+    try:
+        run_scan(scanner, args.report_dir, journal, report_formats=args.report_formats.split(','), diff=args.diff)
+    finally:
+        scanner.close()
 
 
 if __name__ == "__main__":
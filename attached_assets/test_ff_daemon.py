@@ -0,0 +1,82 @@
+#!/usr/bin/env python3.11
+"""
+Tests for the scan daemon's catch-up scheduling
+
+The daemon runs on an injected clock with the built-in NYSE holiday rules,
+so no time passes and nothing is fetched.
+"""
+
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from ff_daemon import ScanDaemon, ScheduledRun
+from ff_scheduler import TradingCalendar
+
+
+class Clock:
+    """Settable stand-in for market_now"""
+    
+    def __init__(self, now: datetime):
+        self.now = now
+    
+    def __call__(self) -> datetime:
+        return self.now
+
+
+class ScanDaemonTest(unittest.TestCase):
+
+    def daemon(self, last_checked: datetime, now: datetime, state_path=None, **kwargs) -> ScanDaemon:
+        self.ran = []
+        daemon = ScanDaemon(self.ran.append, calendar=TradingCalendar(cache_path=None),
+                            state_path=state_path, clock=Clock(last_checked), **kwargs)
+        daemon.clock.now = now
+        return daemon
+    
+    def test_missed_runs_are_coalesced(self):
+        # Down from Monday evening until Thursday evening: three close scans missed
+        daemon = self.daemon(datetime(2026, 10, 12, 17, 0), datetime(2026, 10, 15, 17, 0))
+        self.assertEqual(daemon.run_pending(), [ScheduledRun('close', datetime(2026, 10, 15, 16, 15), 2)])
+        self.assertEqual(len(self.ran), 1)
+        self.assertEqual(daemon.run_pending(), [])
+        self.assertEqual(daemon.last_checked, datetime(2026, 10, 15, 17, 0))
+    
+    def test_holidays_are_not_runs(self):
+        # Thanksgiving is closed, the Friday after closes at 13:00
+        daemon = self.daemon(datetime(2026, 11, 25, 17, 0), datetime(2026, 11, 28, 12, 0))
+        self.assertEqual(daemon.due_runs(daemon.clock()), [ScheduledRun('close', datetime(2026, 11, 27, 13, 15))])
+    
+    def test_close_run_supersedes_older_intraday_run(self):
+        daemon = self.daemon(datetime(2026, 10, 15, 15, 0), datetime(2026, 10, 15, 16, 30),
+                             intraday_every=timedelta(hours=1))
+        self.assertEqual(daemon.due_runs(daemon.clock()), [ScheduledRun('close', datetime(2026, 10, 15, 16, 15))])
+    
+    def test_newer_intraday_run_is_kept(self):
+        daemon = self.daemon(datetime(2026, 10, 15, 15, 0), datetime(2026, 10, 16, 12, 0),
+                             intraday_every=timedelta(hours=1))
+        self.assertEqual(daemon.due_runs(daemon.clock()), [
+            ScheduledRun('close', datetime(2026, 10, 15, 16, 15)),
+            ScheduledRun('intraday', datetime(2026, 10, 16, 11, 30), 2),
+        ])
+    
+    def test_unstarted_runs_resume_after_stop(self):
+        state_path = os.path.join(tempfile.mkdtemp(), 'daemon_state.json')
+        last_checked, now = datetime(2026, 10, 15, 15, 0), datetime(2026, 10, 16, 12, 0)
+        daemon = self.daemon(last_checked, now, state_path, intraday_every=timedelta(hours=1))
+        daemon.run_job = lambda run: (self.ran.append(run), daemon.stop())
+        
+        close = ScheduledRun('close', datetime(2026, 10, 15, 16, 15))
+        self.assertEqual(daemon.run_pending(), [close])
+        self.assertEqual(daemon.last_checked, close.due)
+        
+        # A restarted daemon picks up from the saved state: today's intraday
+        # scans are still due, yesterday's 15:30 one was superseded by the close
+        restarted = self.daemon(last_checked, now, state_path, intraday_every=timedelta(hours=1))
+        self.assertEqual(restarted.last_checked, close.due)
+        self.assertEqual(restarted.run_pending(), [ScheduledRun('intraday', datetime(2026, 10, 16, 11, 30), 1)])
+        self.assertEqual(restarted.run_pending(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
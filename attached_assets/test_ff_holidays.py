@@ -0,0 +1,70 @@
+#!/usr/bin/env python3.11
+"""
+Tests for the built-in NYSE holiday rules
+
+The rule checks run everywhere; the comparison with pandas_market_calendars
+over 2000-2040 runs only where it is installed.
+"""
+
+import unittest
+from datetime import date
+
+from ff_holidays import (EARLY_CLOSE, is_session, nyse_early_closes, nyse_holidays, observed,
+                         validate_against_mcal)
+
+try:
+    import pandas_market_calendars
+except ImportError:  # Optional: only the comparison needs it
+    pandas_market_calendars = None
+
+
+class HolidayRulesTest(unittest.TestCase):
+
+    def test_observed_day_shifts(self):
+        # Saturday -> Friday, Sunday -> Monday, weekdays stay
+        self.assertEqual(observed(date(2026, 7, 4)), date(2026, 7, 3))
+        self.assertEqual(observed(date(2022, 12, 25)), date(2022, 12, 26))
+        self.assertEqual(observed(date(2024, 12, 25)), date(2024, 12, 25))
+        
+        self.assertEqual(nyse_holidays(2026)[date(2026, 7, 3)], "Independence Day")
+        self.assertEqual(nyse_holidays(2022)[date(2022, 12, 26)], "Christmas Day")
+        self.assertFalse(is_session(date(2026, 7, 3)))
+        self.assertFalse(is_session(date(2022, 12, 26)))
+        self.assertTrue(is_session(date(2026, 7, 2)))
+    
+    def test_saturday_new_year_is_not_observed(self):
+        # Jan 1 2022 was a Saturday: Friday Dec 31 2021 traded
+        self.assertNotIn("New Year's Day", nyse_holidays(2022).values())
+        self.assertNotIn(date(2021, 12, 31), nyse_holidays(2021))
+        self.assertTrue(is_session(date(2021, 12, 31)))
+        
+        # A Sunday New Year's Day moves to Monday as usual
+        self.assertEqual(nyse_holidays(2023)[date(2023, 1, 2)], "New Year's Day")
+    
+    def test_juneteenth_from_2022(self):
+        # Jun 19 2021 was a Saturday, before the NYSE observed Juneteenth
+        self.assertNotIn("Juneteenth", nyse_holidays(2021).values())
+        self.assertTrue(is_session(date(2021, 6, 18)))
+        
+        # Sunday in 2022 (observed Monday), Monday in 2023
+        self.assertEqual(nyse_holidays(2022)[date(2022, 6, 20)], "Juneteenth")
+        self.assertEqual(nyse_holidays(2023)[date(2023, 6, 19)], "Juneteenth")
+        self.assertFalse(is_session(date(2022, 6, 20)))
+    
+    def test_independence_day_early_close(self):
+        # Thursday holiday: the Friday after until 2013, the Wednesday before since
+        self.assertEqual(nyse_early_closes(2002).get(date(2002, 7, 5)), EARLY_CLOSE)
+        self.assertNotIn(date(2002, 7, 3), nyse_early_closes(2002))
+        self.assertEqual(nyse_early_closes(2013).get(date(2013, 7, 3)), EARLY_CLOSE)
+        self.assertNotIn(date(2013, 7, 5), nyse_early_closes(2013))
+
+
+@unittest.skipUnless(pandas_market_calendars, "pandas_market_calendars is not installed")
+class McalAgreementTest(unittest.TestCase):
+
+    def test_rules_match_mcal_2000_to_2040(self):
+        self.assertEqual(validate_against_mcal(2000, 2040), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3.11
+"""
+Tests for analyzing ForwardFactorScanner results in-process
+
+Results come from a real ForwardFactorScanner.scan_multiple over stubbed
+Polygon chains (decimal IVs, as Polygon reports them) and go through
+FFScannerService.run_analysis with a run journal, as with --source local.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from datetime import date, timedelta
+from typing import Optional
+
+from ff_earnings_cache import EarningsCache
+from ff_earnings_providers import EarningsProvider, EarningsProviderChain
+from ff_nightly_scanner import FFScannerService, analysis_from_dict, analysis_to_dict
+from ff_run_journal import RunJournal
+from ff_scan_store import ScanStore
+from ff_scanner import ForwardFactorScanner
+
+FRONT_DAYS = 30
+BACK_DAYS = 60
+
+# Front 50% / back 44% over 30 / 60 days: inverted, FF about +35%
+FRONT_IV = 0.50
+BACK_IV = 0.44
+
+
+def stub_chain(front_iv: float = FRONT_IV, back_iv: float = BACK_IV):
+    """Polygon snapshot contracts: three liquid ATM strikes per expiration"""
+    today = date.today()
+    contracts = []
+    for days, iv in ((FRONT_DAYS, front_iv), (BACK_DAYS, back_iv)):
+        expiration = (today + timedelta(days=days)).isoformat()
+        for strike in (100.0, 98.0, 102.0):
+            contracts.append({
+                'details': {'expiration_date': expiration, 'strike_price': strike},
+                'implied_volatility': iv,
+                'greeks': {'delta': 0.5},
+                'open_interest': 500,
+                'day': {'volume': 50},
+            })
+    return contracts
+
+
+class StubEarningsProvider(EarningsProvider):
+    """Earnings dates from a dict"""
+    
+    name = 'stub'
+    
+    def __init__(self, dates):
+        self.dates = dates
+    
+    def fetch(self, ticker: str) -> Optional[str]:
+        return self.dates.get(ticker)
+
+
+class LocalAnalysisTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        
+        scanner = ForwardFactorScanner('test')
+        scanner.fetch_options_chain = lambda ticker, max_results=250: stub_chain()
+        self.results = scanner.scan_multiple(['EARN', 'CALM'])
+        
+        self.earnings_date = (date.today() + timedelta(days=FRONT_DAYS + 5)).isoformat()
+        self.service = FFScannerService(earnings_providers=[], earnings_cache=EarningsCache(':memory:'),
+                                        scan_store=ScanStore(':memory:'))
+        self.service.earnings_chain.close()
+        self.service.earnings_chain = EarningsProviderChain(
+            [StubEarningsProvider({'EARN': self.earnings_date})], hedge=False)
+        self.addCleanup(lambda: self.service.close())
+    
+    def journal(self, resume: bool = False) -> RunJournal:
+        return RunJournal(os.path.join(self.tmp.name, 'run.jsonl'), resume=resume)
+    
+    def analyze(self, journal: RunJournal):
+        try:
+            quality, rejected = self.service.run_analysis(scanner_results=self.results, journal=journal)
+        finally:
+            journal.close()
+        return {a.opportunity.ticker: a for a in quality + rejected}
+    
+    def test_scanner_results_are_normalized(self):
+        analyses = self.analyze(self.journal())
+        self.assertEqual(set(analyses), {'EARN', 'CALM'})
+        
+        opp = analyses['CALM'].opportunity
+        self.assertEqual(opp.front_date, (date.today() + timedelta(days=FRONT_DAYS)).isoformat())
+        self.assertEqual(opp.back_date, (date.today() + timedelta(days=BACK_DAYS)).isoformat())
+        self.assertAlmostEqual(opp.front_iv, FRONT_IV * 100)
+        self.assertAlmostEqual(opp.back_iv, BACK_IV * 100)
+        # FF = front IV / forward vol - 1, in percent on both sides
+        self.assertAlmostEqual(opp.forward_factor, (opp.front_iv / opp.forward_vol - 1) * 100)
+        self.assertGreater(opp.forward_factor, 30)
+        
+        codes = {r.code for r in analyses['CALM'].rejection_codes}
+        self.assertNotIn('FRONT_IV_TOO_LOW', codes)
+        self.assertNotIn('FF_MISMATCH', codes)
+    
+    def test_earnings_reach_local_opportunities(self):
+        analyses = self.analyze(self.journal())
+        
+        earn = analyses['EARN']
+        self.assertIsNotNone(earn.earnings_info)
+        self.assertEqual(earn.earnings_info.earnings_date, self.earnings_date)
+        self.assertTrue(earn.opportunity.has_earnings_soon)
+        self.assertIn('INVERTED_WITH_EARNINGS', {r.code for r in earn.rejection_codes})
+        
+        calm = analyses['CALM']
+        self.assertIsNotNone(calm.earnings_info)
+        self.assertIsNone(calm.earnings_info.earnings_date)
+        self.assertFalse(calm.opportunity.has_earnings_soon)
+        self.assertNotIn('INVERTED_WITH_EARNINGS', {r.code for r in calm.rejection_codes})
+    
+    def test_journal_round_trip(self):
+        analyses = self.analyze(self.journal())
+        for analysis in analyses.values():
+            data = json.loads(json.dumps(analysis_to_dict(analysis)))
+            self.assertEqual(analysis_from_dict(data), analysis)
+        
+        journal = self.journal(resume=True)
+        self.assertTrue(journal.from_scanner)
+        self.assertEqual(len(journal.opportunities), 2)
+        self.assertEqual(len(journal.analyses), 2)
+        
+        # A resumed run analyzes nothing again and gets the same results
+        self.service.earnings_chain.close()
+        self.service.earnings_chain = EarningsProviderChain([], hedge=False)
+        resumed = self.analyze(journal)
+        self.assertEqual(resumed, analyses)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3.11
+"""
+Tests for the Monte Carlo engine's handling of unpriceable spreads
+
+A zero or missing IV, or a back leg that does not outlive the front leg,
+must never turn into NaN metrics: those rows are not simulated and the
+analysis falls back to the lookup model.
+"""
+
+import json
+import math
+import unittest
+
+from ff_earnings_cache import EarningsCache
+from ff_montecarlo import MonteCarloEngine, simulate_columns, simulation_columns
+from ff_nightly_scanner import FFScannerService, Opportunity, analysis_to_dict
+from ff_scan_store import ScanStore
+
+PATHS = 2000
+
+
+def opportunity(forward_factor: float = 45.0, front_dte: int = 33, back_dte: int = 61,
+                front_iv: float = 58.0, back_iv: float = 44.0, forward_vol: float = 40.0,
+                opportunity_id: int = 1) -> Opportunity:
+    return Opportunity('AAA', forward_factor, 'SELL', '2026-11-20', front_dte, front_iv,
+                       '2026-12-18', back_dte, back_iv, forward_vol, 1, opportunity_id)
+
+
+class SimulationValidityTest(unittest.TestCase):
+
+    def setUp(self):
+        self.opportunities = [
+            opportunity(),
+            opportunity(front_iv=0.0),
+            opportunity(back_iv=0.0, forward_vol=0.0),
+            opportunity(front_iv=math.nan),
+            opportunity(back_dte=33),
+            opportunity(back_dte=20),
+        ]
+    
+    def test_invalid_rows_are_flagged(self):
+        columns = simulation_columns(self.opportunities)
+        self.assertEqual(columns['valid'].tolist(), [True, False, False, False, False, False])
+    
+    def test_simulate_columns_prices_only_valid_rows(self):
+        results = simulate_columns(simulation_columns(self.opportunities), PATHS)
+        for values in results.values():
+            self.assertTrue(math.isfinite(values[0]))
+            self.assertTrue(all(math.isnan(value) for value in values[1:]))
+    
+    def test_engine_returns_none_for_invalid_rows(self):
+        results = MonteCarloEngine(paths=PATHS).simulate(self.opportunities)
+        self.assertIsNotNone(results[0])
+        self.assertEqual(results[1:], [None] * 5)
+        
+        # Same result whether or not invalid rows share the batch
+        self.assertEqual(results[0], MonteCarloEngine(paths=PATHS).simulate(self.opportunities[:1])[0])
+
+
+class AnalysisFallbackTest(unittest.TestCase):
+
+    def setUp(self):
+        self.service = FFScannerService(earnings_providers=[], earnings_cache=EarningsCache(':memory:'),
+                                        scan_store=ScanStore(':memory:'), probability_model='montecarlo')
+        self.service.monte_carlo.paths = PATHS
+        self.addCleanup(lambda: self.service.close())
+    
+    def test_quality_setup_is_simulated(self):
+        analysis = self.service.analyze_with_earnings(opportunity(), None)
+        self.assertTrue(analysis.is_quality_setup)
+        self.assertIsNotNone(analysis.expected_pnl)
+    
+    def test_rejected_setup_uses_lookup_model(self):
+        opp = opportunity(forward_factor=10.0, front_iv=44.0)
+        analysis = self.service.analyze_with_earnings(opp, None)
+        self.assertFalse(analysis.is_quality_setup)
+        self.assertIsNone(analysis.expected_pnl)
+        self.assertEqual(analysis.probability, self.service.calculate_probability(opp))
+    
+    def test_unpriceable_setup_uses_lookup_model(self):
+        opp = opportunity(front_iv=0.0)
+        simulation, = self.service.monte_carlo.simulate([opp])
+        analysis = self.service.analyze_with_earnings(opp, None, (True, ()), simulation)
+        self.assertIsNone(analysis.expected_pnl)
+        self.assertIsNone(analysis.max_loss)
+        self.assertEqual(analysis.probability, self.service.calculate_probability(opp))
+        self.assertEqual(analysis.risk_reward, self.service.calculate_risk_reward(opp))
+        
+        # Strict JSON (as the web app parses it) accepts the analysis
+        json.dumps(analysis_to_dict(analysis), allow_nan=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3.11
+"""
+Tests for the options API's single-flight response cache
+
+Loaders block on events so that concurrent requests are known to overlap;
+ages come from an injected clock.
+"""
+
+import threading
+import time
+import unittest
+
+from options import ResponseCache
+
+WAIT = 5.0  # Seconds before a test gives up on a thread
+
+
+class Clock:
+    """Settable stand-in for time.monotonic"""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+class Loader:
+    """Counts calls; each call waits for release() and returns (or raises) result"""
+    
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+        self.released = threading.Event()
+    
+    def release(self):
+        self.released.set()
+    
+    def __call__(self):
+        self.calls += 1
+        self.released.wait(WAIT)
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+def until(condition):
+    """Wait for condition() to hold (fails the test after WAIT)"""
+    deadline = time.monotonic() + WAIT
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out waiting for the cache")
+        time.sleep(0.001)
+
+
+class ResponseCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        self.cache = ResponseCache(ttl=60, stale_ttl=300, clock=self.clock)
+    
+    def get_concurrently(self, key, loader, requests: int):
+        """Start requests for key until all but one wait on the first; returns (outcomes, release)"""
+        outcomes = []
+        
+        def request():
+            try:
+                outcomes.append(self.cache.get(key, loader))
+            except Exception as e:
+                outcomes.append(e)
+        
+        threads = [threading.Thread(target=request) for _ in range(requests)]
+        for thread in threads:
+            thread.start()
+        until(lambda: self.cache.stats['coalesced'] == requests - 1)
+        
+        def release():
+            loader.release()
+            for thread in threads:
+                thread.join(WAIT)
+        return outcomes, release
+    
+    def test_concurrent_misses_share_one_load(self):
+        loader = Loader(({'ticker': 'AAPL'}, 200))
+        outcomes, release = self.get_concurrently('AAPL', loader, 8)
+        release()
+        
+        self.assertEqual(loader.calls, 1)
+        self.assertEqual(sorted(state for _, _, state in outcomes), ['COALESCED'] * 7 + ['MISS'])
+        self.assertTrue(all(body == {'ticker': 'AAPL'} and status == 200 for body, status, _ in outcomes))
+        self.assertEqual(self.cache.get('AAPL', loader), ({'ticker': 'AAPL'}, 200, 'HIT'))
+    
+    def test_stale_entry_is_served_while_one_refresh_runs(self):
+        first = Loader(({'iv': 1}, 200))
+        first.release()
+        self.cache.get('AAPL', first)
+        
+        self.clock.now += 61
+        refresh = Loader(({'iv': 2}, 200))
+        self.assertEqual(self.cache.get('AAPL', refresh), ({'iv': 1}, 200, 'STALE'))
+        self.assertEqual(self.cache.get('AAPL', refresh), ({'iv': 1}, 200, 'STALE'))
+        refresh.release()
+        until(lambda: 'AAPL' not in self.cache._flights)
+        
+        self.assertEqual(refresh.calls, 1)
+        self.assertEqual(self.cache.stats['refresh'], 1)
+        self.assertEqual(self.cache.get('AAPL', refresh), ({'iv': 2}, 200, 'HIT'))
+    
+    def test_expired_entry_is_a_miss(self):
+        first = Loader(({'iv': 1}, 200))
+        first.release()
+        self.cache.get('AAPL', first)
+        
+        self.clock.now += 60 + 300
+        second = Loader(({'iv': 2}, 200))
+        second.release()
+        self.assertEqual(self.cache.get('AAPL', second), ({'iv': 2}, 200, 'MISS'))
+    
+    def test_errors_are_shared_but_not_cached(self):
+        error = ConnectionError('Polygon is down')
+        outcomes, release = self.get_concurrently('AAPL', Loader(error), 4)
+        release()
+        self.assertEqual(outcomes, [error] * 4)
+        
+        failed = Loader(({'error': 'No options data'}, 404))
+        failed.release()
+        self.assertEqual(self.cache.get('AAPL', failed), ({'error': 'No options data'}, 404, 'MISS'))
+        self.assertEqual(self.cache.get('AAPL', failed), ({'error': 'No options data'}, 404, 'MISS'))
+        self.assertEqual(failed.calls, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()